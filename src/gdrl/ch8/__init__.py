@@ -1,16 +1,19 @@
 """Code for chapter 8 of the GDRL book."""
 
 from .discounted_cartpole import DiscountedCartPole
+from .dqn import DQN
 from .egreedy_strategy import EGreedyStrategy
-from .fcq import FCQ
+from .fcq import FCQ, FCQEnsemble
 from .greedy_strategy import GreedyStrategy
 from .nfq import BEEP, NFQ
 
 __all__ = [
     "FCQ",
+    "FCQEnsemble",
     "EGreedyStrategy",
     "GreedyStrategy",
     "DiscountedCartPole",
     "NFQ",
+    "DQN",
     "BEEP",
 ]
@@ -0,0 +1,267 @@
+import queue
+import random
+import time
+
+import cloudpickle
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from torch.nn.utils import parameters_to_vector
+
+
+class SharedWeights:
+    def __init__(self, model):
+        """
+        Initialize a shared-memory block holding a model's flattened parameters.
+
+        The learner publishes its weights by copying them into the block and
+        bumping a version counter; actors poll the counter and copy the block
+        into their local model when it changes. Both copies are plain memory
+        copies: the weights are never pickled or sent through a pipe. The block
+        is handed to actor processes when they start.
+
+        Args:
+        ----
+            model (nn.Module): Model whose parameters size the block; its
+                current weights are the first published version.
+
+        """
+        self.params = (
+            parameters_to_vector(model.parameters()).detach().cpu().share_memory_()
+        )
+        self.version = mp.get_context("spawn").Value("q", 0)
+
+    def publish(self, model):
+        flat = parameters_to_vector(model.parameters()).detach()
+        with self.version.get_lock():
+            self.params.copy_(flat)
+            self.version.value += 1
+
+    def pull(self, model, version):
+        """
+        Copy the published weights into ``model`` if they are newer than ``version``.
+
+        :param model: Model with the same parameter layout as the publisher.
+        :param version: Version ``model`` currently holds, -1 for none.
+        :return: Version ``model`` holds afterwards.
+        """
+        # Unlocked read; a stale value only delays the copy to the next call
+        if self.version.get_obj().value == version:
+            return version
+        with self.version.get_lock():
+            flat = self.params.clone()
+            version = self.version.value
+        with torch.no_grad():
+            offset = 0
+            for param in model.parameters():
+                n = param.numel()
+                # In place, so a traced forward sharing the parameters sees them
+                param.copy_(flat[offset : offset + n].view_as(param))
+                offset += n
+        return version
+
+
+def _next_free_slot(free_queue, stop_event):
+    while not stop_event.is_set():
+        try:
+            return free_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _run_actor(actor_args, payload):
+    actor_id, seed, slots, full_queue, free_queue, weights, stop_event = actor_args
+    make_env_fn, make_env_kargs, value_model_fn, training_strategy_fn, n_threads = (
+        cloudpickle.loads(payload)
+    )
+    torch.set_num_threads(n_threads)
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    random.seed(seed)
+    env = make_env_fn(**make_env_kargs, seed=seed)
+    n_states = int(np.prod(env.observation_space.shape))
+    model = value_model_fn(n_states, env.action_space.n)
+    strategy = training_strategy_fn()
+    if hasattr(strategy, "reseed"):
+        # Otherwise every actor would explore with the same random stream
+        strategy.reseed(seed)
+    if not np.isscalar(getattr(strategy, "epsilon", 0.0)):
+        strategy.epsilon = strategy.epsilon[actor_id]
+    version = weights.pull(model, -1)
+    rows = slots.numpy()
+
+    slot, n_rows, episodes = _next_free_slot(free_queue, stop_event), 0, []
+    state, _info = env.reset()
+    episode_reward, episode_timestep, episode_exploration = 0.0, 0, 0
+    episode_start = time.time()
+    while slot is not None:
+        version = weights.pull(model, version)
+        action = strategy.select_action(model, state)
+        new_state, reward, is_terminal, is_truncated, _info = env.step(action)
+
+        row = rows[slot, n_rows]
+        row[:n_states] = np.ravel(state)
+        row[n_states : n_states + 3] = (action, reward, is_terminal)
+        row[n_states + 3 :] = np.ravel(new_state)
+        n_rows += 1
+        episode_reward += reward
+        episode_timestep += 1
+        episode_exploration += int(strategy.exploratory_action_taken)
+        state = new_state
+        if is_terminal or is_truncated:
+            episodes.append(
+                (
+                    episode_reward,
+                    episode_timestep,
+                    episode_exploration,
+                    time.time() - episode_start,
+                )
+            )
+            state, _info = env.reset()
+            episode_reward, episode_timestep, episode_exploration = 0.0, 0, 0
+            episode_start = time.time()
+
+        if n_rows == len(rows[slot]):
+            full_queue.put((actor_id, slot, n_rows, episodes))
+            n_rows, episodes = 0, []
+            slot = _next_free_slot(free_queue, stop_event)
+
+    # Exit without waiting for the learner to read what is still queued
+    full_queue.cancel_join_thread()
+    env.close()
+
+
+class ActorPool:
+    def __init__(
+        self,
+        make_env_fn,
+        make_env_kargs,
+        value_model_fn,
+        training_strategy_fn,
+        shared_weights,
+        state_shape,
+        n_actors,
+        seed,
+        chunk_size=32,
+        n_slots=4,
+        torch_threads_per_actor=1,
+    ):
+        """
+        Initialize actor processes that collect transitions for a learner.
+
+        Each actor steps its own environment with its own strategy and a local
+        copy of the model, kept current from ``shared_weights``. Transitions
+        are written, ``chunk_size`` rows at a time, into slots of a
+        shared-memory array; only the slot index goes through a queue. Every
+        actor owns ``n_slots`` slots and blocks when the learner has not yet
+        consumed any of them, so a slow learner throttles the actors instead of
+        letting the queue grow.
+
+        Args:
+        ----
+            make_env_fn: Function that creates the environment.
+            make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+            value_model_fn: Function to create the actors' local models.
+            training_strategy_fn: Function to create each actor's strategy.
+                Given an epsilon array, e.g. ``EGreedyStrategy.apex``, actor
+                ``i`` explores with its ``i``-th entry.
+            shared_weights (SharedWeights): Block the learner publishes to.
+            state_shape (tuple): Shape of a single state.
+            n_actors (int): Number of actor processes.
+            seed (int): Actor ``i`` seeds its environment, its RNGs and its
+                strategy's exploration with ``seed + i``.
+            chunk_size (int): Transitions per slot.
+            n_slots (int): Slots per actor.
+            torch_threads_per_actor (int): Torch intra-op threads per actor.
+
+        """
+        self.n_states = int(np.prod(state_shape))
+        self.state_shape = tuple(state_shape)
+        ctx = mp.get_context("spawn")
+        # One row per transition: state, action, reward, is_terminal, new state
+        self.slots = torch.zeros(
+            (n_actors, n_slots, chunk_size, 2 * self.n_states + 3)
+        ).share_memory_()
+        self._rows = self.slots.numpy()
+        self.full_queue = ctx.Queue()
+        self.free_queues = [ctx.Queue() for _ in range(n_actors)]
+        for free_queue in self.free_queues:
+            for slot in range(n_slots):
+                free_queue.put(slot)
+        self.stop_event = ctx.Event()
+        # Process.start drops its arguments, and the children rebuild the
+        # shared objects from names that must still exist
+        self.shared_weights = shared_weights
+        payload = cloudpickle.dumps(
+            (
+                make_env_fn,
+                make_env_kargs,
+                value_model_fn,
+                training_strategy_fn,
+                torch_threads_per_actor,
+            )
+        )
+        self.processes = [
+            ctx.Process(
+                target=_run_actor,
+                args=(
+                    (
+                        actor_id,
+                        seed + actor_id,
+                        self.slots[actor_id],
+                        self.full_queue,
+                        self.free_queues[actor_id],
+                        self.shared_weights,
+                        self.stop_event,
+                    ),
+                    payload,
+                ),
+                daemon=True,
+            )
+            for actor_id in range(n_actors)
+        ]
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+
+    def receive(self, buffer, timeout=0.1):
+        """
+        Move one chunk of transitions, if one arrives in time, into ``buffer``.
+
+        :param buffer: ``ExperienceBuffer`` to ``store_batch`` the chunk in.
+        :param timeout: Seconds to wait for a chunk.
+        :return: List of (reward, timestep, exploration, seconds) tuples, one
+                 per episode the actor finished while filling the chunk.
+        """
+        try:
+            actor_id, slot, n_rows, episodes = self.full_queue.get(timeout=timeout)
+        except queue.Empty:
+            self._check_actors()
+            return []
+        rows = self._rows[actor_id, slot, :n_rows]
+        n = self.n_states
+        buffer.store_batch(
+            rows[:, :n].reshape(n_rows, *self.state_shape),
+            rows[:, n].astype(np.int64),
+            rows[:, n + 1],
+            rows[:, n + 3 :].reshape(n_rows, *self.state_shape),
+            rows[:, n + 2],
+        )
+        # store_batch copied the rows, so the actor can refill the slot
+        self.free_queues[actor_id].put(slot)
+        return episodes
+
+    def _check_actors(self):
+        for actor_id, process in enumerate(self.processes):
+            if process.exitcode not in {None, 0}:
+                msg = f"Actor {actor_id} exited with code {process.exitcode}"
+                raise RuntimeError(msg)
+
+    def close(self):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
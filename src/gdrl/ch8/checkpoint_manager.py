@@ -0,0 +1,246 @@
+import queue
+import threading
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+def get_checkpoint_schedule(max_episodes, n_checkpoints=5, spacing="linspace"):
+    """
+    Return the episode indexes whose checkpoints are kept over a run.
+
+    Args:
+    ----
+        max_episodes (int): Number of episodes the run may last.
+        n_checkpoints (int): Number of checkpoints to spread over the run.
+        spacing (str): ``"linspace"`` spreads them evenly, ``"geomspace"``
+            concentrates them early in training, where the policy changes most.
+
+    Returns:
+    -------
+        np.ndarray: Sorted, unique episode indexes.
+
+    """
+    if spacing == "linspace":
+        idxs = np.linspace(1, max_episodes, n_checkpoints, endpoint=True)
+    elif spacing == "geomspace":
+        idxs = np.geomspace(1, max_episodes, n_checkpoints, endpoint=True)
+    else:
+        msg = f"Unknown checkpoint spacing: {spacing}"
+        raise ValueError(msg)
+    return np.unique(idxs.astype(np.int64) - 1)
+
+
+class CheckpointManager:
+    def __init__(
+        self,
+        checkpoint_dir,
+        max_episodes,
+        n_checkpoints=5,
+        spacing="linspace",
+        keep_best=True,
+        background_writes=False,
+        max_pending_writes=2,
+    ):
+        """
+        Initialize a checkpoint manager that only writes checkpoints it will keep.
+
+        Checkpoints are written for the episodes scheduled over ``max_episodes``
+        and for a bounded set of evenly strided candidates: once there are more
+        than ``2 * n_checkpoints`` candidates, every other one is deleted and the
+        stride doubles. On ``close`` the schedule is re-spaced over the episodes
+        actually run, so a run that stops early still keeps checkpoints spread
+        across it; the written checkpoints nearest to it are kept, plus the
+        best-scoring and the last episode, and the rest are deleted. Checkpoints
+        are copied to CPU into a bounded pool of reusable state-dict buffers; with
+        background writes a writer thread saves them so training does not block
+        on disk I/O, and the pool size caps how far the writer may fall behind.
+
+        Args:
+        ----
+            checkpoint_dir (str or Path): Directory the checkpoints are written to.
+            max_episodes (int): Number of episodes the run may last.
+            n_checkpoints (int): Number of scheduled checkpoints.
+            spacing (str): Schedule spacing, see ``get_checkpoint_schedule``.
+            keep_best (bool): Also keep the checkpoint with the best score.
+            background_writes (bool): Write checkpoints from a background thread.
+            max_pending_writes (int): Number of CPU buffers in the write pool.
+
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.n_checkpoints = n_checkpoints
+        self.spacing = spacing
+        self.schedule = set(
+            get_checkpoint_schedule(max_episodes, n_checkpoints, spacing).tolist()
+        )
+        self.keep_best = keep_best
+        self.best_score = float("-inf")
+        self.best_episode_idx = None
+        self.last_episode_idx = None
+        self.paths = {}
+
+        self._stride = 1
+        self._candidates = set()
+        self._best_state = None
+        self._last_model = None
+        self._free_buffers = queue.Queue()
+        self._n_buffers = 0
+        self._max_buffers = max_pending_writes
+        self._closed = False
+        self._write_error = None
+        self._writes = None
+        self._writer = None
+        if background_writes:
+            self._writes = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def offer(self, episode_idx, model, score=None):
+        """
+        Offer the model at the end of ``episode_idx`` for checkpointing.
+
+        :param episode_idx: Zero-based index of the episode that just finished.
+        :param model: Model whose weights would be checkpointed.
+        :param score: Score used to track the best checkpoint, or None.
+        """
+        state_dict = model.state_dict()
+        scheduled = episode_idx in self.schedule
+        if scheduled or episode_idx % self._stride == 0:
+            self._write(episode_idx, self._copy_to_cpu(self._acquire(), state_dict))
+        if not scheduled and episode_idx % self._stride == 0:
+            self._candidates.add(episode_idx)
+            self._thin_candidates()
+
+        if self.keep_best and score is not None and score > self.best_score:
+            self.best_score = score
+            self.best_episode_idx = episode_idx
+            self._best_state = self._copy_to_cpu(self._best_state, state_dict)
+
+        # The last checkpoint is only copied on close: keeping a reference to the
+        # model avoids copying its weights after every episode.
+        self.last_episode_idx = episode_idx
+        self._last_model = model
+
+    def state_dict(self):
+        """Return the best-checkpoint tracking and the checkpoints written so far."""
+        return {
+            "best_score": self.best_score,
+            "best_episode_idx": self.best_episode_idx,
+            "best_state": self._best_state,
+            "paths": dict(self.paths),
+            "stride": self._stride,
+            "candidates": set(self._candidates),
+        }
+
+    def load_state_dict(self, state):
+        """Restore ``state_dict``, dropping checkpoints whose files are gone."""
+        self.best_score = state["best_score"]
+        self.best_episode_idx = state["best_episode_idx"]
+        self._best_state = state["best_state"]
+        self.paths = {
+            idx: path for idx, path in state["paths"].items() if Path(path).exists()
+        }
+        self._stride = state["stride"]
+        self._candidates = state["candidates"] & set(self.paths)
+
+    def close(self):
+        """
+        Re-space the kept checkpoints over the run and persist the best and last.
+
+        The written checkpoints nearest to the schedule over the episodes actually
+        run are kept and the others deleted, after pending writes finish.
+
+        :return: Dict mapping episode index to checkpoint path, sorted by episode.
+        """
+        if self._closed:
+            return self.paths
+        self._closed = True
+
+        if self.last_episode_idx is not None and self.paths:
+            # The last checkpoint is always kept, so it is a candidate too
+            written = np.array(
+                [*self.paths.keys() - {self.last_episode_idx}, self.last_episode_idx]
+            )
+            targets = get_checkpoint_schedule(
+                self.last_episode_idx + 1, self.n_checkpoints, self.spacing
+            )
+            nearest = np.abs(written[:, None] - targets[None, :]).argmin(axis=0)
+            kept = set(written[nearest].tolist())
+            for episode_idx in set(self.paths) - kept:
+                self._remove(episode_idx)
+        if self.keep_best and self._best_state is not None:
+            self._write(self.best_episode_idx, self._best_state, recycle=False)
+        if self._last_model is not None:
+            last_state = self._copy_to_cpu(None, self._last_model.state_dict())
+            self._write(self.last_episode_idx, last_state, recycle=False)
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+        if self._write_error is not None:
+            raise self._write_error
+
+        self.paths = dict(sorted(self.paths.items()))
+        return self.paths
+
+    def _acquire(self):
+        try:
+            return self._free_buffers.get_nowait()
+        except queue.Empty:
+            if self._n_buffers < self._max_buffers:
+                self._n_buffers += 1
+                return None
+            return self._free_buffers.get()
+
+    def _copy_to_cpu(self, buffer, state_dict):
+        if buffer is None:
+            return {k: v.detach().to("cpu", copy=True) for k, v in state_dict.items()}
+        for k, v in state_dict.items():
+            buffer[k].copy_(v.detach())
+        return buffer
+
+    def _thin_candidates(self):
+        if len(self._candidates) <= 2 * self.n_checkpoints:
+            return
+        self._stride *= 2
+        dropped = {idx for idx in self._candidates if idx % self._stride}
+        self._candidates -= dropped
+        for episode_idx in dropped:
+            self._remove(episode_idx)
+
+    def _remove(self, episode_idx):
+        path = self.paths.pop(episode_idx)
+        if self._writer is None:
+            path.unlink(missing_ok=True)
+        else:
+            # Queued behind the pending write of the same file
+            self._writes.put((path, None, False))
+
+    def _write(self, episode_idx, state, recycle=True):
+        if episode_idx in self.paths:
+            if recycle:
+                self._free_buffers.put(state)
+            return
+        # Claim the episode so the best and last checkpoints are not written twice
+        path = self.checkpoint_dir / f"model.{episode_idx}.tar"
+        self.paths[episode_idx] = path
+        if self._writer is None:
+            torch.save(state, path)
+            if recycle:
+                self._free_buffers.put(state)
+        else:
+            self._writes.put((path, state, recycle))
+
+    def _write_loop(self):
+        while (item := self._writes.get()) is not None:
+            path, state, recycle = item
+            try:
+                if state is None:
+                    path.unlink(missing_ok=True)
+                else:
+                    torch.save(state, path)
+            except Exception as e:  # noqa: BLE001
+                # Re-raised from close(); keep draining so offer() never blocks
+                self._write_error = e
+            if recycle:
+                self._free_buffers.put(state)
@@ -0,0 +1,149 @@
+import torch
+
+from .experience_buffer import ExperienceBuffer
+from .nfq import NFQ
+from .replay_buffer import PrioritizedReplayBuffer
+
+
+class DQN(NFQ):
+    def __init__(
+        self,
+        value_model_fn,
+        value_optimizer_fn,
+        value_optimizer_lr,
+        training_strategy_fn,
+        evaluation_strategy_fn,
+        batch_size,
+        replay_capacity=50_000,
+        n_warmup_batches=5,
+        update_target_every_steps=10,
+        epochs=1,
+        prioritized_replay=False,
+        priority_alpha=0.6,
+        priority_beta0=0.4,
+        priority_beta_anneal_steps=100_000,
+    ):
+        """
+        Initialize the DQN agent with a replay buffer and a target network.
+
+        Unlike ``NFQ``, which optimizes on each batch of fresh experiences and
+        then discards it, DQN keeps the last ``replay_capacity`` transitions and
+        takes its optimization steps on minibatches sampled from them after
+        every interaction step. The TD targets bootstrap from a target network,
+        a copy of the online model refreshed every ``update_target_every_steps``
+        steps. Training, evaluation, checkpoints, metrics and snapshots work as
+        in ``NFQ``.
+
+        Args:
+        ----
+            value_model_fn: Function to create the value model; it also creates
+                the target network.
+            value_optimizer_fn: Function to create the optimizer.
+            value_optimizer_lr: Learning rate for the optimizer.
+            training_strategy_fn: Function to create the training strategy.
+            evaluation_strategy_fn: Function to create the evaluation strategy.
+            batch_size: Number of transitions sampled per optimization step.
+            replay_capacity: Maximum number of transitions kept for replay.
+            n_warmup_batches: Batches worth of transitions to collect before
+                the first optimization step.
+            update_target_every_steps: Interaction steps, counted from the
+                first optimization step, between copies of the online weights
+                into the target network.
+            epochs: Optimization steps, each on a fresh sample, per interaction
+                step.
+            prioritized_replay: Sample transitions in proportion to their TD
+                errors from a ``PrioritizedReplayBuffer`` instead of uniformly.
+            priority_alpha: How much prioritization is used, 0 being uniform.
+            priority_beta0: Initial importance sampling exponent, annealed to 1.
+            priority_beta_anneal_steps: Optimization steps over which the
+                importance sampling exponent reaches 1.
+
+        """
+        super().__init__(
+            value_model_fn,
+            value_optimizer_fn,
+            value_optimizer_lr,
+            training_strategy_fn,
+            evaluation_strategy_fn,
+            batch_size,
+            epochs,
+        )
+        self.replay_capacity = replay_capacity
+        self.n_warmup_batches = n_warmup_batches
+        self.update_target_every_steps = update_target_every_steps
+        self.prioritized_replay = prioritized_replay
+        self.priority_alpha = priority_alpha
+        self.priority_beta0 = priority_beta0
+        self.priority_beta_anneal_steps = priority_beta_anneal_steps
+        self.n_optimization_steps = 0
+
+    def _build_models(self, n_states, n_actions):
+        super()._build_models(n_states, n_actions)
+        # A fresh model rather than a deepcopy, which would share a traced
+        # forward pass with the online model
+        self.target_model = self.value_model_fn(n_states, n_actions)
+        self.update_target_model()
+        self.n_optimization_steps = 0
+
+    def update_target_model(self):
+        """Copy the online model's weights into the target network."""
+        self.target_model.load_state_dict(self.online_model.state_dict())
+
+    def _bootstrap_model(self):
+        return self.target_model
+
+    def _make_experience_buffer(self, state_shape, _n_envs):
+        if self.prioritized_replay:
+            return PrioritizedReplayBuffer(
+                self.replay_capacity,
+                state_shape,
+                alpha=self.priority_alpha,
+                beta0=self.priority_beta0,
+                beta_anneal_steps=self.priority_beta_anneal_steps,
+                seed=self.seed,
+            )
+        return ExperienceBuffer(self.replay_capacity, state_shape, seed=self.seed)
+
+    def _should_optimize(self):
+        return len(self.experiences) >= self.batch_size * self.n_warmup_batches
+
+    def _optimize_on_experiences(self):
+        for _ in range(self.epochs):
+            with self.phase_timer.phase("batch_assembly"):
+                idxs, batch = self.experiences.sample(self.batch_size)
+                experiences = self.online_model.load(batch)
+                weights = None
+                if self.prioritized_replay:
+                    weights = torch.as_tensor(
+                        self.experiences.importance_weights(idxs),
+                        device=experiences[0].device,
+                    )
+            with self.phase_timer.phase("optimize_model"):
+                td_errors = self.optimize_model(experiences, weights=weights)
+            if self.prioritized_replay:
+                with self.phase_timer.phase("priority_update"):
+                    self.experiences.update_priorities(
+                        idxs, td_errors.abs().cpu().numpy()
+                    )
+        self._count_optimization_step()
+
+    def _optimize_on_batch(self, batch):
+        super()._optimize_on_batch(batch)
+        self._count_optimization_step()
+
+    def _count_optimization_step(self):
+        self.n_optimization_steps += 1
+        if self.n_optimization_steps % self.update_target_every_steps == 0:
+            self.update_target_model()
+
+    def _snapshot_state(self, env):
+        return {
+            **super()._snapshot_state(env),
+            "target_model": self.target_model.state_dict(),
+            "n_optimization_steps": self.n_optimization_steps,
+        }
+
+    def _restore_snapshot(self, snapshot, env):
+        super()._restore_snapshot(snapshot, env)
+        self.target_model.load_state_dict(snapshot["target_model"])
+        self.n_optimization_steps = snapshot["n_optimization_steps"]
@@ -8,22 +8,78 @@ class EGreedyStrategy:
         Initialize the Epsilon-Greedy strategy.
 
         :param epsilon: Probability of taking a random action (exploration).
-                        Default is 0.1 (10% exploration).
+                        Default is 0.1 (10% exploration). A sequence gives
+                        ``select_actions`` one epsilon per environment, see
+                        ``apex``.
         :param seed: Random seed for reproducibility. Default is 123.
         """
-        self.epsilon = epsilon
+        self.epsilon = epsilon if np.isscalar(epsilon) else np.asarray(epsilon)
         self.exploratory_action_taken = None
         self._rng = np.random.RandomState(seed)
 
+    @classmethod
+    def apex(cls, n_envs, base_epsilon=0.4, alpha=7.0, seed=123) -> "EGreedyStrategy":
+        """
+        Create a strategy with the Ape-X spread of per-environment epsilons.
+
+        Environment ``i`` of ``n_envs`` explores with
+        ``base_epsilon ** (1 + alpha * i / (n_envs - 1))``, so a few explore a
+        lot while most act close to greedily.
+
+        :param n_envs: Number of environments.
+        :param base_epsilon: Epsilon of the most exploratory environment.
+        :param alpha: How quickly epsilon decays across the environments.
+        :param seed: Random seed for reproducibility.
+        :return: An ``EGreedyStrategy`` with an ``[n_envs]`` epsilon array.
+        """
+        exponents = 1 + alpha * np.arange(n_envs) / max(n_envs - 1, 1)
+        return cls(epsilon=base_epsilon**exponents, seed=seed)
+
+    def reseed(self, seed):
+        """Restart the exploration random stream from ``seed``."""
+        self._rng = np.random.RandomState(seed)
+
     def select_action(self, model, state):
-        self.exploratory_action_taken = False
-        with torch.no_grad():
-            q_values = model(state).cpu().detach().data.numpy().squeeze()
+        if not np.isscalar(self.epsilon):
+            msg = "select_action needs a scalar epsilon; use select_actions"
+            raise ValueError(msg)
+        if hasattr(model, "greedy_action"):
+            greedy_action, q_values = model.greedy_action(state, return_q_values=True)
+            n_actions = q_values.shape[-1]
+        else:
+            with torch.no_grad():
+                q_values = model(state).cpu().detach().data.numpy().squeeze()
+            greedy_action, n_actions = np.argmax(q_values), len(q_values)
 
         if self._rng.rand() > self.epsilon:
-            action = np.argmax(q_values)
+            action = greedy_action
         else:
-            action = self._rng.randint(len(q_values))
+            action = self._rng.randint(n_actions)
 
-        self.exploratory_action_taken = action != np.argmax(q_values)
+        self.exploratory_action_taken = action != greedy_action
         return action
+
+    def select_actions(self, model, states):
+        """
+        Select one action per row of a batch of states with a single forward pass.
+
+        :param model: Q-value model mapping ``[N, obs_dim]`` states to ``[N, nA]``.
+        :param states: Batch of states, one per environment.
+        :return: Array of ``N`` actions. ``exploratory_action_taken`` is set to a
+                 boolean array flagging the actions that differ from the greedy one.
+                 With an epsilon array, row ``i`` explores with ``epsilon[i]``.
+        """
+        with torch.no_grad():
+            q_values = model(states).cpu().detach().data.numpy()
+
+        greedy_actions = np.argmax(q_values, axis=1)
+        n_states, n_actions = q_values.shape
+        if not np.isscalar(self.epsilon) and self.epsilon.shape != (n_states,):
+            msg = f"Expected {n_states} epsilons, got {self.epsilon.shape}"
+            raise ValueError(msg)
+        explore = self._rng.rand(n_states) <= self.epsilon
+        random_actions = self._rng.randint(n_actions, size=n_states)
+        actions = np.where(explore, random_actions, greedy_actions)
+
+        self.exploratory_action_taken = actions != greedy_actions
+        return actions
@@ -1,6 +1,7 @@
 import logging
 import tempfile
 from collections.abc import Callable
+from functools import partial
 from typing import Any
 
 import gymnasium as gym
@@ -82,3 +83,94 @@ def get_make_env_fn(**kargs: dict[str, Any]):
         return env
 
     return make_env_fn, kargs
+
+
+def make_vector_env(
+    make_env_fn: Callable,
+    make_env_kargs: dict[str, Any],
+    n_envs: int,
+    seed: int | None = None,
+    vectorization_mode: str = "sync",
+) -> gym.vector.VectorEnv:
+    """
+    Create a Gymnasium vector environment with ``n_envs`` copies of an environment.
+
+    Each copy is built by ``make_env_fn`` (as returned by ``get_make_env_fn``) and
+    receives its own seed, ``seed + i``, so the copies do not replay the same
+    trajectories.
+
+    Args:
+    ----
+        make_env_fn: Function that creates a single environment.
+        make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+        n_envs: Number of environment copies.
+        seed: Base seed for the copies, or None to leave them unseeded.
+        vectorization_mode: ``"sync"`` steps the copies in this process,
+            ``"async"`` steps each copy in its own worker process.
+
+    Returns:
+    -------
+        gym.vector.VectorEnv: The vectorized environment.
+
+    """
+    env_fns = [
+        partial(
+            make_env_fn,
+            **make_env_kargs,
+            seed=None if seed is None else seed + i,
+        )
+        for i in range(n_envs)
+    ]
+    if vectorization_mode == "sync":
+        return gym.vector.SyncVectorEnv(env_fns)
+    if vectorization_mode == "async":
+        return gym.vector.AsyncVectorEnv(env_fns)
+    msg = f"Unknown vectorization mode: {vectorization_mode}"
+    raise ValueError(msg)
+
+
+def get_env_rng_state(env: gym.Env) -> dict[str, Any] | None:
+    """
+    Return the state of an environment's random number generator.
+
+    Tabular environments that sample outcomes from blocks of uniforms drawn
+    ahead of time, see ``OutcomeSampler``, have the sampler's position in its
+    block saved too, since the generator's state alone does not hold it.
+
+    Args:
+    ----
+        env: Environment, possibly wrapped. Objects without a ``np_random``
+            generator, such as test doubles, have no state.
+
+    Returns:
+    -------
+        dict or None: The generator's ``bit_generator.state`` and the state of
+        the environment's ``outcome_sampler``, if it has one.
+
+    """
+    if not hasattr(env, "np_random"):
+        return None
+    sampler = getattr(env.unwrapped, "outcome_sampler", None)
+    return {
+        "np_random": env.np_random.bit_generator.state,
+        "outcome_sampler": sampler.state_dict() if sampler is not None else None,
+    }
+
+
+def set_env_rng_state(env: gym.Env, state: dict[str, Any] | None) -> None:
+    """
+    Restore an environment's random number generator from ``get_env_rng_state``.
+
+    Args:
+    ----
+        env: Environment, possibly wrapped.
+        state: State returned by ``get_env_rng_state``; None is a no-op.
+
+    """
+    if state is None:
+        return
+    env.np_random.bit_generator.state = state["np_random"]
+    if state["outcome_sampler"] is not None:
+        env.unwrapped.outcome_sampler.load_state_dict(
+            state["outcome_sampler"], env.np_random
+        )
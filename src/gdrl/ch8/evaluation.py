@@ -0,0 +1,270 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+from multiprocessing import get_context
+
+import cloudpickle
+import numpy as np
+
+from .env_utils import get_env_rng_state, set_env_rng_state
+
+EVALUATION_WORKERS = (None, "thread", "process")
+
+
+def evaluate_episodes(model, strategy, env, n_episodes=1):
+    """
+    Run full evaluation episodes and return the return of each one.
+
+    Args:
+    ----
+        model: Q-value model the strategy acts on.
+        strategy: Strategy with a ``select_action(model, state)`` method.
+        env: Environment to evaluate on.
+        n_episodes (int): Number of episodes to run.
+
+    Returns:
+    -------
+        list: Undiscounted return of each episode.
+
+    """
+    rs = []
+    for _ in range(n_episodes):
+        obs, _info = env.reset()  # Unpack observation and info dictionary
+        s = obs  # Assign the observation to the state variable
+        d = False
+        rs.append(0)
+        for _ in count():
+            a = strategy.select_action(model, s)
+            s, r, d, truncated, _ = env.step(a)
+            rs[-1] += r
+            if d or truncated:
+                break
+    return rs
+
+
+def evaluate_episodes_vectorized(model, strategy, envs, n_episodes=1):
+    """
+    Run evaluation episodes concurrently across the sub-envs of a vector env.
+
+    Each step selects actions for every sub-env with one batched forward pass.
+    The episodes are split evenly across the sub-envs up front, rather than
+    taking the first ``n_episodes`` to finish, so short episodes are not
+    over-represented. Sub-envs that have run their share keep being stepped,
+    since a vector env steps all of them, but their outcomes are masked out.
+
+    Args:
+    ----
+        model: Q-value model the strategy acts on.
+        strategy: Strategy with a ``select_actions(model, states)`` method.
+        envs: Gymnasium vector environment (next-step autoreset).
+        n_episodes (int): Total number of episodes to run.
+
+    Returns:
+    -------
+        list: Undiscounted return of each episode, in completion order.
+
+    """
+    n_envs = envs.num_envs
+    remaining = np.full(n_envs, n_episodes // n_envs)
+    remaining[: n_episodes % n_envs] += 1
+    episode_returns = np.zeros(n_envs)
+    autoreset = np.zeros(n_envs, dtype=bool)
+
+    rs = []
+    states, _infos = envs.reset()
+    while remaining.any():
+        actions = strategy.select_actions(model, states)
+        states, rewards, is_terminals, is_truncateds, _infos = envs.step(actions)
+        # Sub-envs that were auto-reset by this step return a fresh initial state
+        counted = (remaining > 0) & ~autoreset
+        episode_returns[counted] += rewards[counted]
+
+        autoreset = is_terminals | is_truncateds
+        for i in np.flatnonzero(counted & autoreset):
+            rs.append(episode_returns[i])
+            episode_returns[i] = 0.0
+            remaining[i] -= 1
+    return rs
+
+
+class _EvaluationContext:
+    def __init__(self, make_env_fn, make_env_kargs, model_fn, strategy_fn, seed):
+        """Build the environment, model and strategy an evaluation worker uses."""
+        self.env = make_env_fn(**make_env_kargs, seed=seed)
+        self.model = model_fn()
+        self.strategy = strategy_fn()
+
+    def evaluate(self, state_dict, n_episodes):
+        self.model.load_state_dict(state_dict)
+        return evaluate_episodes(self.model, self.strategy, self.env, n_episodes)
+
+
+_process_context = None
+
+
+def _init_process_worker(payload):
+    global _process_context  # noqa: PLW0603
+    _process_context = _EvaluationContext(*cloudpickle.loads(payload))
+
+
+def _evaluate_in_process_worker(state_dict, n_episodes):
+    return _process_context.evaluate(state_dict, n_episodes)
+
+
+class BackgroundEvaluator:
+    def __init__(
+        self,
+        make_env_fn,
+        make_env_kargs,
+        model_fn,
+        strategy_fn,
+        seed=None,
+        worker="thread",
+        every_n_episodes=1,
+        every_n_secs=None,
+        n_episodes=1,
+    ):
+        """
+        Initialize an evaluator that scores weight snapshots off the training loop.
+
+        Evaluation uses its own environment, model and strategy, so it never
+        touches the training env's episode state. At most one evaluation is in
+        flight: a snapshot submitted while the worker is busy is skipped, since a
+        queue of stale snapshots would only fall further behind.
+
+        Args:
+        ----
+            make_env_fn: Function that creates the evaluation environment.
+            make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+            model_fn: Function with no arguments that builds a model with the
+                same architecture as the one being trained.
+            strategy_fn: Function that creates the evaluation strategy.
+            seed: Seed passed to ``make_env_fn``.
+            worker: ``None`` evaluates inline when submitted, ``"thread"`` in a
+                background thread and ``"process"`` in a background process.
+            every_n_episodes: Evaluate every this many training episodes, or
+                None to not evaluate on an episode cadence.
+            every_n_secs: Evaluate when this many seconds have passed since the
+                last submission, or None to not evaluate on a time cadence.
+            n_episodes: Number of episodes per evaluation.
+
+        """
+        if worker not in EVALUATION_WORKERS:
+            msg = f"Unknown evaluation worker: {worker}"
+            raise ValueError(msg)
+        if every_n_episodes is None and every_n_secs is None:
+            msg = "Set every_n_episodes and/or every_n_secs"
+            raise ValueError(msg)
+
+        self.worker = worker
+        self.every_n_episodes = every_n_episodes
+        self.every_n_secs = every_n_secs
+        self.n_episodes = n_episodes
+        self._last_submit_time = time.time()
+        self._pending = None
+        self._completed = []
+
+        context_args = (make_env_fn, make_env_kargs, model_fn, strategy_fn, seed)
+        if worker == "process":
+            self._context = None
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(cloudpickle.dumps(context_args),),
+            )
+        else:
+            self._context = _EvaluationContext(*context_args)
+            self._executor = ThreadPoolExecutor(max_workers=1) if worker else None
+
+    @property
+    def busy(self):
+        return self._pending is not None and not self._pending[1].done()
+
+    def due(self, episode):
+        """Return True if the cadence calls for an evaluation after ``episode``."""
+        by_episode = (
+            self.every_n_episodes is not None and episode % self.every_n_episodes == 0
+        )
+        by_time = (
+            self.every_n_secs is not None
+            and time.time() - self._last_submit_time >= self.every_n_secs
+        )
+        return by_episode or by_time
+
+    def submit(self, episode, model):
+        """
+        Evaluate a snapshot of ``model``'s weights, tagged with ``episode``.
+
+        :return: True if the snapshot was submitted, False if the worker was busy.
+        """
+        if self.busy:
+            return False
+        self._harvest()
+        self._last_submit_time = time.time()
+        state_dict = {
+            k: v.detach().cpu().clone() for k, v in model.state_dict().items()
+        }
+
+        if self.worker is None:
+            scores = self._context.evaluate(state_dict, self.n_episodes)
+            self._completed.append((episode, np.mean(scores)))
+            return True
+        if self.worker == "thread":
+            future = self._executor.submit(
+                self._context.evaluate, state_dict, self.n_episodes
+            )
+        else:
+            future = self._executor.submit(
+                _evaluate_in_process_worker, state_dict, self.n_episodes
+            )
+        self._pending = (episode, future)
+        return True
+
+    def collect(self):
+        """
+        Return the evaluations completed since the last call, without blocking.
+
+        :return: List of (episode, mean_score) tuples in completion order.
+        """
+        self._harvest()
+        completed, self._completed = self._completed, []
+        return completed
+
+    def state_dict(self):
+        """
+        Return the evaluation env's RNG state and the evaluation strategy.
+
+        :return: Dict to pass to ``load_state_dict``, or None for a process
+                 worker, whose state lives in the other process.
+        """
+        if self._context is None:
+            return None
+        return {
+            "env_rng": get_env_rng_state(self._context.env),
+            "strategy": self._context.strategy,
+        }
+
+    def load_state_dict(self, state):
+        if state is None or self._context is None:
+            return
+        set_env_rng_state(self._context.env, state["env_rng"])
+        self._context.strategy = state["strategy"]
+
+    def close(self, wait=True):
+        """Shut the worker down, waiting for an in-flight evaluation if ``wait``."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+        if wait:
+            self._harvest()
+        if self._context is not None:
+            self._context.env.close()
+
+    def _harvest(self):
+        if self._pending is None or not self._pending[1].done():
+            return
+        episode, future = self._pending
+        self._pending = None
+        if not future.cancelled():
+            self._completed.append((episode, np.mean(future.result())))
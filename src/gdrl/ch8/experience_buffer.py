@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class ExperienceBuffer:
+    def __init__(self, capacity, state_shape, seed=None):
+        """
+        Initialize a preallocated ring buffer of transitions.
+
+        Transitions are written by index into typed arrays allocated once up
+        front: float32 states/next states, int64 actions and float32 rewards and
+        terminal flags, the dtypes ``FCQ.load`` expects. Once the buffer is full,
+        new transitions overwrite the oldest ones.
+
+        Args:
+        ----
+            capacity (int): Maximum number of transitions held.
+            state_shape (tuple): Shape of a single state.
+            seed (int): Seed for ``sample``.
+
+        """
+        self.capacity = capacity
+        self.states = np.empty((capacity, *state_shape), dtype=np.float32)
+        self.actions = np.empty((capacity, 1), dtype=np.int64)
+        self.rewards = np.empty((capacity, 1), dtype=np.float32)
+        self.next_states = np.empty((capacity, *state_shape), dtype=np.float32)
+        self.is_terminals = np.empty((capacity, 1), dtype=np.float32)
+        self._next_idx = 0
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        """Return the number of transitions currently stored."""
+        return self._size
+
+    def store(self, state, action, reward, next_state, is_terminal):
+        idx = self._next_idx
+        self.states[idx] = state
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.next_states[idx] = next_state
+        self.is_terminals[idx] = is_terminal
+        self._next_idx = (idx + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def store_batch(self, states, actions, rewards, next_states, is_terminals):
+        """
+        Store a batch of transitions, one per row, wrapping around if needed.
+
+        :param states: ``[N, *state_shape]`` states.
+        :param actions: ``[N]`` actions.
+        :param rewards: ``[N]`` rewards.
+        :param next_states: ``[N, *state_shape]`` next states.
+        :param is_terminals: ``[N]`` terminal flags.
+        """
+        n = len(states)
+        idxs = (self._next_idx + np.arange(n)) % self.capacity
+        self.states[idxs] = states
+        self.actions[idxs, 0] = actions
+        self.rewards[idxs, 0] = rewards
+        self.next_states[idxs] = next_states
+        self.is_terminals[idxs, 0] = is_terminals
+        self._next_idx = (self._next_idx + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def get(self):
+        """
+        Return the stored transitions as contiguous array views.
+
+        The views share memory with the buffer, so they are only valid until the
+        next ``store`` after a ``clear``.
+
+        :return: (states, actions, rewards, next_states, is_terminals)
+        """
+        size = self._size
+        return (
+            self.states[:size],
+            self.actions[:size],
+            self.rewards[:size],
+            self.next_states[:size],
+            self.is_terminals[:size],
+        )
+
+    def sample(self, batch_size):
+        """
+        Sample stored transitions uniformly, with replacement.
+
+        :param batch_size: Number of transitions to sample.
+        :return: (idxs, (states, actions, rewards, next_states, is_terminals)),
+                 where the arrays are copies gathered at ``idxs``.
+        """
+        idxs = self._rng.integers(self._size, size=batch_size)
+        return idxs, self._gather(idxs)
+
+    def _gather(self, idxs):
+        return (
+            self.states[idxs],
+            self.actions[idxs],
+            self.rewards[idxs],
+            self.next_states[idxs],
+            self.is_terminals[idxs],
+        )
+
+    def clear(self):
+        self._next_idx = 0
+        self._size = 0
@@ -1,9 +1,156 @@
+import warnings
+
+import numpy as np
 import torch
 import torch.nn.functional as F  # noqa: N812
 from torch import nn
 
+# dtypes of (states, actions, rewards, next_states, is_terminals) batches, as
+# stored by ExperienceBuffer and TransitionDataset
+BATCH_DTYPES = (np.float32, np.int64, np.float32, np.float32, np.float32)
+
+
+class _QNetwork(nn.Module):
+    def _init_device(self):
+        """Move the network to the GPU if there is one and set up inference."""
+        device = "cpu"
+        if torch.cuda.is_available():
+            device = "cuda:0"
+        self.device = torch.device(device)
+        self.to(self.device)
+
+        # Single-state inference reuses these buffers instead of building a new
+        # tensor per step; the numpy view lets a state be written without one
+        self._state_buffer = torch.empty((1, self.input_dim), dtype=torch.float32)
+        self._state_view = self._state_buffer.numpy()
+        self._device_state_buffer = self._state_buffer
+        if self.device.type != "cpu":
+            self._state_buffer = self._state_buffer.pin_memory()
+            self._state_view = self._state_buffer.numpy()
+            self._device_state_buffer = torch.empty_like(
+                self._state_buffer, device=self.device
+            )
+        self._inference_forward = self.forward
+
+        # Batch transfer to an accelerator goes through reusable pinned staging
+        # buffers into reusable device buffers, grown to the largest batch seen
+        self._staging_buffers = [None] * len(BATCH_DTYPES)
+        self._device_buffers = [None] * len(BATCH_DTYPES)
+        self._staging_free = None
+
+    def _format(self, state):
+        x = state
+        if not isinstance(x, torch.Tensor):
+            x = torch.tensor(x, device=self.device, dtype=torch.float32)
+            if x.dim() == 1:
+                x = x.unsqueeze(0)
+        return x
+
+    def compile_inference(self, backend="trace"):
+        """
+        Compile the forward pass used by ``greedy_action``.
+
+        The compiled forward shares its parameters with this module, so it keeps
+        acting with the current weights as training updates them.
+
+        :param backend: ``"trace"`` for a TorchScript trace, ``"compile"`` for
+                        ``torch.compile`` or None to go back to eager ``forward``.
+        """
+        if backend is None:
+            forward = self.forward
+        elif backend == "trace":
+            with warnings.catch_warnings():
+                # torch.jit.trace is deprecated in favour of torch.compile, but
+                # needs no compiler toolchain and has no warm-up recompilations
+                warnings.simplefilter("ignore", FutureWarning)
+                forward = torch.jit.trace(self, self._device_state_buffer)
+        elif backend == "compile":
+            forward = torch.compile(self.forward)
+        else:
+            msg = f"Unknown inference backend: {backend}"
+            raise ValueError(msg)
+        # Bypass nn.Module.__setattr__ so a traced module is not registered as a
+        # submodule, which would duplicate the parameters in state_dict
+        object.__setattr__(self, "_inference_forward", forward)
 
-class FCQ(nn.Module):
+    def greedy_action(self, state, return_q_values=False):
+        """
+        Return the greedy action for a single state with minimal per-call overhead.
+
+        The state is copied into a preallocated input buffer and the forward pass
+        runs under ``torch.inference_mode``; the action is read straight from the
+        output tensor rather than through a numpy array.
+
+        :param state: A single state, as a numpy array or sequence of floats.
+        :param return_q_values: Also return the state's Q-values.
+        :return: The greedy action as an int, and if requested the ``[nA]``
+                 Q-value tensor (an inference tensor, not usable in autograd).
+        """
+        with torch.inference_mode():
+            self._state_view[0] = state
+            if self._device_state_buffer is not self._state_buffer:
+                self._device_state_buffer.copy_(self._state_buffer, non_blocking=True)
+            q_values = self._inference_forward(self._device_state_buffer)[0]
+            action = int(q_values.argmax())
+        if return_q_values:
+            return action, q_values
+        return action
+
+    def numpy_float_to_device(self, variable):
+        return torch.from_numpy(variable).float().to(self.device)
+
+    def load(self, experiences):
+        """
+        Move a batch of transitions to the model's device as typed tensors.
+
+        Arrays that are already contiguous and of the ``BATCH_DTYPES`` dtypes,
+        as ``ExperienceBuffer`` and ``TransitionDataset`` produce, are converted
+        without copying. On the CPU, the returned tensors share memory with the
+        arrays. On an accelerator, the arrays are copied into pinned staging
+        buffers and transferred with non-blocking copies into device buffers
+        that are reused from batch to batch. Those tensors are only valid until
+        the next ``load``.
+
+        :param experiences: (states, actions, rewards, next_states, is_terminals)
+                            arrays, one row per transition.
+        :return: The five tensors, in the same order.
+        """
+        arrays = [
+            np.ascontiguousarray(x, dtype=dtype)
+            for x, dtype in zip(experiences, BATCH_DTYPES, strict=True)
+        ]
+        if self.device.type == "cpu":
+            return tuple(torch.from_numpy(x) for x in arrays)
+
+        # The previous batch's copies must be done reading the staging buffers
+        if self._staging_free is not None:
+            self._staging_free.synchronize()
+        tensors = []
+        for i, x in enumerate(arrays):
+            staging, device_buffer = self._staging_buffers[i], self._device_buffers[i]
+            if (
+                staging is None
+                or len(staging) < len(x)
+                or staging.shape[1:] != x.shape[1:]
+            ):
+                staging = torch.empty(
+                    x.shape, dtype=torch.from_numpy(x).dtype
+                ).pin_memory()
+                device_buffer = torch.empty_like(staging, device=self.device)
+                self._staging_buffers[i], self._device_buffers[i] = (
+                    staging,
+                    device_buffer,
+                )
+            staging[: len(x)].numpy()[...] = x
+            device_batch = device_buffer[: len(x)]
+            device_batch.copy_(staging[: len(x)], non_blocking=True)
+            tensors.append(device_batch)
+        self._staging_free = torch.cuda.Event()
+        self._staging_free.record()
+        return tuple(tensors)
+
+
+class FCQ(_QNetwork):
     def __init__(
         self, input_dim, output_dim, hidden_dims=(32, 32), activation_fc=F.relu
     ):
@@ -20,6 +167,8 @@ class FCQ(nn.Module):
         """
         super().__init__()
         self.activation_fc = activation_fc
+        self.input_dim = input_dim
+        self.output_dim = output_dim
 
         self.input_layer = nn.Linear(input_dim, hidden_dims[0])
         self.hidden_layers = nn.ModuleList()
@@ -28,18 +177,7 @@ class FCQ(nn.Module):
             self.hidden_layers.append(hidden_layer)
         self.output_layer = nn.Linear(hidden_dims[-1], output_dim)
 
-        device = "cpu"
-        if torch.cuda.is_available():
-            device = "cuda:0"
-        self.device = torch.device(device)
-        self.to(self.device)
-
-    def _format(self, state):
-        x = state
-        if not isinstance(x, torch.Tensor):
-            x = torch.tensor(x, device=self.device, dtype=torch.float32)
-            x = x.unsqueeze(0)
-        return x
+        self._init_device()
 
     def forward(self, state):
         x = self._format(state)
@@ -48,14 +186,87 @@ class FCQ(nn.Module):
             x = self.activation_fc(hidden_layer(x))
         return self.output_layer(x)
 
-    def numpy_float_to_device(self, variable):
-        return torch.from_numpy(variable).float().to(self.device)
 
-    def load(self, experiences):
-        states, actions, rewards, new_states, is_terminals = experiences
-        states = torch.from_numpy(states).float().to(self.device)
-        actions = torch.from_numpy(actions).long().to(self.device)
-        new_states = torch.from_numpy(new_states).float().to(self.device)
-        rewards = torch.from_numpy(rewards).float().to(self.device)
-        is_terminals = torch.from_numpy(is_terminals).float().to(self.device)
-        return states, actions, rewards, new_states, is_terminals
+class FCQEnsemble(_QNetwork):
+    def __init__(
+        self,
+        input_dim,
+        output_dim,
+        n_members=5,
+        hidden_dims=(32, 32),
+        activation_fc=F.relu,
+    ):
+        """
+        Initialize an ensemble of independently initialized FCQ networks.
+
+        The members' weights are stacked into ``[n_members, in, out]`` tensors,
+        so one batched matmul per layer evaluates every member at once instead of
+        running ``n_members`` small networks one after another. Each member is
+        initialized like an ``FCQ`` layer by layer.
+
+        Args:
+        ----
+            input_dim (int): Dimension of the input layer.
+            output_dim (int): Dimension of the output layer.
+            n_members (int): Number of networks in the ensemble.
+            hidden_dims (tuple): Dimensions of the hidden layers.
+            activation_fc (callable): Activation function to use.
+
+        """
+        super().__init__()
+        self.activation_fc = activation_fc
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.n_members = n_members
+        self.hidden_dims = tuple(hidden_dims)
+
+        self.weights = nn.ParameterList()
+        self.biases = nn.ParameterList()
+        dims = (input_dim, *hidden_dims, output_dim)
+        for in_dim, out_dim in zip(dims[:-1], dims[1:], strict=True):
+            layers = [nn.Linear(in_dim, out_dim) for _ in range(n_members)]
+            weight = torch.stack([layer.weight.detach().T for layer in layers])
+            bias = torch.stack([layer.bias.detach().unsqueeze(0) for layer in layers])
+            self.weights.append(nn.Parameter(weight))
+            self.biases.append(nn.Parameter(bias))
+
+        self._init_device()
+
+    def forward_members(self, state):
+        """
+        Return every member's Q-values.
+
+        :param state: ``[batch, input_dim]`` states, or a single state.
+        :return: ``[n_members, batch, output_dim]`` Q-values.
+        """
+        x = self._format(state)
+        if x.dim() == 1:
+            x = x.unsqueeze(0)
+        x = x.expand(self.n_members, -1, -1)
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases, strict=True)):
+            x = torch.baddbmm(bias, x, weight)
+            if i < last:
+                x = self.activation_fc(x)
+        return x
+
+    def forward(self, state):
+        """Return the members' mean Q-values, the values the ensemble acts on."""
+        return self.forward_members(state).mean(0)
+
+    def member(self, k):
+        """
+        Return member ``k`` as a standalone ``FCQ`` with a copy of its weights.
+
+        :param k: Index of the member.
+        :return: The ``FCQ``, e.g. to evaluate members one by one.
+        """
+        fcq = FCQ(self.input_dim, self.output_dim, self.hidden_dims, self.activation_fc)
+        layers = [fcq.input_layer, *fcq.hidden_layers, fcq.output_layer]
+        with torch.no_grad():
+            for layer, weight, bias in zip(
+                layers, self.weights, self.biases, strict=True
+            ):
+                layer.weight.copy_(weight[k].T)
+                layer.bias.copy_(bias[k, 0])
+        return fcq
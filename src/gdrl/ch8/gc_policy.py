@@ -0,0 +1,71 @@
+import gc
+import time
+
+GC_POLICIES = ("full", "gen0", "off", "freeze")
+
+
+class GCPolicy:
+    def __init__(self, policy="full", every_n_episodes=1):
+        """
+        Initialize the garbage-collection policy of a training loop.
+
+        Policies:
+            ``"full"``: ``gc.collect()`` every ``every_n_episodes`` episodes.
+            ``"gen0"``: ``gc.collect(0)`` every ``every_n_episodes`` episodes.
+            ``"off"``: no explicit collections; automatic GC still runs.
+            ``"freeze"``: collect once after setup, then ``gc.freeze()`` so the
+            long-lived model and optimizer objects are never rescanned, and make
+            no explicit collections.
+
+        Every collection between ``setup`` and ``teardown``, explicit or
+        automatic, is timed through ``gc.callbacks``.
+
+        Args:
+        ----
+            policy (str): One of ``GC_POLICIES``.
+            every_n_episodes (int): Episodes between explicit collections.
+
+        """
+        if policy not in GC_POLICIES:
+            msg = f"Unknown GC policy: {policy}"
+            raise ValueError(msg)
+        self.policy = policy
+        self.every_n_episodes = every_n_episodes
+        self.gc_seconds = 0.0
+        self.collections = 0
+        self._episodes_since_collect = 0
+        self._collect_start = None
+
+    def setup(self):
+        """Start timing collections; freeze the heap under the freeze policy."""
+        gc.callbacks.append(self._on_gc)
+        if self.policy == "freeze":
+            gc.collect()
+            gc.freeze()
+
+    def on_episode_end(self, n_episodes=1):
+        """Record ``n_episodes`` finished episodes and collect if one is due."""
+        if self.policy not in {"full", "gen0"}:
+            return
+        self._episodes_since_collect += n_episodes
+        if self._episodes_since_collect >= self.every_n_episodes:
+            self._episodes_since_collect = 0
+            if self.policy == "full":
+                gc.collect()
+            else:
+                gc.collect(0)
+
+    def teardown(self):
+        """Stop timing collections and unfreeze the heap."""
+        if self.policy == "freeze":
+            gc.unfreeze()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase, _info):
+        if phase == "start":
+            self._collect_start = time.perf_counter()
+        elif self._collect_start is not None:
+            self.gc_seconds += time.perf_counter() - self._collect_start
+            self.collections += 1
+            self._collect_start = None
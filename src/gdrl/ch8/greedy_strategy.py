@@ -12,6 +12,21 @@ class GreedyStrategy:
         self.exploratory_action_taken = False
 
     def select_action(self, model, state):
+        if hasattr(model, "greedy_action"):
+            return model.greedy_action(state)
         with torch.no_grad():
             q_values = model(state).cpu().detach().data.numpy().squeeze()
             return np.argmax(q_values)
+
+    def select_actions(self, model, states):
+        """
+        Select the greedy action for each row of a batch of states.
+
+        :param model: Q-value model mapping ``[N, obs_dim]`` states to ``[N, nA]``.
+        :param states: Batch of states, one per environment.
+        :return: Array of ``N`` greedy actions.
+        """
+        with torch.no_grad():
+            q_values = model(states).cpu().detach().data.numpy()
+        self.exploratory_action_taken = np.zeros(len(q_values), dtype=bool)
+        return np.argmax(q_values, axis=1)
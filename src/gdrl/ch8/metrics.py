@@ -0,0 +1,156 @@
+import time
+from pathlib import Path
+
+import numpy as np
+
+ERASE_LINE = "\x1b[2K"
+LEAVE_PRINT_EVERY_N_SECS = 60
+
+
+class PrintSink:
+    def __init__(self, every_n_secs=None):
+        """
+        Initialize a metrics sink that prints a progress line.
+
+        A line is printed at most every ``every_n_secs`` seconds, and always for
+        the record that ends training, followed by the reasons it ended.
+
+        Args:
+        ----
+            every_n_secs (float): Seconds between printed lines. Defaults to
+                ``LEAVE_PRINT_EVERY_N_SECS``.
+
+        """
+        self.every_n_secs = (
+            LEAVE_PRINT_EVERY_N_SECS if every_n_secs is None else every_n_secs
+        )
+        self._last_print_time = float("-inf")
+
+    def write(self, record):
+        reached_print_time = time.time() - self._last_print_time >= self.every_n_secs
+        if not (reached_print_time or record["training_is_over"]):
+            return
+        print(ERASE_LINE + self.format(record), flush=True)
+        self._last_print_time = time.time()
+        if record["reached_max_minutes"]:
+            print("--> reached_max_minutes \u2715")
+        if record["reached_max_episodes"]:
+            print("--> reached_max_episodes \u2715")
+        if record["reached_goal_mean_reward"]:
+            print("--> reached_goal_mean_reward \u2713")
+        if record.get("stopped_early"):
+            print("--> stopped_early \u2715")
+
+    def format(self, record):
+        elapsed_str = time.strftime(
+            "%H:%M:%S", time.gmtime(record["wallclock_elapsed"])
+        )
+        debug_message = "el {}, ep {:04}, ts {:06}, "
+        debug_message += "ar 10 {:05.1f}\u00b1{:05.1f}, "
+        debug_message += "100 {:05.1f}\u00b1{:05.1f}, "
+        debug_message += "ex 100 {:02.1f}\u00b1{:02.1f}, "
+        debug_message += "ev {:05.1f}\u00b1{:05.1f}"
+        return debug_message.format(
+            elapsed_str,
+            record["episode"] - 1,
+            record["total_steps"],
+            record["mean_10_reward"],
+            record["std_10_reward"],
+            record["mean_100_reward"],
+            record["std_100_reward"],
+            record["mean_100_exp_rat"],
+            record["std_100_exp_rat"],
+            record["mean_100_eval_score"],
+            record["std_100_eval_score"],
+        )
+
+    def close(self):
+        """Nothing to release; printing is unbuffered."""
+
+
+class NpzMetricsSink:
+    def __init__(self, directory, buffer_size=1000):
+        """
+        Initialize a metrics sink that stores records as columnar ``.npz`` chunks.
+
+        Records are buffered in memory and written ``buffer_size`` at a time, one
+        array per field, to ``metrics.<chunk>.npz`` files in ``directory``, so the
+        cost of writing is paid once per chunk rather than once per episode.
+        Read them back with ``load_metrics``. A run resumed from a snapshot
+        restores the sink's ``state_dict``, which drops the chunks flushed after
+        the snapshot was taken, so their episodes are not recorded twice.
+
+        Args:
+        ----
+            directory (str or Path): Directory the chunks are written to.
+            buffer_size (int): Number of records per chunk.
+
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.buffer_size = buffer_size
+        self._records = []
+        # Append after the chunks of an earlier run, e.g. one being resumed
+        self._n_chunks = len(list(self.directory.glob("metrics.*.npz")))
+
+    def write(self, record):
+        self._records.append(record)
+        if len(self._records) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._records:
+            return
+        fields = dict.fromkeys(key for record in self._records for key in record)
+        columns = {
+            field: np.array([record.get(field, np.nan) for record in self._records])
+            for field in fields
+        }
+        np.savez(self.directory / f"metrics.{self._n_chunks:05d}.npz", **columns)
+        self._n_chunks += 1
+        self._records.clear()
+
+    def state_dict(self):
+        """Return the number of chunks flushed so far."""
+        return {"n_chunks": self._n_chunks}
+
+    def load_state_dict(self, state):
+        """Restore ``state_dict``, deleting the chunks written after it."""
+        self._n_chunks = state["n_chunks"]
+        self._records.clear()
+        for path in self.directory.glob("metrics.*.npz"):
+            if int(path.name.split(".")[1]) >= self._n_chunks:
+                path.unlink()
+
+    def close(self):
+        self.flush()
+
+
+def load_metrics(directory):
+    """
+    Load the records written by ``NpzMetricsSink`` as one array per field.
+
+    Args:
+    ----
+        directory (str or Path): Directory holding the ``metrics.*.npz`` chunks.
+
+    Returns:
+    -------
+        dict: Field name to array over all records. Fields missing from some
+        chunks, such as phases that had not run yet, are NaN there.
+
+    """
+    chunks = []
+    for path in sorted(Path(directory).glob("metrics.*.npz")):
+        with np.load(path) as chunk:
+            chunks.append({field: chunk[field] for field in chunk.files})
+    fields = dict.fromkeys(field for chunk in chunks for field in chunk)
+    return {
+        field: np.concatenate(
+            [
+                chunk.get(field, np.full(len(next(iter(chunk.values()))), np.nan))
+                for chunk in chunks
+            ]
+        )
+        for field in fields
+    }
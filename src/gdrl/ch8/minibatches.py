@@ -0,0 +1,39 @@
+import torch
+
+
+def _gather(tensors, idxs):
+    return tuple(tensor[idxs] for tensor in tensors)
+
+
+def iter_minibatches(tensors, minibatch_size, executor=None):
+    """
+    Iterate over one shuffled epoch of minibatches of aligned tensors.
+
+    The rows are permuted on the CPU with the global torch RNG, whatever
+    device the tensors are on, so the order is reproducible under
+    ``torch.manual_seed``. With an ``executor``, its worker thread gathers the
+    next minibatch while the caller works on the current one; torch releases
+    the GIL inside indexing and autograd, so the gather overlaps the caller's
+    backward pass. At most two minibatches are alive at once.
+
+    :param tensors: Tensors with the same first dimension, e.g. a batch as
+                    returned by ``FCQ.load``.
+    :param minibatch_size: Rows per minibatch; the last one may be smaller.
+    :param executor: Single-worker executor that prefetches minibatches, shared
+                     across epochs so its thread is started once; None gathers
+                     them in the calling thread.
+    :return: Iterator of tuples of minibatch tensors, in ``tensors`` order.
+    """
+    n_rows = len(tensors[0])
+    batches_idxs = torch.randperm(n_rows).to(tensors[0].device).split(minibatch_size)
+    if executor is None or len(batches_idxs) == 1:
+        for idxs in batches_idxs:
+            yield _gather(tensors, idxs)
+        return
+
+    pending = executor.submit(_gather, tensors, batches_idxs[0])
+    for idxs in batches_idxs[1:]:
+        minibatch = pending.result()
+        pending = executor.submit(_gather, tensors, idxs)
+        yield minibatch
+    yield pending.result()
@@ -0,0 +1,172 @@
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cloudpickle
+import numpy as np
+import torch
+
+AGGREGATES = {"min": np.nanmin, "mean": np.nanmean, "max": np.nanmax}
+
+
+def _train_seed(run_args, seed):
+    agent_fn, make_env_fn, make_env_kargs, train_args, train_kwargs = run_args
+    agent = agent_fn()
+    result, final_eval_score, training_time, wallclock_time = agent.train(
+        make_env_fn, make_env_kargs, seed, *train_args, **train_kwargs
+    )
+    state_dict = {
+        k: v.detach().cpu().clone() for k, v in agent.online_model.state_dict().items()
+    }
+    return {
+        "result": result,
+        "final_eval_score": final_eval_score,
+        "training_time": training_time,
+        "wallclock_time": wallclock_time,
+        "state_dict": state_dict,
+    }
+
+
+_worker_payload = None
+
+
+def _init_seed_worker(payload, torch_threads):
+    global _worker_payload  # noqa: PLW0603
+    torch.set_num_threads(torch_threads)
+    _worker_payload = cloudpickle.loads(payload)
+
+
+def _train_seed_in_worker(seed):
+    return _train_seed(_worker_payload, seed)
+
+
+class MultiSeedResults:
+    def __init__(self, seeds, runs, wallclock_time):
+        """
+        Initialize the gathered results of one training run per seed.
+
+        Args:
+        ----
+            seeds (sequence): The seeds, in the order of ``runs``.
+            runs (list): One dict per seed with the run's ``result``,
+                ``final_eval_score``, ``training_time``, ``wallclock_time`` and
+                the final ``state_dict`` of its online model.
+            wallclock_time (float): Seconds the whole set of runs took.
+
+        """
+        self.seeds = list(seeds)
+        self.results = np.stack([run["result"] for run in runs])
+        self.final_eval_scores = np.array([run["final_eval_score"] for run in runs])
+        self.training_times = np.array([run["training_time"] for run in runs])
+        self.wallclock_times = np.array([run["wallclock_time"] for run in runs])
+        self.state_dicts = [run["state_dict"] for run in runs]
+        self.wallclock_time = wallclock_time
+
+    @property
+    def best_seed(self):
+        return self.seeds[int(np.argmax(self.final_eval_scores))]
+
+    def aggregate(self, statistic):
+        """
+        Aggregate the per-episode ``result`` rows across seeds.
+
+        Runs that stopped early have NaN rows after their last episode; those
+        are left out, so each episode aggregates the seeds that reached it.
+
+        :param statistic: One of ``"min"``, ``"mean"`` or ``"max"``.
+        :return: Array of shape ``[max_episodes, 7]`` with the same columns as
+                 ``NFQ.train``'s ``result``; NaN where no seed reached an episode.
+        """
+        if statistic not in AGGREGATES:
+            msg = f"Unknown statistic: {statistic}"
+            raise ValueError(msg)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN episodes
+            return AGGREGATES[statistic](self.results, axis=0)
+
+    def summary(self):
+        """
+        Return min/mean/max of the final evaluation scores and timings.
+
+        :return: Dict mapping ``"final_eval_score"``, ``"training_time"`` and
+                 ``"wallclock_time"`` to a dict of ``min``, ``mean`` and ``max``.
+        """
+        values = {
+            "final_eval_score": self.final_eval_scores,
+            "training_time": self.training_times,
+            "wallclock_time": self.wallclock_times,
+        }
+        return {
+            name: {stat: float(fn(value)) for stat, fn in AGGREGATES.items()}
+            for name, value in values.items()
+        }
+
+
+def train_seeds(
+    agent_fn,
+    make_env_fn,
+    make_env_kargs,
+    seeds,
+    gamma,
+    max_minutes,
+    max_episodes,
+    goal_mean_100_reward,
+    n_workers=None,
+    torch_threads_per_worker=None,
+    **train_kwargs: object,
+):
+    """
+    Train one agent per seed, in parallel worker processes.
+
+    Each worker builds its agent with ``agent_fn`` and calls its ``train``;
+    ``agent_fn``, ``make_env_fn`` and the train arguments are serialized with
+    cloudpickle, so lambdas work. Workers pin ``torch.set_num_threads`` so that
+    concurrent runs share the cores instead of oversubscribing them.
+
+    Args:
+    ----
+        agent_fn: Function with no arguments that creates an untrained agent,
+            e.g. an ``NFQ``.
+        make_env_fn: Function that creates the environment.
+        make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+        seeds: Seeds to train with, one run each.
+        gamma: Discount factor.
+        max_minutes: Wall-clock budget per run in minutes.
+        max_episodes: Maximum number of training episodes per run.
+        goal_mean_100_reward: Mean evaluation score that ends a run early.
+        n_workers: Number of worker processes; defaults to one per seed, up to
+            the number of CPUs. 0 trains the seeds one after another in this
+            process.
+        torch_threads_per_worker: Torch intra-op threads per worker; defaults to
+            the CPUs divided evenly among the workers.
+        **train_kwargs: Further keyword arguments passed to ``train``.
+
+    Returns:
+    -------
+        MultiSeedResults: The runs, in the order of ``seeds``.
+
+    """
+    start = time.time()
+    n_cpus = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = min(len(seeds), n_cpus)
+    train_args = (gamma, max_minutes, max_episodes, goal_mean_100_reward)
+    run_args = (agent_fn, make_env_fn, make_env_kargs, train_args, train_kwargs)
+
+    if n_workers == 0:
+        runs = [_train_seed(run_args, seed) for seed in seeds]
+        return MultiSeedResults(seeds, runs, time.time() - start)
+
+    if torch_threads_per_worker is None:
+        torch_threads_per_worker = max(1, n_cpus // n_workers)
+    payload = cloudpickle.dumps(run_args)
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_seed_worker,
+        initargs=(payload, torch_threads_per_worker),
+    ) as executor:
+        runs = list(executor.map(_train_seed_in_worker, seeds))
+    return MultiSeedResults(seeds, runs, time.time() - start)
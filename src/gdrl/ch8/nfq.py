@@ -1,21 +1,33 @@
-import gc
 import random
 import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from itertools import count
 from pathlib import Path
 
 import numpy as np
 import torch
+from gymnasium.vector import VectorEnv
 from IPython.display import HTML
 
+from .actor_learner import ActorPool, SharedWeights
+from .checkpoint_manager import CheckpointManager
+from .env_utils import get_env_rng_state, make_vector_env, set_env_rng_state
+from .evaluation import (
+    BackgroundEvaluator,
+    evaluate_episodes,
+    evaluate_episodes_vectorized,
+)
+from .experience_buffer import ExperienceBuffer
+from .fcq import FCQEnsemble
+from .gc_policy import GCPolicy
+from .metrics import PrintSink
+from .minibatches import iter_minibatches
+from .phase_timer import PhaseTimer
+from .rolling_stats import TrainingStats
 from .vis_utils import collect_env_videos, get_gif_html
 
-ERASE_LINE = "\x1b[2K"
-LEAVE_PRINT_EVERY_N_SECS = 10  # seconds
-
-LEAVE_PRINT_EVERY_N_SECS = 60
-ERASE_LINE = "\x1b[2K"
 EPS = 1e-6
 
 
@@ -25,6 +37,7 @@ def BEEP():
 
 
 RESULTS_DIR = Path("..") / "results"
+TARGET_RECOMPUTE = ("minibatch", "epoch")
 
 
 class NFQ:
@@ -37,21 +50,37 @@ class NFQ:
         evaluation_strategy_fn,
         batch_size,
         epochs,
+        minibatch_size=None,
+        target_recompute="minibatch",
+        prefetch_minibatches=True,
     ):
         """
         Initialize the NFQ agent with model, optimizer, strategies, batch size, and epochs.
 
         Args:
         ----
-            value_model_fn: Function to create the value model.
+            value_model_fn: Function to create the value model. An
+                ``FCQEnsemble`` trains all its members on the same experience
+                batches, each against its own targets, and acts on their mean.
             value_optimizer_fn: Function to create the optimizer.
             value_optimizer_lr: Learning rate for the optimizer.
             training_strategy_fn: Function to create the training strategy.
             evaluation_strategy_fn: Function to create the evaluation strategy.
             batch_size: Batch size for training.
             epochs: Number of epochs per training batch.
+            minibatch_size: Split every epoch over a batch into shuffled
+                minibatches of this size, one optimizer step each, instead of
+                one step over the whole batch. None takes whole-batch steps.
+            target_recompute: With minibatches, recompute the TD targets for
+                every ``"minibatch"`` or once per ``"epoch"`` over the batch.
+            prefetch_minibatches: Gather the next minibatch in a background
+                thread while the current one is optimized. The thread is
+                started once per ``train`` call.
 
         """
+        if target_recompute not in TARGET_RECOMPUTE:
+            msg = f"Unknown target recompute: {target_recompute}"
+            raise ValueError(msg)
         self.value_model_fn = value_model_fn
         self.value_optimizer_fn = value_optimizer_fn
         self.value_optimizer_lr = value_optimizer_lr
@@ -59,31 +88,121 @@ class NFQ:
         self.evaluation_strategy_fn = evaluation_strategy_fn
         self.batch_size = batch_size
         self.epochs = epochs
+        self.minibatch_size = minibatch_size
+        self.target_recompute = target_recompute
+        self.prefetch_minibatches = prefetch_minibatches
+        self.minibatch_executor = None
+        self.checkpoint_manager = None
+        self.phase_timer = PhaseTimer()
+
+    def optimize_model(self, experiences, target_q_s=None, weights=None):
+        """
+        Take one optimization step on a loaded batch.
 
-    def optimize_model(self, experiences):
+        :param experiences: Tensors as returned by ``FCQ.load``.
+        :param target_q_s: Precomputed TD targets; computed when None.
+        :param weights: ``[batch, 1]`` per-sample loss weights, e.g. importance
+                        sampling weights of a prioritized replay; None weighs
+                        every sample equally.
+        :return: ``[batch]`` TD errors of the step, without gradients; averaged
+                 over the members of an ``FCQEnsemble``.
+        """
+        if isinstance(self.online_model, FCQEnsemble):
+            return self._optimize_ensemble(experiences, target_q_s, weights)
         states, actions, rewards, next_states, is_terminals = experiences
         _batch_size = len(is_terminals)
 
-        max_a_q_sp = self.online_model(next_states).detach().max(1)[0].unsqueeze(1)
-
-        target_q_s = rewards + self.gamma * max_a_q_sp * (1 - is_terminals)
+        if target_q_s is None:
+            target_q_s = self._compute_targets(experiences)
 
         q_sa = self.online_model(states).gather(1, actions)
 
         td_errors = q_sa - target_q_s
-        value_loss = td_errors.pow(2).mul(0.5).mean()
+        squared_errors = td_errors.pow(2).mul(0.5)
+        if weights is not None:
+            squared_errors = squared_errors * weights
+        value_loss = squared_errors.mean()
         self.value_optimizer.zero_grad()
         value_loss.backward()
         self.value_optimizer.step()
+        return td_errors.detach().squeeze(1)
+
+    def _bootstrap_model(self):
+        """Return the model the TD targets bootstrap from."""
+        return self.online_model
+
+    def _compute_targets(self, experiences):
+        """
+        Return the TD targets of a batch, without gradients.
+
+        :return: ``[batch, 1]`` targets, or ``[n_members, batch, 1]`` for an
+                 ``FCQEnsemble``, whose members bootstrap from their own estimates.
+        """
+        _, _, rewards, next_states, is_terminals = experiences
+        model = self._bootstrap_model()
+        if isinstance(model, FCQEnsemble):
+            q_sp = model.forward_members(next_states).detach()
+            max_a_q_sp = q_sp.max(2)[0].unsqueeze(2)
+        else:
+            max_a_q_sp = model(next_states).detach().max(1)[0].unsqueeze(1)
+        return rewards + self.gamma * max_a_q_sp * (1 - is_terminals)
+
+    def _optimize_ensemble(self, experiences, target_q_s=None, weights=None):
+        """Take one optimization step for every ensemble member at once."""
+        states, actions, _, _, _ = experiences
+        n_members = self.online_model.n_members
+
+        if target_q_s is None:
+            target_q_s = self._compute_targets(experiences)
+
+        q_s = self.online_model.forward_members(states)
+        q_sa = q_s.gather(2, actions.expand(n_members, -1, -1))
+
+        # Summing the members' mean losses gives each member the gradient it
+        # would get if it were trained on its own
+        td_errors = q_sa - target_q_s
+        squared_errors = td_errors.pow(2).mul(0.5)
+        if weights is not None:
+            squared_errors = squared_errors * weights
+        value_loss = squared_errors.mean(dim=(1, 2)).sum()
+        self.value_optimizer.zero_grad()
+        value_loss.backward()
+        self.value_optimizer.step()
+        return td_errors.detach().mean(0).squeeze(1)
+
+    def _optimize_minibatch_epoch(self, experiences):
+        """Run one epoch of shuffled minibatch steps over a loaded batch."""
+        ensemble = isinstance(self.online_model, FCQEnsemble)
+        tensors = list(experiences)
+        per_epoch_targets = self.target_recompute == "epoch"
+        if per_epoch_targets:
+            target_q_s = self._compute_targets(experiences)
+            # Minibatches are gathered along the first dimension
+            tensors.append(target_q_s.transpose(0, 1) if ensemble else target_q_s)
+
+        for minibatch in iter_minibatches(
+            tensors, self.minibatch_size, executor=self.minibatch_executor
+        ):
+            if not per_epoch_targets:
+                self.optimize_model(minibatch)
+                continue
+            target_q_s = minibatch[-1].transpose(0, 1) if ensemble else minibatch[-1]
+            self.optimize_model(minibatch[:-1], target_q_s=target_q_s)
 
     def interaction_step(self, state, env):
+        t0 = time.perf_counter()
         action = self.training_strategy.select_action(self.online_model, state)
+        t1 = time.perf_counter()
         new_state, reward, is_terminal, truncated, info = env.step(action)
+        t2 = time.perf_counter()
         is_truncated = "TimeLimit.truncated" in info and info["TimeLimit.truncated"]
         is_failure = is_terminal and not is_truncated
-        experience = (state, action, reward, new_state, float(is_failure))
+        self.experiences.store(state, action, reward, new_state, float(is_failure))
+        t3 = time.perf_counter()
+        self.phase_timer.add("action_selection", t1 - t0)
+        self.phase_timer.add("env_step", t2 - t1)
+        self.phase_timer.add("experience_store", t3 - t2)
 
-        self.experiences.append(experience)
         self.episode_reward[-1] += reward
         self.episode_timestep[-1] += 1
         self.episode_exploration[-1] += int(
@@ -91,6 +210,51 @@ class NFQ:
         )
         return new_state, is_terminal
 
+    def vector_interaction_step(self, states, envs):
+        """
+        Step every sub-environment of a vector env with one batched action selection.
+
+        Sub-environments that finished on the previous call are auto-reset by
+        ``envs.step``; what they return is a fresh initial state rather than a
+        transition, so it is neither stored nor counted.
+
+        Args:
+        ----
+            states: Current ``[n_envs, obs_dim]`` states.
+            envs: Gymnasium vector environment (next-step autoreset).
+
+        Returns:
+        -------
+            tuple: (new_states, finished) where ``finished`` flags the sub-envs
+            whose episode ended on this step.
+
+        """
+        t0 = time.perf_counter()
+        actions = self.training_strategy.select_actions(self.online_model, states)
+        t1 = time.perf_counter()
+        new_states, rewards, is_terminals, is_truncateds, _infos = envs.step(actions)
+        t2 = time.perf_counter()
+        stepped = ~self.env_autoreset
+
+        self.experiences.store_batch(
+            states[stepped],
+            actions[stepped],
+            rewards[stepped],
+            new_states[stepped],
+            is_terminals[stepped],
+        )
+        self.phase_timer.add("action_selection", t1 - t0)
+        self.phase_timer.add("env_step", t2 - t1)
+        self.phase_timer.add("experience_store", time.perf_counter() - t2)
+        self.env_episode_reward[stepped] += rewards[stepped]
+        self.env_episode_timestep[stepped] += 1
+        self.env_episode_exploration[stepped] += np.asarray(
+            self.training_strategy.exploratory_action_taken, dtype=bool
+        )[stepped]
+
+        self.env_autoreset = stepped & (is_terminals | is_truncateds)
+        return new_states, self.env_autoreset.copy()
+
     def train(
         self,
         make_env_fn,
@@ -100,43 +264,290 @@ class NFQ:
         max_minutes,
         max_episodes,
         goal_mean_100_reward,
+        n_envs=1,
+        vectorization_mode="sync",
+        evaluation_worker=None,
+        evaluate_every_n_episodes=1,
+        evaluate_every_n_secs=None,
+        n_eval_envs=1,
+        eval_vectorization_mode="sync",
+        n_checkpoints=5,
+        checkpoint_spacing="linspace",
+        background_checkpoint_writes=False,
+        gc_policy="full",
+        gc_every_n_episodes=1,
+        profile_episodes=None,
+        metrics_sinks=None,
+        inference_backend=None,
+        should_stop=None,
+        snapshot_path=None,
+        snapshot_every_n_episodes=None,
+        snapshot_every_n_secs=None,
+        resume_from=None,
+        n_actors=None,
+        actor_chunk_size=32,
+        publish_weights_every_n_steps=1,
     ):
-        training_start, last_debug_time = time.time(), float("-inf")
+        """
+        Train the agent until the time, episode or reward goal is reached.
 
-        self.checkpoint_dir = tempfile.mkdtemp()
+        Args:
+        ----
+            make_env_fn: Function that creates the environment.
+            make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+            seed: Seed for the environment, torch, numpy and random.
+            gamma: Discount factor.
+            max_minutes: Wall-clock budget in minutes.
+            max_episodes: Maximum number of training episodes.
+            goal_mean_100_reward: Mean evaluation score over the last 100
+                episodes that ends training early.
+            n_envs: Number of environment copies to roll out at once. With more
+                than one, the copies are stepped through a Gymnasium vector env
+                and actions for all of them come from one batched forward pass.
+            vectorization_mode: ``"sync"`` or ``"async"`` vector env, used when
+                ``n_envs > 1``.
+            evaluation_worker: Where the periodic evaluations run: ``None``
+                inline, ``"thread"`` or ``"process"`` for a background worker
+                that scores weight snapshots while training carries on.
+            evaluate_every_n_episodes: Evaluate every this many episodes, or
+                None to only evaluate on a time cadence.
+            evaluate_every_n_secs: Evaluate every this many seconds, or None to
+                only evaluate on an episode cadence.
+            n_eval_envs: Number of environment copies the final 100-episode
+                evaluation runs its episodes across concurrently.
+            eval_vectorization_mode: ``"sync"`` or ``"async"`` (one process per
+                copy) vector env for the final evaluation, used when
+                ``n_eval_envs > 1``.
+            n_checkpoints: Number of checkpoints spread over ``max_episodes``.
+                The best-scoring and last episodes are checkpointed as well.
+            checkpoint_spacing: ``"linspace"`` or ``"geomspace"`` spread of the
+                scheduled checkpoints.
+            background_checkpoint_writes: Write checkpoints from a background
+                thread instead of blocking the training loop.
+            gc_policy: Garbage-collection policy, one of ``"full"``, ``"gen0"``,
+                ``"off"`` or ``"freeze"``; see ``GCPolicy``. The GC runs and
+                seconds so far are recorded in ``result`` and in every metrics
+                record.
+            gc_every_n_episodes: Episodes between explicit collections under the
+                ``"full"`` and ``"gen0"`` policies.
+            profile_episodes: Episode numbers to capture with ``torch.profiler``;
+                the captures are kept in ``self.phase_timer.profiles``. Time
+                per training phase is always kept in ``self.phase_timer``, see
+                ``timing_breakdown``.
+            metrics_sinks: Consumers of the per-episode metrics records, each
+                with ``write(record)`` and ``close()``. Defaults to a single
+                ``PrintSink``; add an ``NpzMetricsSink`` to persist the stream.
+            inference_backend: ``"trace"`` or ``"compile"`` to compile the
+                forward pass the online model acts with one state at a time,
+                see ``FCQ.compile_inference``; None keeps it eager.
+            should_stop: Function called with each episode's metrics record
+                that returns True to stop training early, e.g. when a
+                hyperparameter sweep prunes the run; see ``sweep``. A stopped
+                run skips the final evaluation and its ``final_eval_score`` is
+                NaN.
+            snapshot_path: File a snapshot of the complete trainer state is
+                written to, atomically, between episodes: weights, optimizer,
+                strategies, global and environment RNGs, statistics, pending
+                experiences and checkpoint bookkeeping. Only supported with
+                ``n_envs == 1``.
+            snapshot_every_n_episodes: Snapshot every this many episodes.
+            snapshot_every_n_secs: Snapshot when this many seconds have passed
+                since the last snapshot.
+            resume_from: Snapshot to resume training from, with the same
+                arguments as the run that wrote it. With inline evaluation
+                (``evaluation_worker=None``) the resumed run continues exactly
+                as the interrupted run would have, apart from wall-clock times.
+            n_actors: Collect experiences in this many actor processes, each
+                acting with its own environment, training strategy and copy of
+                the model, while this process only learns; see
+                ``ActorPool``. None acts and learns in turn in this process.
+                Only supported with ``n_envs == 1`` and without snapshots.
+            actor_chunk_size: Transitions an actor sends to the learner at once.
+            publish_weights_every_n_steps: Optimization steps between weight
+                updates published to the actors.
+
+        Returns:
+        -------
+            tuple: (result, final_eval_score, training_time, wallclock_time).
+                ``result`` has one row per episode with the total steps, mean
+                100 reward, mean 100 evaluation score, training time, wallclock
+                time, GC collections and GC seconds so far; rows after the last
+                episode are NaN.
+
+        """
+        if n_envs > 1 and (snapshot_path is not None or resume_from is not None):
+            msg = "Snapshots are only supported with n_envs == 1"
+            raise ValueError(msg)
+        if n_actors is not None and (
+            n_envs > 1 or snapshot_path is not None or resume_from is not None
+        ):
+            msg = "Actors are only supported with n_envs == 1 and without snapshots"
+            raise ValueError(msg)
+        snapshot = None
+        if resume_from is not None:
+            # Snapshots hold pickled strategies and buffers, not just tensors
+            snapshot = torch.load(resume_from, weights_only=False)
+        self.training_start = time.time()
+
+        if snapshot is not None and Path(snapshot["checkpoint_dir"]).is_dir():
+            self.checkpoint_dir = snapshot["checkpoint_dir"]
+        else:
+            self.checkpoint_dir = tempfile.mkdtemp()
+        self.checkpoint_manager = CheckpointManager(
+            self.checkpoint_dir,
+            max_episodes,
+            n_checkpoints=n_checkpoints,
+            spacing=checkpoint_spacing,
+            background_writes=background_checkpoint_writes,
+        )
         self.make_env_fn = make_env_fn
         self.make_env_kargs = make_env_kargs
         self.seed = seed
         self.gamma = gamma
+        self.max_minutes = max_minutes
+        self.max_episodes = max_episodes
+        self.goal_mean_100_reward = goal_mean_100_reward
 
-        env = self.make_env_fn(**self.make_env_kargs, seed=self.seed)
+        if n_envs > 1:
+            env = make_vector_env(
+                self.make_env_fn,
+                self.make_env_kargs,
+                n_envs,
+                seed=self.seed,
+                vectorization_mode=vectorization_mode,
+            )
+            observation_space = env.single_observation_space
+            action_space = env.single_action_space
+        else:
+            env = self.make_env_fn(**self.make_env_kargs, seed=self.seed)
+            observation_space, action_space = env.observation_space, env.action_space
         torch.manual_seed(self.seed)
         np.random.seed(self.seed)
         random.seed(self.seed)
 
-        nS, nA = env.observation_space.shape[0], env.action_space.n
+        nS, nA = observation_space.shape[0], action_space.n
         self.episode_timestep = []
         self.episode_reward = []
         self.episode_seconds = []
         self.evaluation_scores = []
         self.episode_exploration = []
+        self.stats = TrainingStats()
 
-        self.online_model = self.value_model_fn(nS, nA)
-        self.value_optimizer = self.value_optimizer_fn(
-            self.online_model, self.value_optimizer_lr
-        )
+        self._build_models(nS, nA)
+        if inference_backend is not None:
+            self.online_model.compile_inference(inference_backend)
 
         self.training_strategy = self.training_strategy_fn()
         self.evaluation_strategy = self.evaluation_strategy_fn()
-        self.experiences = []
+        self.evaluator = BackgroundEvaluator(
+            self.make_env_fn,
+            self.make_env_kargs,
+            partial(self.value_model_fn, nS, nA),
+            self.evaluation_strategy_fn,
+            seed=self.seed,
+            worker=evaluation_worker,
+            every_n_episodes=evaluate_every_n_episodes,
+            every_n_secs=evaluate_every_n_secs,
+        )
+        # Actors deliver transitions a chunk at a time, like a vector env
+        self.experiences = self._make_experience_buffer(
+            observation_space.shape, n_envs if n_actors is None else actor_chunk_size
+        )
+
+        self.result = np.empty((max_episodes, 7))
+        self.result[:] = np.nan
+        self.should_stop = should_stop
+        self.stopped_early = False
+        self.snapshot_path = snapshot_path
+        self.snapshot_every_n_episodes = snapshot_every_n_episodes
+        self.snapshot_every_n_secs = snapshot_every_n_secs
+        self._last_snapshot_time = time.time()
+        self.training_time = 0
+        self.phase_timer = PhaseTimer()
+        self.profile_episodes = set(profile_episodes or ())
+        self.gc_policy = GCPolicy(gc_policy, every_n_episodes=gc_every_n_episodes)
+        self.metrics_sinks = (
+            [PrintSink()] if metrics_sinks is None else list(metrics_sinks)
+        )
+        if snapshot is not None:
+            self._restore_snapshot(snapshot, env)
+        if self.prefetch_minibatches and self.minibatch_size is not None:
+            self.minibatch_executor = ThreadPoolExecutor(max_workers=1)
+        self.gc_policy.setup()
+        training_completed = False
+        try:
+            if n_actors is not None:
+                self._train_actor_learner(
+                    observation_space.shape,
+                    n_actors,
+                    actor_chunk_size,
+                    publish_weights_every_n_steps,
+                )
+            elif n_envs > 1:
+                self._train_vectorized(env)
+            else:
+                self._train_single(env)
+            training_completed = True
+        finally:
+            self.phase_timer.stop_profile()
+            self.gc_policy.teardown()
+            for sink in self.metrics_sinks:
+                sink.close()
+            if self.minibatch_executor is not None:
+                self.minibatch_executor.shutdown()
+                self.minibatch_executor = None
+            env.close()
+            # A failed run does not wait for an in-flight evaluation
+            self.evaluator.close(wait=training_completed)
+        self.evaluation_scores.extend(score for _, score in self.evaluator.collect())
 
-        result = np.empty((max_episodes, 5))
-        result[:] = np.nan
-        training_time = 0
-        for episode in range(1, max_episodes + 1):
+        if self.stopped_early:
+            # A pruned run is discarded, so it skips the final evaluation
+            final_eval_score = score_std = float("nan")
+            self.final_evaluation_returns = []
+        else:
+            if n_eval_envs > 1:
+                eval_env = make_vector_env(
+                    self.make_env_fn,
+                    self.make_env_kargs,
+                    n_eval_envs,
+                    seed=self.seed,
+                    vectorization_mode=eval_vectorization_mode,
+                )
+            else:
+                eval_env = self.make_env_fn(**self.make_env_kargs, seed=self.seed)
+            try:
+                with self.phase_timer.phase("final_evaluation"):
+                    final_eval_score, score_std, self.final_evaluation_returns = (
+                        self.evaluate(
+                            self.online_model,
+                            eval_env,
+                            n_episodes=100,
+                            return_episode_returns=True,
+                        )
+                    )
+            finally:
+                eval_env.close()
+        wallclock_time = time.time() - self.training_start
+        self.wallclock_time = wallclock_time
+        print("Training complete.")
+        print(
+            f"Final evaluation score {final_eval_score:.2f}\u00b1{score_std:.2f} in {self.training_time:.2f}s training time,"
+            f" {wallclock_time:.2f}s wall-clock time,"
+            f" {self.gc_policy.gc_seconds:.2f}s in {self.gc_policy.collections} GC runs.\n"
+        )
+        del env
+        self.get_cleaned_checkpoints()
+        return self.result, final_eval_score, self.training_time, wallclock_time
+
+    def _train_single(self, env):
+        for episode in range(len(self.episode_reward) + 1, self.max_episodes + 1):
+            if episode in self.profile_episodes:
+                self.phase_timer.start_profile(episode)
             episode_start = time.time()
 
-            obs, _info = env.reset()  # Unpack observation and info dictionary
+            with self.phase_timer.phase("env_reset"):
+                obs, _info = env.reset()  # Unpack observation and info dictionary
             state = obs  # Assign the observation to the state variable
             is_terminal = False
             self.episode_reward.append(0.0)
@@ -146,130 +557,443 @@ class NFQ:
             for _step in count():
                 state, is_terminal = self.interaction_step(state, env)
 
-                if len(self.experiences) >= self.batch_size:
-                    states, actions, rewards, next_states, is_terminals = zip(
-                        *self.experiences, strict=False
-                    )
-                    states = np.vstack(states)
-                    actions = np.vstack(actions)
-                    rewards = np.vstack(rewards)
-                    next_states = np.vstack(next_states)
-                    is_terminals = np.vstack(is_terminals)
-                    batches = [states, actions, rewards, next_states, is_terminals]
-                    experiences = self.online_model.load(batches)
-                    for _ in range(self.epochs):
-                        self.optimize_model(experiences)
-                    self.experiences.clear()
+                if self._should_optimize():
+                    self._optimize_on_experiences()
 
                 if is_terminal:
-                    gc.collect()
+                    with self.phase_timer.phase("gc"):
+                        self.gc_policy.on_episode_end()
                     break
 
-            # stats
             episode_elapsed = time.time() - episode_start
             self.episode_seconds.append(episode_elapsed)
-            training_time += episode_elapsed
-            evaluation_score, _ = self.evaluate(self.online_model, env)
-            self.save_checkpoint(episode - 1, self.online_model)
-
-            total_step = int(np.sum(self.episode_timestep))
-            self.evaluation_scores.append(evaluation_score)
-
-            mean_10_reward = np.mean(self.episode_reward[-10:])
-            std_10_reward = np.std(self.episode_reward[-10:])
-            mean_100_reward = np.mean(self.episode_reward[-100:])
-            std_100_reward = np.std(self.episode_reward[-100:])
-            mean_100_eval_score = np.mean(self.evaluation_scores[-100:])
-            std_100_eval_score = np.std(self.evaluation_scores[-100:])
-            lst_100_exp_rat = np.array(self.episode_exploration[-100:]) / np.array(
-                self.episode_timestep[-100:]
-            )
-            mean_100_exp_rat = np.mean(lst_100_exp_rat)
-            std_100_exp_rat = np.std(lst_100_exp_rat)
-
-            wallclock_elapsed = time.time() - training_start
-            result[episode - 1] = (
-                total_step,
-                mean_100_reward,
-                mean_100_eval_score,
-                training_time,
-                wallclock_elapsed,
-            )
+            self.training_time += episode_elapsed
+            training_is_over = self._finish_episode(episode)
+            self.phase_timer.stop_profile()
+            if training_is_over:
+                break
+            if self._snapshot_due(episode):
+                with self.phase_timer.phase("snapshot"):
+                    self._save_snapshot(env)
 
-            reached_debug_time = (
-                time.time() - last_debug_time >= LEAVE_PRINT_EVERY_N_SECS
-            )
-            reached_max_minutes = wallclock_elapsed >= max_minutes * 60
-            reached_max_episodes = episode >= max_episodes
-            reached_goal_mean_reward = mean_100_eval_score >= goal_mean_100_reward
-            training_is_over = (
-                reached_max_minutes or reached_max_episodes or reached_goal_mean_reward
-            )
+    def _snapshot_due(self, episode):
+        if self.snapshot_path is None:
+            return False
+        by_episode = (
+            self.snapshot_every_n_episodes is not None
+            and episode % self.snapshot_every_n_episodes == 0
+        )
+        by_time = (
+            self.snapshot_every_n_secs is not None
+            and time.time() - self._last_snapshot_time >= self.snapshot_every_n_secs
+        )
+        return by_episode or by_time
 
-            elapsed_str = time.strftime(
-                "%H:%M:%S", time.gmtime(time.time() - training_start)
-            )
-            debug_message = "el {}, ep {:04}, ts {:06}, "
-            debug_message += "ar 10 {:05.1f}\u00b1{:05.1f}, "
-            debug_message += "100 {:05.1f}\u00b1{:05.1f}, "
-            debug_message += "ex 100 {:02.1f}\u00b1{:02.1f}, "
-            debug_message += "ev {:05.1f}\u00b1{:05.1f}"
-            debug_message = debug_message.format(
-                elapsed_str,
-                episode - 1,
-                total_step,
-                mean_10_reward,
-                std_10_reward,
-                mean_100_reward,
-                std_100_reward,
-                mean_100_exp_rat,
-                std_100_exp_rat,
-                mean_100_eval_score,
-                std_100_eval_score,
+    def _build_models(self, n_states, n_actions):
+        """Create the online model and its optimizer."""
+        self.online_model = self.value_model_fn(n_states, n_actions)
+        self.value_optimizer = self.value_optimizer_fn(
+            self.online_model, self.value_optimizer_lr
+        )
+
+    def _make_experience_buffer(self, state_shape, n_envs):
+        """Return the buffer the interaction steps store transitions in."""
+        # A vector env can overshoot batch_size by up to n_envs - 1 transitions
+        return ExperienceBuffer(self.batch_size + n_envs - 1, state_shape)
+
+    def _should_optimize(self):
+        """Return True when the stored experiences are ready to be optimized on."""
+        return len(self.experiences) >= self.batch_size
+
+    def _save_snapshot(self, env):
+        """Write the complete trainer state to ``snapshot_path``, atomically."""
+        for sink in self.metrics_sinks:
+            if hasattr(sink, "flush"):
+                sink.flush()
+        snapshot = self._snapshot_state(env)
+        # Write next to the target and rename over it, so a run killed while
+        # writing leaves the previous snapshot intact
+        snapshot_path = Path(self.snapshot_path)
+        tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+        torch.save(snapshot, tmp_path)
+        tmp_path.replace(snapshot_path)
+        self._last_snapshot_time = time.time()
+
+    def _snapshot_state(self, env):
+        """Return the trainer state ``_restore_snapshot`` resumes from."""
+        return {
+            "wallclock_elapsed": time.time() - self.training_start,
+            "training_time": self.training_time,
+            "checkpoint_dir": self.checkpoint_dir,
+            "online_model": self.online_model.state_dict(),
+            "value_optimizer": self.value_optimizer.state_dict(),
+            "training_strategy": self.training_strategy,
+            "evaluation_strategy": self.evaluation_strategy,
+            "torch_rng": torch.get_rng_state(),
+            "cuda_rng": (
+                torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None
+            ),
+            "numpy_rng": np.random.get_state(),
+            "python_rng": random.getstate(),
+            "env_rng": get_env_rng_state(env),
+            "evaluator": self.evaluator.state_dict(),
+            "checkpoint_manager": (
+                self.checkpoint_manager.state_dict()
+                if self.checkpoint_manager is not None
+                else None
+            ),
+            "experiences": self.experiences,
+            "stats": self.stats,
+            "episode_timestep": self.episode_timestep,
+            "episode_reward": self.episode_reward,
+            "episode_seconds": self.episode_seconds,
+            "episode_exploration": self.episode_exploration,
+            "evaluation_scores": self.evaluation_scores,
+            "result": self.result,
+            "phase_seconds": dict(self.phase_timer.seconds),
+            "phase_calls": dict(self.phase_timer.calls),
+            "gc_seconds": self.gc_policy.gc_seconds,
+            "gc_collections": self.gc_policy.collections,
+            "metrics_sinks": [
+                sink.state_dict() if hasattr(sink, "state_dict") else None
+                for sink in self.metrics_sinks
+            ],
+        }
+
+    def _restore_snapshot(self, snapshot, env):
+        self.training_start = time.time() - snapshot["wallclock_elapsed"]
+        self.training_time = snapshot["training_time"]
+        self.online_model.load_state_dict(snapshot["online_model"])
+        self.value_optimizer.load_state_dict(snapshot["value_optimizer"])
+        self.training_strategy = snapshot["training_strategy"]
+        self.evaluation_strategy = snapshot["evaluation_strategy"]
+        torch.set_rng_state(snapshot["torch_rng"])
+        if snapshot["cuda_rng"] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(snapshot["cuda_rng"])
+        np.random.set_state(snapshot["numpy_rng"])
+        random.setstate(snapshot["python_rng"])
+        set_env_rng_state(env, snapshot["env_rng"])
+        self.evaluator.load_state_dict(snapshot["evaluator"])
+        if (
+            self.checkpoint_manager is not None
+            and snapshot["checkpoint_manager"] is not None
+        ):
+            self.checkpoint_manager.load_state_dict(snapshot["checkpoint_manager"])
+        self.experiences = snapshot["experiences"]
+        self.stats = snapshot["stats"]
+        self.episode_timestep = snapshot["episode_timestep"]
+        self.episode_reward = snapshot["episode_reward"]
+        self.episode_seconds = snapshot["episode_seconds"]
+        self.episode_exploration = snapshot["episode_exploration"]
+        self.evaluation_scores = snapshot["evaluation_scores"]
+        n_rows = min(len(self.result), len(snapshot["result"]))
+        self.result[:n_rows] = snapshot["result"][:n_rows]
+        self.phase_timer.seconds.update(snapshot["phase_seconds"])
+        self.phase_timer.calls.update(snapshot["phase_calls"])
+        self.gc_policy.gc_seconds = snapshot["gc_seconds"]
+        self.gc_policy.collections = snapshot["gc_collections"]
+        # Sinks are matched by position, so pass the same sinks when resuming
+        for sink, state in zip(
+            self.metrics_sinks, snapshot["metrics_sinks"], strict=False
+        ):
+            if state is not None and hasattr(sink, "load_state_dict"):
+                sink.load_state_dict(state)
+
+    def _train_vectorized(self, envs):
+        n_envs = envs.num_envs
+        self.env_episode_reward = np.zeros(n_envs)
+        self.env_episode_timestep = np.zeros(n_envs)
+        self.env_episode_exploration = np.zeros(n_envs)
+        self.env_autoreset = np.zeros(n_envs, dtype=bool)
+        env_episode_start = np.full(n_envs, time.time())
+
+        with self.phase_timer.phase("env_reset"):
+            states, _infos = envs.reset(seed=self.seed)
+        episode = 0
+        while True:
+            # Profile from the step after the previous episode finished until
+            # the profiled one finishes
+            next_episode = episode + 1
+            if next_episode in self.profile_episodes and not self.phase_timer.profiling:
+                self.phase_timer.start_profile(next_episode)
+            step_start = time.time()
+            states, finished = self.vector_interaction_step(states, envs)
+            if self._should_optimize():
+                self._optimize_on_experiences()
+            self.training_time += time.time() - step_start
+
+            if not finished.any():
+                continue
+            with self.phase_timer.phase("gc"):
+                self.gc_policy.on_episode_end(int(finished.sum()))
+            now = time.time()
+            for i in np.flatnonzero(finished):
+                episode += 1
+                self.episode_reward.append(self.env_episode_reward[i])
+                self.episode_timestep.append(self.env_episode_timestep[i])
+                self.episode_exploration.append(self.env_episode_exploration[i])
+                self.episode_seconds.append(now - env_episode_start[i])
+                self.env_episode_reward[i] = 0.0
+                self.env_episode_timestep[i] = 0.0
+                self.env_episode_exploration[i] = 0.0
+                env_episode_start[i] = now
+                training_is_over = self._finish_episode(episode)
+                if episode in self.profile_episodes:
+                    self.phase_timer.stop_profile()
+                if training_is_over:
+                    return
+
+    def _train_actor_learner(
+        self, state_shape, n_actors, chunk_size, publish_every_n_steps
+    ):
+        """Learn from transitions collected by actor processes until done."""
+        shared_weights = SharedWeights(self.online_model)
+        pool = ActorPool(
+            self.make_env_fn,
+            self.make_env_kargs,
+            self.value_model_fn,
+            self.training_strategy_fn,
+            shared_weights,
+            state_shape,
+            n_actors,
+            self.seed,
+            chunk_size=chunk_size,
+        )
+        pool.start()
+        loop_start = time.time()
+        episode, n_steps = 0, 0
+        try:
+            while True:
+                # Keep optimizing while no chunk is waiting rather than block
+                timeout = 0 if self._should_optimize() else 0.1
+                with self.phase_timer.phase("experience_store"):
+                    episodes = pool.receive(self.experiences, timeout=timeout)
+                if self._should_optimize():
+                    self._optimize_on_experiences()
+                    n_steps += 1
+                    if n_steps % publish_every_n_steps == 0:
+                        with self.phase_timer.phase("weight_publish"):
+                            shared_weights.publish(self.online_model)
+                self.training_time = time.time() - loop_start
+
+                for reward, timestep, exploration, seconds in episodes:
+                    episode += 1
+                    self.episode_reward.append(reward)
+                    self.episode_timestep.append(timestep)
+                    self.episode_exploration.append(exploration)
+                    self.episode_seconds.append(seconds)
+                    if self._finish_episode(episode):
+                        return
+        finally:
+            pool.close()
+
+    def _optimize_on_experiences(self):
+        self._optimize_on_batch(self.experiences.get())
+        self.experiences.clear()
+
+    def _optimize_on_batch(self, batch):
+        with self.phase_timer.phase("batch_assembly"):
+            experiences = self.online_model.load(batch)
+        with self.phase_timer.phase("optimize_model"):
+            for _ in range(self.epochs):
+                if self.minibatch_size is None:
+                    self.optimize_model(experiences)
+                else:
+                    self._optimize_minibatch_epoch(experiences)
+
+    def _finish_episode(self, episode):
+        """Evaluate, checkpoint and log a finished episode; return True to stop."""
+        with self.phase_timer.phase("evaluation"):
+            if self.evaluator.due(episode):
+                self.evaluator.submit(episode, self.online_model)
+            for _, evaluation_score in self.evaluator.collect():
+                self.evaluation_scores.append(evaluation_score)
+                self.stats.add_evaluation(evaluation_score)
+        self.stats.add_episode(
+            self.episode_reward[-1],
+            self.episode_timestep[-1],
+            self.episode_exploration[-1],
+        )
+
+        total_step = self.stats.total_steps
+        mean_10_reward = self.stats.reward_10.mean()
+        std_10_reward = self.stats.reward_10.std()
+        mean_100_reward = self.stats.reward_100.mean()
+        std_100_reward = self.stats.reward_100.std()
+        # NaN until the first (possibly background) evaluation completes
+        mean_100_eval_score = self.stats.eval_score_100.mean()
+        std_100_eval_score = self.stats.eval_score_100.std()
+        mean_100_exp_rat = self.stats.exploration_ratio_100.mean()
+        std_100_exp_rat = self.stats.exploration_ratio_100.std()
+
+        with self.phase_timer.phase("checkpoint"):
+            self.save_checkpoint(
+                episode - 1, self.online_model, score=mean_100_eval_score
             )
-            print(debug_message, end="\r", flush=True)
-            if reached_debug_time or training_is_over:
-                print(ERASE_LINE + debug_message, flush=True)
-                last_debug_time = time.time()
-            if training_is_over:
-                if reached_max_minutes:
-                    print("--> reached_max_minutes \u2715")
-                if reached_max_episodes:
-                    print("--> reached_max_episodes \u2715")
-                if reached_goal_mean_reward:
-                    print("--> reached_goal_mean_reward \u2713")
-                break
 
-        final_eval_score, score_std = self.evaluate(
-            self.online_model, env, n_episodes=100
+        wallclock_elapsed = time.time() - self.training_start
+        self.result[episode - 1] = (
+            total_step,
+            mean_100_reward,
+            mean_100_eval_score,
+            self.training_time,
+            wallclock_elapsed,
+            self.gc_policy.collections,
+            self.gc_policy.gc_seconds,
         )
-        wallclock_time = time.time() - training_start
-        print("Training complete.")
-        print(
-            f"Final evaluation score {final_eval_score:.2f}\u00b1{score_std:.2f} in {training_time:.2f}s training time,"
-            f" {wallclock_time:.2f}s wall-clock time.\n"
+
+        reached_max_minutes = wallclock_elapsed >= self.max_minutes * 60
+        reached_max_episodes = episode >= self.max_episodes
+        reached_goal_mean_reward = mean_100_eval_score >= self.goal_mean_100_reward
+        training_is_over = (
+            reached_max_minutes or reached_max_episodes or reached_goal_mean_reward
         )
-        env.close()
-        del env
-        self.get_cleaned_checkpoints()
-        return result, final_eval_score, training_time, wallclock_time
-
-    def evaluate(self, eval_policy_model, eval_env, n_episodes=1):
-        rs = []
-        for _ in range(n_episodes):
-            obs, info = eval_env.reset()  # Unpack observation and info dictionary
-            s = obs  # Assign the observation to the state variable
-            d = False
-            rs.append(0)
-            for _ in count():
-                a = self.evaluation_strategy.select_action(eval_policy_model, s)
-                s, r, d, _, _ = eval_env.step(a)
-                rs[-1] += r
-                if d:
-                    break
+
+        record = {
+            "episode": episode,
+            "total_steps": total_step,
+            "episode_reward": self.episode_reward[-1],
+            "episode_timestep": self.episode_timestep[-1],
+            "mean_10_reward": mean_10_reward,
+            "std_10_reward": std_10_reward,
+            "mean_100_reward": mean_100_reward,
+            "std_100_reward": std_100_reward,
+            "mean_100_eval_score": mean_100_eval_score,
+            "std_100_eval_score": std_100_eval_score,
+            "mean_100_exp_rat": mean_100_exp_rat,
+            "std_100_exp_rat": std_100_exp_rat,
+            "training_time": self.training_time,
+            "wallclock_elapsed": wallclock_elapsed,
+            "gc_collections": self.gc_policy.collections,
+            "gc_seconds": self.gc_policy.gc_seconds,
+            "training_is_over": training_is_over,
+            "reached_max_minutes": reached_max_minutes,
+            "reached_max_episodes": reached_max_episodes,
+            "reached_goal_mean_reward": reached_goal_mean_reward,
+            "stopped_early": False,
+        }
+        if self.should_stop is not None and self.should_stop(record):
+            training_is_over = True
+            record["training_is_over"] = record["stopped_early"] = True
+            self.stopped_early = True
+        # Cumulative seconds per phase; differences between records give the
+        # time each episode spent in it
+        record.update(
+            (f"time_{name}", seconds)
+            for name, seconds in self.phase_timer.seconds.items()
+        )
+        with self.phase_timer.phase("metrics"):
+            for sink in self.metrics_sinks:
+                sink.write(record)
+        return training_is_over
+
+    def fit_offline(
+        self,
+        dataset,
+        n_actions,
+        gamma,
+        n_passes=1,
+        seed=None,
+        make_env_fn=None,
+        make_env_kargs=None,
+        n_eval_episodes=10,
+    ):
+        """
+        Fit a fresh online model on a fixed dataset of logged transitions.
+
+        This is fitted Q iteration without interaction: the dataset is streamed
+        from disk in shuffled minibatches of ``batch_size`` transitions, and each
+        minibatch goes through ``optimize_model`` ``epochs`` times, as a batch
+        collected by ``train`` would. Only one minibatch is in memory at a time.
+
+        Args:
+        ----
+            dataset: ``TransitionDataset`` of logged transitions.
+            n_actions: Number of discrete actions.
+            gamma: Discount factor.
+            n_passes: Number of passes over the dataset.
+            seed: Seed for torch, numpy, random and the minibatch order.
+            make_env_fn: Function that creates an environment to evaluate the
+                model on after every pass, or None to skip evaluation.
+            make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+            n_eval_episodes: Number of evaluation episodes per pass.
+
+        Returns:
+        -------
+            list: Mean evaluation score after each pass; empty without
+            ``make_env_fn``.
+
+        """
+        self.gamma = gamma
+        if seed is not None:
+            torch.manual_seed(seed)
+            np.random.seed(seed)
+            random.seed(seed)
+        rng = np.random.default_rng(seed)
+
+        self._build_models(dataset.state_shape[0], n_actions)
+        self.evaluation_strategy = self.evaluation_strategy_fn()
+        eval_env = None
+        if make_env_fn is not None:
+            eval_env = make_env_fn(**(make_env_kargs or {}), seed=seed)
+
+        scores = []
+        for _ in range(n_passes):
+            for batch in dataset.iter_batches(self.batch_size, rng=rng):
+                self._optimize_on_batch(batch)
+            if eval_env is not None:
+                with self.phase_timer.phase("evaluation"):
+                    score, _ = self.evaluate(
+                        self.online_model, eval_env, n_episodes=n_eval_episodes
+                    )
+                scores.append(score)
+        if eval_env is not None:
+            eval_env.close()
+        return scores
+
+    def timing_breakdown(self):
+        """Return the per-phase timing table of the last training run."""
+        return self.phase_timer.format_table(getattr(self, "wallclock_time", None))
+
+    def evaluate(
+        self, eval_policy_model, eval_env, n_episodes=1, return_episode_returns=False
+    ):
+        """
+        Evaluate a model with the evaluation strategy.
+
+        Args:
+        ----
+            eval_policy_model: Model to evaluate.
+            eval_env: Environment to evaluate on. A Gymnasium vector env runs
+                the episodes concurrently across its sub-envs, with one batched
+                forward pass per step.
+            n_episodes: Number of episodes to run.
+            return_episode_returns: Also return the return of every episode.
+
+        Returns:
+        -------
+            tuple: (mean, std) of the episode returns, followed by the list of
+            returns when ``return_episode_returns`` is set.
+
+        """
+        if isinstance(eval_env, VectorEnv):
+            rs = evaluate_episodes_vectorized(
+                eval_policy_model, self.evaluation_strategy, eval_env, n_episodes
+            )
+        else:
+            rs = evaluate_episodes(
+                eval_policy_model, self.evaluation_strategy, eval_env, n_episodes
+            )
+        if return_episode_returns:
+            return np.mean(rs), np.std(rs), rs
         return np.mean(rs), np.std(rs)
 
     def get_cleaned_checkpoints(self, n_checkpoints=5):
+        if self.checkpoint_manager is not None:
+            # The manager only ever wrote the checkpoints it keeps
+            self.checkpoint_paths = self.checkpoint_manager.close()
+            return self.checkpoint_paths
+
         try:
             return self.checkpoint_paths
         except AttributeError:
@@ -338,7 +1062,10 @@ class NFQ:
         del env
         return HTML(data=data)
 
-    def save_checkpoint(self, episode_idx, model):
+    def save_checkpoint(self, episode_idx, model, score=None):
+        if self.checkpoint_manager is not None:
+            self.checkpoint_manager.offer(episode_idx, model, score=score)
+            return
         torch.save(
             model.state_dict(),
             Path(self.checkpoint_dir) / f"model.{episode_idx}.tar",
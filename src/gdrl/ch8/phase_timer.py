@@ -0,0 +1,112 @@
+import time
+from collections import defaultdict
+
+import torch
+
+
+class PhaseTimer:
+    def __init__(self):
+        """
+        Initialize per-phase wall-clock timers and call counters.
+
+        Hot paths time themselves with two ``time.perf_counter()`` calls and an
+        ``add``; coarser phases can use the ``phase`` context manager. Optionally,
+        ``torch.profiler`` captures can be taken over selected windows.
+        """
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.profiles = {}
+        self._profiler = None
+        self._profile_key = None
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] += seconds
+        self.calls[name] += calls
+
+    def phase(self, name):
+        """Return a context manager that times its body as phase ``name``."""
+        return _Phase(self, name)
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profile(self, key):
+        """Start a ``torch.profiler`` capture stored under ``profiles[key]``."""
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self._profiler = torch.profiler.profile(activities=activities)
+        self._profiler.__enter__()
+        self._profile_key = key
+
+    def stop_profile(self):
+        if self._profiler is None:
+            return
+        self._profiler.__exit__(None, None, None)
+        self.profiles[self._profile_key] = self._profiler
+        self._profiler = None
+        self._profile_key = None
+
+    def summary(self):
+        """
+        Return the totals per phase.
+
+        :return: Dict mapping phase name to a dict with ``seconds``, ``calls``
+                 and ``mean_ms`` (milliseconds per call), slowest phase first.
+        """
+        phases = sorted(self.seconds, key=self.seconds.get, reverse=True)
+        return {
+            name: {
+                "seconds": self.seconds[name],
+                "calls": self.calls[name],
+                "mean_ms": 1000 * self.seconds[name] / max(self.calls[name], 1),
+            }
+            for name in phases
+        }
+
+    def format_table(self, wallclock_time=None):
+        """
+        Format the per-phase breakdown as a text table.
+
+        :param wallclock_time: Total run time. When given, each phase's share of
+                               it is shown, along with the untimed remainder.
+        :return: The table as a string.
+        """
+        lines = [
+            f"{'phase':<20} {'calls':>10} {'total s':>10} {'mean ms':>10} {'%':>6}"
+        ]
+        timed = 0.0
+        for name, stats in self.summary().items():
+            timed += stats["seconds"]
+            share = (
+                f"{100 * stats['seconds'] / wallclock_time:6.1f}"
+                if wallclock_time
+                else f"{'':>6}"
+            )
+            lines.append(
+                f"{name:<20} {stats['calls']:>10} {stats['seconds']:>10.3f}"
+                f" {stats['mean_ms']:>10.3f} {share}"
+            )
+        if wallclock_time:
+            other = wallclock_time - timed
+            lines.append(
+                f"{'(untimed)':<20} {'':>10} {other:>10.3f} {'':>10}"
+                f" {100 * other / wallclock_time:6.1f}"
+            )
+        return "\n".join(lines)
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        """Time a ``with`` block as phase ``name`` of ``timer``."""
+        self.timer = timer
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc_info: object):
+        self.timer.add(self.name, time.perf_counter() - self.start)
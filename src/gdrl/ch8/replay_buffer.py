@@ -0,0 +1,173 @@
+import numpy as np
+
+from .experience_buffer import ExperienceBuffer
+
+# Added to absolute TD errors so that no transition's priority drops to zero
+PRIORITY_EPS = 1e-6
+
+
+class SumTree:
+    def __init__(self, capacity):
+        """
+        Initialize a sum-tree over ``capacity`` non-negative priorities.
+
+        The tree is a flat array: node ``i`` has children ``2i`` and ``2i + 1``,
+        the root is node 1 and the leaves start at ``n_leaves``, the capacity
+        rounded up to a power of two. Updates and lookups walk one root-to-leaf
+        path per index, O(log n), and are vectorized over a batch of indices.
+
+        Args:
+        ----
+            capacity (int): Number of leaves that hold priorities.
+
+        """
+        self.capacity = capacity
+        self.n_leaves = 1 << max(capacity - 1, 0).bit_length()
+        self._depth = self.n_leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.n_leaves)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def priorities(self, idxs):
+        return self.tree[np.asarray(idxs) + self.n_leaves]
+
+    def update(self, idxs, priorities):
+        """
+        Set the priorities at ``idxs`` and refresh the sums above them.
+
+        Each level of the tree is refreshed once for the whole batch, so shared
+        ancestors are only summed once. With repeated indices, the last
+        priority wins.
+
+        :param idxs: Leaf indices.
+        :param priorities: Priorities, one per index or a scalar.
+        """
+        nodes = np.asarray(idxs) + self.n_leaves
+        self.tree[nodes] = priorities
+        for _ in range(self._depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Return the leaves whose cumulative priority ranges contain ``values``.
+
+        Leaf ``i`` covers ``[sum(p[:i]), sum(p[:i + 1]))``, so a value drawn
+        uniformly from ``[0, total)`` lands on leaf ``i`` with probability
+        ``p[i] / total``.
+
+        :param values: Values in ``[0, total)``.
+        :return: Leaf indices, one per value.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self._depth):
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = values >= left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = left + go_right
+        return nodes - self.n_leaves
+
+
+class PrioritizedReplayBuffer(ExperienceBuffer):
+    def __init__(
+        self,
+        capacity,
+        state_shape,
+        alpha=0.6,
+        beta0=0.4,
+        beta_anneal_steps=100_000,
+        seed=None,
+    ):
+        """
+        Initialize a ring buffer that samples transitions by TD-error priority.
+
+        Transition ``i`` is sampled with probability ``p_i**alpha / sum_j
+        p_j**alpha``, where ``p_i`` is its last absolute TD error, kept in a
+        ``SumTree``. New transitions get the largest priority seen so far, so
+        they are replayed at least once. The bias this introduces is corrected
+        with importance sampling weights whose exponent ``beta`` is annealed
+        linearly from ``beta0`` to 1.
+
+        Args:
+        ----
+            capacity (int): Maximum number of transitions held.
+            state_shape (tuple): Shape of a single state.
+            alpha (float): How much prioritization is used, 0 being uniform.
+            beta0 (float): Initial importance sampling exponent.
+            beta_anneal_steps (int): Number of ``sample`` calls over which beta
+                reaches 1.
+            seed (int): Seed for ``sample``.
+
+        """
+        super().__init__(capacity, state_shape, seed=seed)
+        self.alpha = alpha
+        self.beta0 = beta0
+        self.beta_anneal_steps = beta_anneal_steps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+        self._n_samples = 0
+
+    @property
+    def beta(self):
+        progress = min(1.0, self._n_samples / self.beta_anneal_steps)
+        return self.beta0 + (1.0 - self.beta0) * progress
+
+    def store(self, state, action, reward, next_state, is_terminal):
+        idx = self._next_idx
+        super().store(state, action, reward, next_state, is_terminal)
+        self.tree.update([idx], self.max_priority**self.alpha)
+
+    def store_batch(self, states, actions, rewards, next_states, is_terminals):
+        idxs = (self._next_idx + np.arange(len(states))) % self.capacity
+        super().store_batch(states, actions, rewards, next_states, is_terminals)
+        self.tree.update(idxs, self.max_priority**self.alpha)
+
+    def sample(self, batch_size):
+        """
+        Sample transitions in proportion to their priorities.
+
+        The total priority is split into ``batch_size`` equal segments and one
+        transition is drawn from each, which spreads a batch over the whole
+        priority range.
+
+        :param batch_size: Number of transitions to sample.
+        :return: (idxs, (states, actions, rewards, next_states, is_terminals)),
+                 where the arrays are copies gathered at ``idxs``.
+        """
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + self._rng.random(batch_size)) * segment
+        # Guard against landing on an empty leaf through float rounding
+        idxs = np.minimum(self.tree.find(values), self._size - 1)
+        self._n_samples += 1
+        return idxs, self._gather(idxs)
+
+    def importance_weights(self, idxs):
+        """
+        Return the importance sampling weights of sampled transitions.
+
+        :param idxs: Indices returned by ``sample``.
+        :return: ``[len(idxs), 1]`` float32 weights, scaled so the largest is 1.
+        """
+        probs = self.tree.priorities(idxs) / self.tree.total
+        weights = (self._size * probs) ** -self.beta
+        return (weights / weights.max()).astype(np.float32)[:, None]
+
+    def update_priorities(self, idxs, td_errors):
+        """
+        Set the priorities of sampled transitions from their new TD errors.
+
+        :param idxs: Indices returned by ``sample``.
+        :param td_errors: TD errors, one per index.
+        """
+        priorities = np.abs(td_errors) + PRIORITY_EPS
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(idxs, priorities**self.alpha)
+
+    def clear(self):
+        super().clear()
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
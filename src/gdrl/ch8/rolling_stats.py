@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class RollingWindow:
+    def __init__(self, size):
+        """
+        Initialize a fixed-size window with constant-time mean and std.
+
+        Values are kept in a circular array alongside a running sum and sum of
+        squares, so appending and reading the statistics cost O(1). The sums are
+        recomputed from the window every time it wraps around, which keeps
+        floating-point drift from accumulating over long runs.
+
+        Args:
+        ----
+            size (int): Number of most recent values the window covers.
+
+        """
+        self.size = size
+        self._values = np.zeros(size)
+        self._next_idx = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def __len__(self):
+        """Return the number of values currently in the window."""
+        return self._count
+
+    def append(self, value):
+        old = self._values[self._next_idx]
+        if self._count == self.size:
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self._count += 1
+        self._values[self._next_idx] = value
+        self._sum += value
+        self._sum_sq += value * value
+
+        self._next_idx = (self._next_idx + 1) % self.size
+        if self._next_idx == 0:
+            self._sum = float(self._values.sum())
+            self._sum_sq = float(np.dot(self._values, self._values))
+
+    def mean(self):
+        if self._count == 0:
+            return np.nan
+        return self._sum / self._count
+
+    def std(self):
+        if self._count == 0:
+            return np.nan
+        mean = self._sum / self._count
+        # Guard against a tiny negative variance from cancellation
+        return np.sqrt(max(self._sum_sq / self._count - mean * mean, 0.0))
+
+
+class TrainingStats:
+    def __init__(self):
+        """
+        Initialize the rolling statistics the NFQ trainer reports each episode.
+
+        Tracks the last 10 and 100 training rewards, the last 100 evaluation
+        scores and exploration ratios, and the total number of steps taken.
+        """
+        self.reward_10 = RollingWindow(10)
+        self.reward_100 = RollingWindow(100)
+        self.eval_score_100 = RollingWindow(100)
+        self.exploration_ratio_100 = RollingWindow(100)
+        self.total_steps = 0
+
+    def add_episode(self, reward, timesteps, exploratory_actions):
+        self.reward_10.append(reward)
+        self.reward_100.append(reward)
+        self.exploration_ratio_100.append(exploratory_actions / timesteps)
+        self.total_steps += int(timesteps)
+
+    def add_evaluation(self, score):
+        self.eval_score_100.append(score)
@@ -0,0 +1,302 @@
+import csv
+import itertools
+import math
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager, get_context
+from pathlib import Path
+
+import cloudpickle
+import numpy as np
+import torch
+
+
+def grid_configs(space):
+    """
+    Return every combination of the values in ``space``.
+
+    :param space: Dict mapping a hyperparameter name to a list of values.
+    :return: List of config dicts.
+    """
+    names = list(space)
+    return [
+        dict(zip(names, values, strict=True))
+        for values in itertools.product(*space.values())
+    ]
+
+
+def random_configs(space, n_configs, seed=None):
+    """
+    Return ``n_configs`` configs sampled from ``space``.
+
+    :param space: Dict mapping a hyperparameter name to either a list of values,
+                  sampled uniformly, or a function that takes a
+                  ``np.random.Generator`` and returns a value.
+    :param n_configs: Number of configs to sample.
+    :param seed: Seed for the sampler.
+    :return: List of config dicts.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            name: values(rng) if callable(values) else values[rng.integers(len(values))]
+            for name, values in space.items()
+        }
+        for _ in range(n_configs)
+    ]
+
+
+class MedianStoppingRule:
+    def __init__(self, grace_episodes=10, min_runs=3):
+        """
+        Initialize a scheduler that stops runs doing worse than the median run.
+
+        After ``grace_episodes``, a run is stopped at episode ``e`` if its best
+        score so far is below the median of the best scores the other runs had
+        at episode ``e``, provided at least ``min_runs`` of them got that far.
+
+        Args:
+        ----
+            grace_episodes (int): Episodes every run is allowed to train for.
+            min_runs (int): Runs needed at an episode before any is stopped.
+
+        """
+        self.grace_episodes = grace_episodes
+        self.min_runs = min_runs
+        self._best_scores = {}
+
+    def report(self, run_id, episode, score):
+        """Record ``run_id``'s score at ``episode``; return True to stop the run."""
+        best_scores = self._best_scores.setdefault(run_id, [])
+        # fmax ignores NaN scores, e.g. before the first background evaluation
+        best = np.fmax(best_scores[-1], score) if best_scores else score
+        best_scores.append(best)
+        if episode < self.grace_episodes or math.isnan(best):
+            return False
+        others = [
+            scores[episode - 1]
+            for other_id, scores in self._best_scores.items()
+            if other_id != run_id and len(scores) >= episode
+        ]
+        others = [score for score in others if not math.isnan(score)]
+        return len(others) >= self.min_runs and best < np.median(others)
+
+
+class SuccessiveHalving:
+    def __init__(self, min_episodes=10, reduction_factor=3):
+        """
+        Initialize an asynchronous successive-halving scheduler.
+
+        Rungs are placed at ``min_episodes * reduction_factor**k`` episodes. When
+        a run reaches a rung, it continues only if its score is in the top
+        ``1 / reduction_factor`` of the scores recorded at that rung so far, so
+        each rung keeps a shrinking share of the runs without waiting for
+        stragglers.
+
+        Args:
+        ----
+            min_episodes (int): Episodes before the first rung.
+            reduction_factor (int): Inverse of the share of runs a rung keeps.
+
+        """
+        self.min_episodes = min_episodes
+        self.reduction_factor = reduction_factor
+        self._rung_scores = {}
+
+    def report(self, _run_id, episode, score):
+        """Record a score at ``episode``; return True to stop the run."""
+        rung, rung_episode = 0, self.min_episodes
+        while rung_episode < episode:
+            rung, rung_episode = rung + 1, rung_episode * self.reduction_factor
+        if rung_episode != episode or math.isnan(score):
+            return False
+        scores = self._rung_scores.setdefault(rung, [])
+        scores.append(score)
+        cutoff = np.percentile(scores, 100 * (1 - 1 / self.reduction_factor))
+        return score < cutoff
+
+
+def _run_config(run_args, run_id, config, should_stop):
+    agent_fn, make_env_fn, make_env_kargs, train_args, train_kwargs = run_args
+    stopped_early = False
+
+    def stop(record):
+        nonlocal stopped_early
+        stopped_early = should_stop(record)
+        return stopped_early
+
+    agent = agent_fn(config)
+    result, final_eval_score, _, wallclock_time = agent.train(
+        make_env_fn, make_env_kargs, *train_args, should_stop=stop, **train_kwargs
+    )
+    return {
+        "run_id": run_id,
+        "stopped_early": stopped_early,
+        "result": result,
+        "final_eval_score": final_eval_score,
+        "wallclock_time": wallclock_time,
+    }
+
+
+_worker_run_args = None
+
+
+def _init_sweep_worker(payload, torch_threads):
+    global _worker_run_args  # noqa: PLW0603
+    torch.set_num_threads(torch_threads)
+    _worker_run_args = cloudpickle.loads(payload)
+
+
+def _run_config_in_worker(run_id, config, reports, stop_flags):
+    def should_stop(record):
+        reports.put((run_id, record["episode"], record["mean_100_eval_score"]))
+        return stop_flags.get(run_id, False)
+
+    return _run_config(_worker_run_args, run_id, config, should_stop)
+
+
+def _results_row(run, config, goal_mean_100_reward):
+    result = run["result"]
+    eval_scores = result[:, 2]
+    finished = ~np.isnan(result[:, 0])
+    reached_goal = np.flatnonzero(eval_scores >= goal_mean_100_reward)
+    time_to_goal = result[reached_goal[0], 4] if len(reached_goal) else math.inf
+    if len(reached_goal):
+        status = "goal"
+    elif run["stopped_early"]:
+        status = "stopped"
+    else:
+        status = "finished"
+    return {
+        "run_id": run["run_id"],
+        # Prefixed so a hyperparameter cannot overwrite a results column
+        **{f"config_{name}": value for name, value in config.items()},
+        "status": status,
+        "episodes": int(finished.sum()),
+        "time_to_goal": float(time_to_goal),
+        "best_mean_100_eval_score": float(np.nanmax(eval_scores, initial=-math.inf)),
+        "final_eval_score": float(run["final_eval_score"]),
+        "wallclock_time": float(run["wallclock_time"]),
+    }
+
+
+def run_sweep(
+    agent_fn,
+    configs,
+    make_env_fn,
+    make_env_kargs,
+    seed,
+    gamma,
+    max_minutes,
+    max_episodes,
+    goal_mean_100_reward,
+    scheduler=None,
+    n_workers=None,
+    torch_threads_per_worker=None,
+    results_path=None,
+    **train_kwargs: object,
+):
+    """
+    Train one agent per config concurrently, stopping losing runs early.
+
+    Every episode, each run reports its ``mean_100_eval_score`` to the
+    ``scheduler`` in this process, which may flag the run to stop; the run
+    then ends after its current episode and its worker picks up the next
+    queued config. Workers pin ``torch.set_num_threads`` so concurrent runs
+    share the cores.
+
+    Args:
+    ----
+        agent_fn: Function that takes a config dict and returns an untrained
+            agent, e.g. ``lambda c: NFQ(..., batch_size=c["batch_size"], ...)``.
+            Serialized with cloudpickle, so lambdas work.
+        configs: List of config dicts, see ``grid_configs`` and
+            ``random_configs``.
+        make_env_fn: Function that creates the environment.
+        make_env_kargs: Keyword arguments passed to ``make_env_fn``.
+        seed: Seed every run trains with.
+        gamma: Discount factor.
+        max_minutes: Wall-clock budget per run in minutes.
+        max_episodes: Maximum number of training episodes per run.
+        goal_mean_100_reward: Mean evaluation score that ends a run; the
+            results are ranked by the time taken to reach it.
+        scheduler: ``MedianStoppingRule``, ``SuccessiveHalving`` or any object
+            with a ``report(run_id, episode, score)`` method returning True to
+            stop the run. None trains every config to completion.
+        n_workers: Number of worker processes; defaults to one per config, up
+            to the number of CPUs. 0 trains the configs one after another in
+            this process.
+        torch_threads_per_worker: Torch intra-op threads per worker; defaults to
+            the CPUs divided evenly among the workers.
+        results_path: CSV file the ranked results table is written to, if given.
+        **train_kwargs: Further keyword arguments passed to ``train``.
+
+    Returns:
+    -------
+        list: One dict per config, ranked by ``time_to_goal`` (``inf`` for runs
+        that never reached the goal), then by ``best_mean_100_eval_score``.
+        Each hyperparameter is stored under ``config_<name>``; stopped runs
+        skip the final evaluation, so their ``final_eval_score`` is NaN.
+
+    """
+    n_cpus = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = min(len(configs), n_cpus)
+    train_args = (seed, gamma, max_minutes, max_episodes, goal_mean_100_reward)
+    run_args = (agent_fn, make_env_fn, make_env_kargs, train_args, train_kwargs)
+
+    def report(run_id, episode, score):
+        return scheduler is not None and scheduler.report(run_id, episode, score)
+
+    if n_workers == 0:
+        runs = [
+            _run_config(
+                run_args,
+                run_id,
+                config,
+                lambda record, run_id=run_id: report(
+                    run_id, record["episode"], record["mean_100_eval_score"]
+                ),
+            )
+            for run_id, config in enumerate(configs)
+        ]
+    else:
+        if torch_threads_per_worker is None:
+            torch_threads_per_worker = max(1, n_cpus // n_workers)
+        with (
+            Manager() as manager,
+            ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_sweep_worker,
+                initargs=(cloudpickle.dumps(run_args), torch_threads_per_worker),
+            ) as executor,
+        ):
+            reports, stop_flags = manager.Queue(), manager.dict()
+            futures = [
+                executor.submit(
+                    _run_config_in_worker, run_id, config, reports, stop_flags
+                )
+                for run_id, config in enumerate(configs)
+            ]
+            while not all(future.done() for future in futures):
+                try:
+                    run_id, episode, score = reports.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if report(run_id, episode, score):
+                    stop_flags[run_id] = True
+            runs = [future.result() for future in futures]
+
+    rows = [
+        _results_row(run, config, goal_mean_100_reward)
+        for run, config in zip(runs, configs, strict=True)
+    ]
+    rows.sort(key=lambda row: (row["time_to_goal"], -row["best_mean_100_eval_score"]))
+    if results_path is not None:
+        with Path(results_path).open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+import torch
+
+from .actor_learner import ActorPool, SharedWeights
+from .dqn import DQN
+from .egreedy_strategy import EGreedyStrategy
+from .env_utils import get_make_env_fn
+from .experience_buffer import ExperienceBuffer
+from .fcq import FCQ
+from .greedy_strategy import GreedyStrategy
+from .nfq import NFQ
+
+
+def make_model(ns=4, na=2):
+    """Create a small FCQ."""
+    return FCQ(ns, na, hidden_dims=(8,))
+
+
+def test_shared_weights_pull_copies_newer_weights_in_place():
+    """Test that pull copies published weights into the same parameter tensors."""
+    learner, actor = make_model(), make_model()
+    weights = SharedWeights(learner)
+    param = next(actor.parameters())
+    assert weights.pull(actor, -1) == 0
+
+    with torch.no_grad():
+        for p in learner.parameters():
+            p.add_(1.0)
+    assert weights.pull(actor, 0) == 0
+    weights.publish(learner)
+    assert weights.pull(actor, 0) == 1
+    assert next(actor.parameters()) is param
+    for name, p in learner.state_dict().items():
+        assert torch.equal(actor.state_dict()[name], p)
+
+
+def test_actor_pool_delivers_chunks_of_transitions():
+    """Test that actors write valid transitions into the shared slots."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    pool = ActorPool(
+        make_env_fn,
+        make_env_kargs,
+        make_model,
+        lambda: EGreedyStrategy(epsilon=0.5),
+        SharedWeights(make_model()),
+        (4,),
+        n_actors=2,
+        seed=0,
+        chunk_size=8,
+        n_slots=2,
+    )
+    buffer = ExperienceBuffer(64, (4,))
+    pool.start()
+    try:
+        while len(buffer) < 32:  # noqa: PLR2004
+            pool.receive(buffer, timeout=30)
+    finally:
+        pool.close()
+
+    states, actions, _, next_states, is_terminals = buffer.get()
+    assert len(buffer) == 32  # noqa: PLR2004
+    assert set(np.unique(actions)) <= {0, 1}
+    assert set(np.unique(is_terminals)) <= {0.0, 1.0}
+    assert np.abs(states).max() > 0
+    assert np.abs(next_states).max() > 0
+    assert not any(process.is_alive() for process in pool.processes)
+
+
+def test_actors_explore_with_different_random_streams():
+    """Test that each actor's strategy is reseeded with the actor's seed."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    pool = ActorPool(
+        make_env_fn,
+        make_env_kargs,
+        make_model,
+        # Only random actions, so they come straight from the strategy's RNG
+        lambda: EGreedyStrategy(epsilon=1.0),
+        SharedWeights(make_model()),
+        (4,),
+        n_actors=2,
+        seed=0,
+        chunk_size=32,
+        n_slots=1,
+    )
+    pool.start()
+    try:
+        # With one slot each, every actor fills it and then waits
+        filled = {pool.full_queue.get(timeout=30)[0] for _ in range(2)}
+    finally:
+        pool.close()
+
+    assert filled == {0, 1}
+    actions = pool._rows[:, 0, :, 4]  # noqa: SLF001
+    assert not np.array_equal(actions[0], actions[1])
+
+
+@pytest.mark.parametrize("agent_cls", [NFQ, DQN])
+def test_train_with_actors(agent_cls):
+    """Test that training with actor processes fills the episode statistics."""
+    kwargs = {"epochs": 1} if agent_cls is NFQ else {"n_warmup_batches": 1}
+    agent = agent_cls(
+        value_model_fn=make_model,
+        value_optimizer_fn=lambda model, lr: torch.optim.SGD(model.parameters(), lr),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=16,
+        **kwargs,
+    )
+    result, final_eval_score, _, _ = agent.train(
+        *get_make_env_fn(env_name="CartPole-v1"),
+        seed=1,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=10,
+        goal_mean_100_reward=float("inf"),
+        metrics_sinks=[],
+        n_actors=2,
+        actor_chunk_size=8,
+    )
+
+    assert len(agent.episode_reward) == 10  # noqa: PLR2004
+    assert not np.isnan(result[:, 0]).any()
+    assert result[-1, 0] == sum(agent.episode_timestep)
+    assert np.isfinite(final_eval_score)
+    assert agent.phase_timer.calls["optimize_model"] > 0
+
+
+def test_train_rejects_actors_with_vector_envs():
+    """Test that actors cannot be combined with a vector env."""
+    agent = NFQ(make_model, None, 0.01, None, None, batch_size=16, epochs=1)
+    with pytest.raises(ValueError, match="Actors are only supported"):
+        agent.train(
+            *get_make_env_fn(env_name="CartPole-v1"),
+            seed=1,
+            gamma=0.99,
+            max_minutes=1,
+            max_episodes=2,
+            goal_mean_100_reward=float("inf"),
+            n_envs=2,
+            n_actors=2,
+        )
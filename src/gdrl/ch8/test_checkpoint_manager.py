@@ -0,0 +1,87 @@
+import pytest
+import torch
+
+from .checkpoint_manager import CheckpointManager, get_checkpoint_schedule
+
+
+def make_model(value):
+    """Create a tiny model whose weights are all ``value``."""
+    model = torch.nn.Linear(2, 1)
+    with torch.no_grad():
+        for param in model.parameters():
+            param.fill_(value)
+    return model
+
+
+def test_schedule_linspace_matches_cleaned_checkpoints():
+    """Test that the linspace schedule matches the legacy clean-up indexes."""
+    assert get_checkpoint_schedule(100, 5).tolist() == [0, 24, 49, 74, 99]
+
+
+def test_schedule_geomspace_is_front_loaded():
+    """Test that the geomspace schedule concentrates checkpoints early."""
+    schedule = get_checkpoint_schedule(1000, 4, spacing="geomspace").tolist()
+    assert schedule == [0, 9, 99, 999]
+
+
+def test_schedule_rejects_unknown_spacing():
+    """Test that an unknown spacing raises."""
+    with pytest.raises(ValueError, match="Unknown checkpoint spacing"):
+        get_checkpoint_schedule(10, spacing="logspace")
+
+
+@pytest.mark.parametrize("background_writes", [False, True])
+def test_only_kept_checkpoints_are_written(tmp_path, background_writes):
+    """Test that only scheduled, best and last checkpoints reach the disk."""
+    manager = CheckpointManager(
+        tmp_path, max_episodes=10, n_checkpoints=2, background_writes=background_writes
+    )
+    model = make_model(0.0)
+    scores = [0.0, 1.0, 5.0, 2.0, 3.0, 0.0]
+    for episode_idx, score in enumerate(scores):
+        with torch.no_grad():
+            model.weight.fill_(episode_idx)
+        manager.offer(episode_idx, model, score=score)
+    paths = manager.close()
+
+    # Episode 0 is scheduled, 2 scored best and 5 was the last one offered
+    assert list(paths) == [0, 2, 5]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "model.0.tar",
+        "model.2.tar",
+        "model.5.tar",
+    ]
+    for episode_idx, path in paths.items():
+        state_dict = torch.load(path)
+        assert torch.all(state_dict["weight"] == episode_idx)
+
+
+def test_close_is_idempotent(tmp_path):
+    """Test that closing twice returns the same paths without rewriting."""
+    manager = CheckpointManager(tmp_path, max_episodes=3)
+    manager.offer(0, make_model(1.0))
+    assert manager.close() == manager.close()
+
+
+@pytest.mark.parametrize("background_writes", [False, True])
+@pytest.mark.parametrize(
+    ("n_episodes", "expected"),
+    [(100, [0, 24, 49, 74, 99]), (40, [0, 8, 20, 28, 39])],
+)
+def test_schedule_is_respaced_over_the_episodes_run(
+    tmp_path, background_writes, n_episodes, expected
+):
+    """Test that a run ending early keeps checkpoints spread over its episodes."""
+    manager = CheckpointManager(
+        tmp_path,
+        max_episodes=100,
+        keep_best=False,
+        background_writes=background_writes,
+    )
+    model = make_model(0.0)
+    for episode_idx in range(n_episodes):
+        manager.offer(episode_idx, model)
+    paths = manager.close()
+
+    assert list(paths) == expected
+    assert sorted(int(p.name.split(".")[1]) for p in tmp_path.iterdir()) == expected
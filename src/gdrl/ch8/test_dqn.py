@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import torch
+
+from .dqn import DQN
+from .egreedy_strategy import EGreedyStrategy
+from .env_utils import get_make_env_fn
+from .experience_buffer import ExperienceBuffer
+from .fcq import FCQ
+from .replay_buffer import PrioritizedReplayBuffer
+
+TRAIN_KWARGS = {
+    "seed": 42,
+    "gamma": 0.99,
+    "max_minutes": 1,
+    "max_episodes": 6,
+    "goal_mean_100_reward": float("inf"),
+    "metrics_sinks": [],
+}
+
+
+def make_dqn_agent(**kwargs: object):
+    """Create a small DQN agent for CartPole."""
+    return DQN(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: torch.optim.RMSprop(
+            model.parameters(), lr=lr
+        ),
+        value_optimizer_lr=0.001,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=lambda: EGreedyStrategy(epsilon=0.1),
+        batch_size=8,
+        replay_capacity=1000,
+        n_warmup_batches=2,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    ("prioritized_replay", "buffer_type"),
+    [(False, ExperienceBuffer), (True, PrioritizedReplayBuffer)],
+)
+def test_dqn_train_keeps_experiences_for_replay(prioritized_replay, buffer_type):
+    """Test that DQN trains on a replay buffer that keeps every transition."""
+    agent = make_dqn_agent(prioritized_replay=prioritized_replay)
+    result, final_eval_score, _, _ = agent.train(
+        *get_make_env_fn(env_name="CartPole-v1"), **TRAIN_KWARGS
+    )
+
+    assert type(agent.experiences) is buffer_type
+    assert len(agent.experiences) == agent.stats.total_steps
+    assert agent.n_optimization_steps == agent.stats.total_steps - 15  # noqa: PLR2004
+    assert not np.isnan(result[:, 0]).any()
+    assert np.isfinite(final_eval_score)
+    if prioritized_replay:
+        assert agent.experiences.max_priority > 1.0
+
+
+def test_dqn_targets_bootstrap_from_the_target_network():
+    """Test that the targets come from the target network, refreshed on schedule."""
+    agent = make_dqn_agent(update_target_every_steps=3)
+    agent.gamma = 0.9
+    agent._build_models(2, 2)  # noqa: SLF001
+    with torch.no_grad():
+        agent.target_model.output_layer.bias.fill_(10.0)
+        agent.target_model.output_layer.weight.zero_()
+    experiences = (
+        torch.zeros(1, 2),
+        torch.zeros(1, 1, dtype=torch.int64),
+        torch.ones(1, 1),
+        torch.zeros(1, 2),
+        torch.zeros(1, 1),
+    )
+    assert agent._compute_targets(experiences).item() == pytest.approx(10.0)  # noqa: SLF001
+
+    for _ in range(2):
+        agent._count_optimization_step()  # noqa: SLF001
+    assert agent.target_model.output_layer.bias[0].item() == 10.0  # noqa: PLR2004
+    agent._count_optimization_step()  # noqa: SLF001
+    for name, param in agent.online_model.state_dict().items():
+        assert torch.equal(agent.target_model.state_dict()[name], param)
+
+
+def test_dqn_train_resumes_bit_for_bit_from_snapshot(tmp_path):
+    """Test that a resumed DQN run, replay and target network included, matches."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    snapshot_path = tmp_path / "snapshot.tar"
+    uninterrupted = make_dqn_agent(prioritized_replay=True)
+    uninterrupted.train(
+        make_env_fn,
+        make_env_kargs,
+        snapshot_path=snapshot_path,
+        snapshot_every_n_episodes=3,
+        **TRAIN_KWARGS,
+    )
+
+    resumed = make_dqn_agent(prioritized_replay=True)
+    result, *_ = resumed.train(
+        make_env_fn, make_env_kargs, resume_from=snapshot_path, **TRAIN_KWARGS
+    )
+    assert resumed.episode_reward == uninterrupted.episode_reward
+    assert np.array_equal(result[:, :3], uninterrupted.result[:, :3])
+    for model in ("online_model", "target_model"):
+        state_dict = getattr(resumed, model).state_dict()
+        for name, param in getattr(uninterrupted, model).state_dict().items():
+            assert torch.equal(state_dict[name], param)
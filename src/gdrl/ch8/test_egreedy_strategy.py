@@ -1,7 +1,9 @@
 import numpy as np
+import pytest
 import torch
 
 from .egreedy_strategy import EGreedyStrategy
+from .fcq import FCQ
 
 
 class DummyModel:
@@ -41,3 +43,91 @@ def test_select_action_exploratory():
     # With a fixed seed, the exploratory action is deterministic
     assert action == 0  # This value is determined by the seed
     assert bool(strategy.exploratory_action_taken) is True
+
+
+class DummyBatchModel:
+    def __call__(self, states):
+        # Return the same Q-values for every state in the batch
+        return torch.tensor([[1.0, 2.0, 3.0]]).repeat(len(states), 1)
+
+
+def test_select_actions_greedy_batch():
+    """Test that select_actions returns the greedy action for every state when epsilon=0."""
+    strategy = EGreedyStrategy(epsilon=0.0, seed=42)
+    states = np.zeros((5, 3))
+    actions = strategy.select_actions(DummyBatchModel(), states)
+    assert actions.shape == (5,)
+    assert np.all(actions == 2)  # noqa: PLR2004
+    assert not strategy.exploratory_action_taken.any()
+
+
+def test_select_actions_exploratory_batch():
+    """Test that select_actions flags non-greedy actions when epsilon=1.0."""
+    strategy = EGreedyStrategy(epsilon=1.0, seed=42)
+    states = np.zeros((100, 3))
+    actions = strategy.select_actions(DummyBatchModel(), states)
+    assert set(np.unique(actions)) <= {0, 1, 2}
+    assert np.array_equal(strategy.exploratory_action_taken, actions != 2)  # noqa: PLR2004
+
+
+def test_select_action_on_fcq_matches_forward_path():
+    """Test that FCQ's greedy_action path draws the same actions as forward."""
+
+    class ForwardOnly:
+        def __init__(self, model):
+            """Wrap ``model`` so only its forward pass is visible."""
+            self.model = model
+
+        def __call__(self, state):
+            return self.model(state)
+
+    model = FCQ(3, 4, hidden_dims=(8,))
+    states = np.random.default_rng(0).normal(size=(50, 3)).astype(np.float32)
+    fast, slow = EGreedyStrategy(epsilon=0.5), EGreedyStrategy(epsilon=0.5)
+    for state in states:
+        assert fast.select_action(model, state) == slow.select_action(
+            ForwardOnly(model), state
+        )
+        assert fast.exploratory_action_taken == slow.exploratory_action_taken
+
+
+def test_select_actions_with_per_env_epsilons():
+    """Test that each row explores with its own epsilon."""
+    strategy = EGreedyStrategy(epsilon=[0.0, 1.0, 0.0, 1.0], seed=42)
+    states = np.zeros((4, 3))
+    explored = np.zeros(4)
+    for _ in range(200):
+        actions = strategy.select_actions(DummyBatchModel(), states)
+        assert strategy.exploratory_action_taken.dtype == bool
+        explored += strategy.exploratory_action_taken
+        assert np.all(actions[[0, 2]] == 2)  # noqa: PLR2004
+
+    # A random action matches the greedy one a third of the time
+    assert np.all(np.abs(explored[[1, 3]] / 200 - 2 / 3) < 0.1)  # noqa: PLR2004
+    with pytest.raises(ValueError, match="Expected 3 epsilons"):
+        strategy.select_actions(DummyBatchModel(), np.zeros((3, 3)))
+    with pytest.raises(ValueError, match="scalar epsilon"):
+        strategy.select_action(DummyModel(), np.zeros(3))
+
+
+def test_apex_epsilons_spread_from_base():
+    """Test that the Ape-X epsilons decay from base_epsilon to base**(1+alpha)."""
+    strategy = EGreedyStrategy.apex(8, base_epsilon=0.4, alpha=7.0)
+    assert strategy.epsilon.shape == (8,)
+    assert strategy.epsilon[0] == pytest.approx(0.4)
+    assert strategy.epsilon[-1] == pytest.approx(0.4**8)
+    assert np.all(np.diff(strategy.epsilon) < 0)
+    assert EGreedyStrategy.apex(1).epsilon.tolist() == [pytest.approx(0.4)]
+
+
+def test_reseed_restarts_the_random_stream():
+    """Test that reseeding repeats a seed's exploration and differs across seeds."""
+    strategy = EGreedyStrategy(epsilon=1.0)
+    states = np.zeros((16, 3))
+    model = DummyBatchModel()
+    strategy.reseed(1)
+    first = strategy.select_actions(model, states)
+    strategy.reseed(1)
+    assert np.array_equal(strategy.select_actions(model, states), first)
+    strategy.reseed(2)
+    assert not np.array_equal(strategy.select_actions(model, states), first)
@@ -1,7 +1,8 @@
 import gymnasium as gym
+import pytest
 from gymnasium import wrappers
 
-from .env_utils import get_make_env_fn
+from .env_utils import get_make_env_fn, make_vector_env
 
 
 def test_make_env_fn_basic():
@@ -51,3 +52,20 @@ def test_make_env_fn_with_inner_outer_wrappers():
     assert hasattr(env, "dummy_wrapped")
     assert hasattr(env.env, "dummy_wrapped")
     env.close()
+
+
+def test_make_vector_env_sync():
+    """Test that make_vector_env builds a sync vector env with one copy per sub-env."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    envs = make_vector_env(make_env_fn, make_env_kargs, n_envs=3, seed=0)
+    assert isinstance(envs, gym.vector.SyncVectorEnv)
+    obs, _info = envs.reset(seed=0)
+    assert obs.shape == (3, 4)
+    envs.close()
+
+
+def test_make_vector_env_rejects_unknown_mode():
+    """Test that make_vector_env raises on an unknown vectorization mode."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    with pytest.raises(ValueError, match="Unknown vectorization mode"):
+        make_vector_env(make_env_fn, make_env_kargs, n_envs=2, vectorization_mode="x")
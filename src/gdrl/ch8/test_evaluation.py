@@ -0,0 +1,159 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+import torch
+
+from .evaluation import (
+    BackgroundEvaluator,
+    evaluate_episodes,
+    evaluate_episodes_vectorized,
+)
+
+
+class DummyModel(torch.nn.Module):
+    def __init__(self):
+        """Initialize the DummyModel with a single linear layer."""
+        super().__init__()
+        self.linear = torch.nn.Linear(4, 2)
+
+    def forward(self, x):
+        return self.linear(torch.as_tensor(x, dtype=torch.float32))
+
+
+class DummyStrategy:
+    def select_action(self, _model, _state):
+        return 0
+
+    def select_actions(self, _model, states):
+        return np.zeros(len(states), dtype=np.int64)
+
+
+class DummyEnv:
+    def __init__(self, episode_length=3):
+        """Initialize the DummyEnv that ends after ``episode_length`` steps."""
+        self.episode_length = episode_length
+        self._step_count = 0
+
+    def reset(self):
+        self._step_count = 0
+        return np.zeros(4), {}
+
+    def step(self, _action):
+        self._step_count += 1
+        done = self._step_count >= self.episode_length
+        return np.zeros(4), 1.0, done, False, {}
+
+    def close(self):
+        """Close the environment (dummy method to avoid errors)."""
+
+
+class DummyGymEnv(gym.Env):
+    def __init__(self, episode_length):
+        """Initialize a gym env paying 1 per step for ``episode_length`` steps."""
+        super().__init__()
+        self.observation_space = gym.spaces.Box(-1, 1, shape=(4,), dtype=np.float32)
+        self.action_space = gym.spaces.Discrete(2)
+        self.episode_length = episode_length
+        self._step_count = 0
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        del options
+        self._step_count = 0
+        return np.zeros(4, dtype=np.float32), {}
+
+    def step(self, _action):
+        self._step_count += 1
+        done = self._step_count >= self.episode_length
+        return np.zeros(4, dtype=np.float32), 1.0, done, False, {}
+
+
+def make_dummy_env(seed=None):
+    """Create a DummyEnv, ignoring the seed like make_env_fn would for a dummy."""
+    del seed
+    return DummyEnv()
+
+
+def make_evaluator(worker, every_n_episodes=1, every_n_secs=None):
+    """Create a BackgroundEvaluator over the dummy components."""
+    return BackgroundEvaluator(
+        make_dummy_env,
+        {},
+        DummyModel,
+        DummyStrategy,
+        worker=worker,
+        every_n_episodes=every_n_episodes,
+        every_n_secs=every_n_secs,
+    )
+
+
+def test_evaluate_episodes_returns_per_episode_returns():
+    """Test that evaluate_episodes returns the return of every episode."""
+    rs = evaluate_episodes(DummyModel(), DummyStrategy(), DummyEnv(), n_episodes=4)
+    assert rs == [3.0, 3.0, 3.0, 3.0]
+
+
+def test_evaluate_episodes_stops_on_truncation():
+    """Test that an episode ends when the env truncates it."""
+    env = gym.wrappers.TimeLimit(DummyGymEnv(episode_length=100), max_episode_steps=5)
+    assert evaluate_episodes(DummyModel(), DummyStrategy(), env, n_episodes=2) == [
+        5.0,
+        5.0,
+    ]
+
+
+def test_evaluate_episodes_vectorized_splits_episodes_across_envs():
+    """Test that each sub-env runs its share of episodes and extra steps are masked."""
+    envs = gym.vector.SyncVectorEnv(
+        [lambda: DummyGymEnv(episode_length=1), lambda: DummyGymEnv(episode_length=3)]
+    )
+    rs = evaluate_episodes_vectorized(DummyModel(), DummyStrategy(), envs, 5)
+    envs.close()
+    assert sorted(rs) == [1.0, 1.0, 1.0, 3.0, 3.0]
+
+
+@pytest.mark.parametrize("worker", [None, "thread", "process"])
+def test_background_evaluator_folds_back_results(worker):
+    """Test that every worker type returns the score of a submitted snapshot."""
+    evaluator = make_evaluator(worker)
+    assert evaluator.submit(1, DummyModel())
+    evaluator.close()
+    assert evaluator.collect() == [(1, 3.0)]
+
+
+def test_background_evaluator_skips_while_busy():
+    """Test that a snapshot submitted while an evaluation is in flight is skipped."""
+    evaluator = make_evaluator("thread")
+    evaluator._pending = (1, type("Running", (), {"done": lambda _self: False})())  # noqa: SLF001
+    assert not evaluator.submit(2, DummyModel())
+    evaluator._pending = None  # noqa: SLF001
+    evaluator.close()
+
+
+def test_background_evaluator_episode_cadence():
+    """Test that due follows the every_n_episodes cadence."""
+    evaluator = make_evaluator(None, every_n_episodes=3)
+    assert [evaluator.due(episode) for episode in range(1, 7)] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+    evaluator.close()
+
+
+def test_background_evaluator_time_cadence():
+    """Test that due fires once every_n_secs have passed since the last submission."""
+    evaluator = make_evaluator(None, every_n_episodes=None, every_n_secs=60)
+    assert not evaluator.due(1)
+    evaluator._last_submit_time -= 60  # noqa: SLF001
+    assert evaluator.due(2)
+    evaluator.close()
+
+
+def test_background_evaluator_rejects_unknown_worker():
+    """Test that an unknown worker type raises."""
+    with pytest.raises(ValueError, match="Unknown evaluation worker"):
+        make_evaluator("gpu")
@@ -0,0 +1,78 @@
+import numpy as np
+
+from .experience_buffer import ExperienceBuffer
+
+
+def test_store_and_get_returns_typed_views():
+    """Test that stored transitions come back as typed, contiguous views."""
+    buffer = ExperienceBuffer(capacity=4, state_shape=(3,))
+    buffer.store(np.ones(3), 1, 0.5, np.zeros(3), 1.0)
+    buffer.store(np.zeros(3), 0, 1.0, np.ones(3), 0.0)
+    states, actions, rewards, next_states, is_terminals = buffer.get()
+
+    assert len(buffer) == 2  # noqa: PLR2004
+    assert states.dtype == np.float32
+    assert actions.dtype == np.int64
+    assert rewards.dtype == np.float32
+    assert is_terminals.dtype == np.float32
+    assert states.shape == (2, 3)
+    assert actions.shape == (2, 1)
+    assert states.flags["C_CONTIGUOUS"]
+    assert np.shares_memory(states, buffer.states)
+    assert actions[:, 0].tolist() == [1, 0]
+    assert np.allclose(next_states[1], 1.0)
+
+
+def test_store_batch_matches_store():
+    """Test that store_batch writes the same rows as repeated store calls."""
+    states = np.arange(6, dtype=np.float64).reshape(3, 2)
+    actions = np.array([0, 1, 0])
+    rewards = np.array([1.0, 2.0, 3.0])
+    is_terminals = np.array([False, True, False])
+
+    single = ExperienceBuffer(capacity=5, state_shape=(2,))
+    for i in range(3):
+        single.store(states[i], actions[i], rewards[i], states[i], is_terminals[i])
+    batched = ExperienceBuffer(capacity=5, state_shape=(2,))
+    batched.store_batch(states, actions, rewards, states, is_terminals)
+
+    for expected, got in zip(single.get(), batched.get(), strict=True):
+        assert np.array_equal(expected, got)
+
+
+def test_ring_buffer_overwrites_oldest():
+    """Test that a full buffer wraps around and overwrites the oldest transition."""
+    buffer = ExperienceBuffer(capacity=2, state_shape=(1,))
+    for i in range(3):
+        buffer.store([i], i, i, [i], 0.0)
+    assert len(buffer) == 2  # noqa: PLR2004
+    assert sorted(buffer.get()[1][:, 0].tolist()) == [1, 2]
+
+
+def test_clear_empties_buffer():
+    """Test that clear resets the size without reallocating."""
+    buffer = ExperienceBuffer(capacity=2, state_shape=(1,))
+    states = buffer.states
+    buffer.store([0], 0, 0, [0], 0.0)
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.states is states
+
+
+def test_sample_draws_stored_rows():
+    """Test that sample only returns stored transitions, reproducibly."""
+    buffer = ExperienceBuffer(capacity=8, state_shape=(2,), seed=0)
+    for i in range(5):
+        buffer.store(np.full(2, i), i, float(i), np.zeros(2), 0.0)
+    idxs, (sampled_states, sampled_actions, *_) = buffer.sample(16)
+
+    assert idxs.max() < 5  # noqa: PLR2004
+    assert np.array_equal(sampled_actions[:, 0], idxs)
+    assert np.array_equal(sampled_states[:, 0], idxs.astype(np.float32))
+    assert not np.shares_memory(sampled_states, buffer.states)
+    other = ExperienceBuffer(capacity=8, state_shape=(2,), seed=0)
+    states, actions, rewards, next_states, is_terminals = buffer.get()
+    other.store_batch(
+        states, actions[:, 0], rewards[:, 0], next_states, is_terminals[:, 0]
+    )
+    assert np.array_equal(other.sample(16)[0], idxs)
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+import torch
+
+from .experience_buffer import ExperienceBuffer
+from .fcq import FCQ, FCQEnsemble
+from .nfq import NFQ
+
+
+@pytest.fixture
+def model():
+    """Create a small FCQ model."""
+    torch.manual_seed(0)
+    return FCQ(4, 3, hidden_dims=(8, 8))
+
+
+def test_greedy_action_matches_forward_argmax(model):
+    """Test that greedy_action agrees with an argmax over forward."""
+    rng = np.random.default_rng(0)
+    for state in rng.normal(size=(20, 4)).astype(np.float32):
+        action, q_values = model.greedy_action(state, return_q_values=True)
+        expected = model(state).detach()[0]
+        assert isinstance(action, int)
+        assert action == int(expected.argmax())
+        assert torch.allclose(q_values, expected)
+
+
+def test_greedy_action_reuses_input_buffer(model):
+    """Test that consecutive calls write into the same preallocated buffer."""
+    buffer = model._state_buffer  # noqa: SLF001
+    model.greedy_action(np.ones(4))
+    model.greedy_action([0.0, 1.0, 2.0, 3.0])
+    assert model._state_buffer is buffer  # noqa: SLF001
+    assert buffer.tolist() == [[0.0, 1.0, 2.0, 3.0]]
+
+
+def test_traced_inference_follows_weight_updates(model):
+    """Test that the traced forward keeps using the module's current weights."""
+    model.compile_inference("trace")
+    state = np.zeros(4, dtype=np.float32)
+    with torch.no_grad():
+        model.output_layer.weight.zero_()
+        model.output_layer.bias.copy_(torch.tensor([0.0, 0.0, 1.0]))
+    assert model.greedy_action(state) == 2  # noqa: PLR2004
+    with torch.no_grad():
+        model.output_layer.bias.copy_(torch.tensor([1.0, 0.0, 0.0]))
+    assert model.greedy_action(state) == 0
+    assert set(model.state_dict()) == set(FCQ(4, 3, hidden_dims=(8, 8)).state_dict())
+
+
+def test_compile_inference_rejects_unknown_backend(model):
+    """Test that an unknown inference backend raises a ValueError."""
+    with pytest.raises(ValueError, match="Unknown inference backend"):
+        model.compile_inference("onnx")
+
+
+def test_ensemble_members_match_standalone_fcqs():
+    """Test that the batched forward equals running each member as an FCQ."""
+    torch.manual_seed(0)
+    ensemble = FCQEnsemble(4, 3, n_members=5, hidden_dims=(8, 6))
+    states = torch.randn(7, 4)
+    q_members = ensemble.forward_members(states)
+    assert q_members.shape == (5, 7, 3)
+    for k in range(5):
+        assert torch.allclose(q_members[k], ensemble.member(k)(states), atol=1e-6)
+    assert torch.allclose(ensemble(states), q_members.mean(0))
+    assert ensemble.greedy_action(states[0].numpy()) == int(
+        ensemble(states[0]).argmax()
+    )
+
+
+def test_ensemble_optimize_step_matches_separate_updates():
+    """Test that one ensemble step updates each member as if trained alone."""
+    torch.manual_seed(0)
+    ensemble = FCQEnsemble(4, 2, n_members=3, hidden_dims=(8,))
+    members = [ensemble.member(k) for k in range(3)]
+    rng = np.random.default_rng(0)
+    experiences = (
+        rng.normal(size=(16, 4)).astype(np.float32),
+        rng.integers(2, size=(16, 1)),
+        rng.normal(size=(16, 1)).astype(np.float32),
+        rng.normal(size=(16, 4)).astype(np.float32),
+        rng.integers(2, size=(16, 1)).astype(np.float32),
+    )
+
+    def step(model):
+        agent = NFQ(None, None, 0.1, None, None, batch_size=16, epochs=1)
+        agent.gamma = 0.9
+        agent.online_model = model
+        agent.value_optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+        agent.optimize_model(model.load(experiences))
+
+    step(ensemble)
+    for k, member in enumerate(members):
+        step(member)
+        updated = ensemble.member(k)
+        for name, param in member.state_dict().items():
+            assert torch.allclose(updated.state_dict()[name], param, atol=1e-6)
+
+
+def test_load_wraps_typed_batches_without_copying(model):
+    """Test that typed, contiguous batches become tensors sharing their memory."""
+    buffer = ExperienceBuffer(8, (4,))
+    for i in range(8):
+        buffer.store(np.full(4, i), i % 3, 1.0, np.full(4, i + 1), 0.0)
+    batch = buffer.get()
+    tensors = model.load(batch)
+    if model.device.type != "cpu":
+        pytest.skip("zero-copy wrapping only applies on the CPU")
+    for array, tensor in zip(batch, tensors, strict=True):
+        assert tensor.data_ptr() == array.ctypes.data
+    assert [t.dtype for t in tensors] == [
+        torch.float32,
+        torch.int64,
+        torch.float32,
+        torch.float32,
+        torch.float32,
+    ]
+
+
+def test_load_converts_untyped_batches(model):
+    """Test that float64 and Python-int batches are converted to batch dtypes."""
+    rng = np.random.default_rng(0)
+    batch = (
+        rng.normal(size=(5, 4)),
+        np.array([[0], [1], [2], [0], [1]]),
+        rng.normal(size=(5, 1)),
+        rng.normal(size=(5, 4)),
+        np.zeros((5, 1)),
+    )
+    states, actions, rewards, next_states, is_terminals = model.load(batch)
+    assert states.dtype == torch.float32
+    assert actions.dtype == torch.int64
+    assert torch.allclose(rewards.cpu(), torch.from_numpy(batch[2]).float())
+    assert next_states.shape == (5, 4)
+    assert is_terminals.dtype == torch.float32
@@ -0,0 +1,65 @@
+import gc
+
+import pytest
+
+from .gc_policy import GCPolicy
+
+
+def test_full_policy_collects_every_n_episodes(monkeypatch):
+    """Test that the full policy runs gc.collect() on its episode cadence."""
+    calls = []
+    monkeypatch.setattr(gc, "collect", lambda *args: calls.append(args))
+    policy = GCPolicy("full", every_n_episodes=3)
+    for _ in range(7):
+        policy.on_episode_end()
+    assert calls == [(), ()]
+
+
+def test_gen0_policy_collects_youngest_generation(monkeypatch):
+    """Test that the gen0 policy only collects generation 0."""
+    calls = []
+    monkeypatch.setattr(gc, "collect", lambda *args: calls.append(args))
+    policy = GCPolicy("gen0")
+    policy.on_episode_end(n_episodes=2)
+    assert calls == [(0,)]
+
+
+def test_off_policy_never_collects(monkeypatch):
+    """Test that the off policy makes no explicit collections."""
+    calls = []
+    monkeypatch.setattr(gc, "collect", lambda *args: calls.append(args))
+    policy = GCPolicy("off")
+    for _ in range(5):
+        policy.on_episode_end()
+    assert calls == []
+
+
+def test_freeze_policy_freezes_and_unfreezes():
+    """Test that the freeze policy moves the heap to the permanent generation."""
+    policy = GCPolicy("freeze")
+    policy.setup()
+    try:
+        assert gc.get_freeze_count() > 0
+    finally:
+        policy.teardown()
+    assert gc.get_freeze_count() == 0
+
+
+def test_gc_time_is_measured_between_setup_and_teardown():
+    """Test that collections are counted and timed while the policy is set up."""
+    policy = GCPolicy("full")
+    policy.setup()
+    policy.on_episode_end()
+    policy.teardown()
+    collections = policy.collections
+    gc.collect()
+
+    assert collections >= 1
+    assert policy.gc_seconds > 0
+    assert policy.collections == collections
+
+
+def test_unknown_policy_raises():
+    """Test that an unknown policy raises."""
+    with pytest.raises(ValueError, match="Unknown GC policy"):
+        GCPolicy("sometimes")
@@ -1,6 +1,7 @@
 import numpy as np
 import torch
 
+from .fcq import FCQ
 from .greedy_strategy import GreedyStrategy
 
 
@@ -27,3 +28,24 @@ def test_exploratory_action_taken_is_false():
     state = np.zeros((3,))
     strategy.select_action(model, state)
     assert strategy.exploratory_action_taken is False
+
+
+def test_select_actions_returns_argmax_per_state():
+    """Test that select_actions returns the greedy action for each state in a batch."""
+
+    class DummyBatchModel:
+        def __call__(self, _states):
+            return torch.tensor([[1.0, 2.0, 3.0], [3.0, 2.0, 1.0]])
+
+    strategy = GreedyStrategy()
+    actions = strategy.select_actions(DummyBatchModel(), np.zeros((2, 3)))
+    assert actions.tolist() == [2, 0]
+    assert not strategy.exploratory_action_taken.any()
+
+
+def test_select_action_uses_fcq_greedy_action():
+    """Test that an FCQ model is acted on through its greedy_action path."""
+    model = FCQ(3, 2, hidden_dims=(4,))
+    state = np.array([0.1, -0.2, 0.3], dtype=np.float32)
+    action = GreedyStrategy().select_action(model, state)
+    assert action == int(model(state).argmax())
@@ -0,0 +1,69 @@
+import numpy as np
+
+from .metrics import NpzMetricsSink, PrintSink, load_metrics
+
+
+def make_record(episode, training_is_over=False, **extra: float):
+    """Return a metrics record for ``episode`` with placeholder statistics."""
+    record = {
+        "episode": episode,
+        "total_steps": 10 * episode,
+        "mean_10_reward": 1.0,
+        "std_10_reward": 0.0,
+        "mean_100_reward": 1.0,
+        "std_100_reward": 0.0,
+        "mean_100_exp_rat": 0.5,
+        "std_100_exp_rat": 0.1,
+        "mean_100_eval_score": np.nan,
+        "std_100_eval_score": np.nan,
+        "wallclock_elapsed": 1.5,
+        "training_is_over": training_is_over,
+        "reached_max_minutes": False,
+        "reached_max_episodes": training_is_over,
+        "reached_goal_mean_reward": False,
+    }
+    record.update(extra)
+    return record
+
+
+def test_print_sink_throttles_until_training_is_over(capsys):
+    """Test that lines are throttled but the final record is always printed."""
+    sink = PrintSink(every_n_secs=3600)
+    sink.write(make_record(1))
+    sink.write(make_record(2))
+    sink.write(make_record(3, training_is_over=True))
+    sink.close()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3  # noqa: PLR2004
+    assert "ep 0000" in lines[0]
+    assert "ep 0002" in lines[1]
+    assert lines[2] == "--> reached_max_episodes ✕"
+
+
+def test_npz_sink_writes_chunks_and_loads_them_back(tmp_path):
+    """Test that records are written in chunks and read back in order."""
+    sink = NpzMetricsSink(tmp_path, buffer_size=4)
+    for episode in range(1, 11):
+        sink.write(make_record(episode))
+    assert len(list(tmp_path.glob("metrics.*.npz"))) == 2  # noqa: PLR2004
+    sink.close()
+    assert len(list(tmp_path.glob("metrics.*.npz"))) == 3  # noqa: PLR2004
+
+    metrics = load_metrics(tmp_path)
+    assert metrics["episode"].tolist() == list(range(1, 11))
+    assert metrics["total_steps"].tolist() == [10 * e for e in range(1, 11)]
+    assert metrics["training_is_over"].dtype == bool
+
+
+def test_load_metrics_fills_missing_fields_with_nan(tmp_path):
+    """Test that fields absent from some records or chunks load as NaN."""
+    sink = NpzMetricsSink(tmp_path, buffer_size=2)
+    sink.write(make_record(1))
+    sink.write(make_record(2))
+    sink.write(make_record(3, time_env_step=0.5))
+    sink.write(make_record(4))
+    sink.close()
+
+    time_env_step = load_metrics(tmp_path)["time_env_step"]
+    assert np.isnan(time_env_step[[0, 1, 3]]).all()
+    assert time_env_step[2] == 0.5  # noqa: PLR2004
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+
+from .minibatches import iter_minibatches
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_minibatches_covers_rows_once_and_aligned(prefetch):
+    """Test that an epoch visits every row once and keeps tensors aligned."""
+    rows = torch.arange(10)
+    tensors = (rows.float().unsqueeze(1), rows * 2)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        minibatches = list(
+            iter_minibatches(tensors, 4, executor=executor if prefetch else None)
+        )
+    assert [len(first) for first, _ in minibatches] == [4, 4, 2]
+    seen = torch.cat([first[:, 0] for first, _ in minibatches])
+    assert sorted(seen.tolist()) == list(range(10))
+    for first, second in minibatches:
+        assert torch.equal(first[:, 0].long() * 2, second)
+
+
+def test_iter_minibatches_order_follows_torch_seed():
+    """Test that the shuffle is reproducible and independent of prefetching."""
+    tensors = (torch.arange(20),)
+    torch.manual_seed(0)
+    plain = [mb[0].tolist() for mb in iter_minibatches(tensors, 6)]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        torch.manual_seed(0)
+        prefetched = [
+            mb[0].tolist() for mb in iter_minibatches(tensors, 6, executor=executor)
+        ]
+    assert plain == prefetched
+    assert sum(plain, []) != list(range(20))
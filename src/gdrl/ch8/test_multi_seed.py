@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import torch
+
+from .egreedy_strategy import EGreedyStrategy
+from .env_utils import get_make_env_fn
+from .fcq import FCQ
+from .greedy_strategy import GreedyStrategy
+from .multi_seed import MultiSeedResults, train_seeds
+from .nfq import NFQ
+
+
+def make_agent():
+    """Create a small NFQ agent."""
+    return NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: torch.optim.SGD(model.parameters(), lr),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=16,
+        epochs=1,
+    )
+
+
+def make_run(n_episodes, max_episodes=4, score=1.0):
+    """Return a run dict whose result stops after ``n_episodes`` episodes."""
+    result = np.full((max_episodes, 5), np.nan)
+    result[:n_episodes] = np.arange(1, n_episodes + 1)[:, None]
+    return {
+        "result": result,
+        "final_eval_score": score,
+        "training_time": 1.0,
+        "wallclock_time": 2.0,
+        "state_dict": {},
+    }
+
+
+def test_aggregate_aligns_runs_of_different_lengths():
+    """Test that each episode aggregates only the seeds that reached it."""
+    runs = MultiSeedResults([1, 2], [make_run(2), make_run(3, score=5.0)], 3.0)
+    assert runs.aggregate("max")[:, 0].tolist()[:3] == [1.0, 2.0, 3.0]
+    assert runs.aggregate("mean")[:, 0].tolist()[:3] == [1.0, 2.0, 3.0]
+    assert np.isnan(runs.aggregate("min")[3]).all()
+    assert runs.best_seed == 2  # noqa: PLR2004
+    assert runs.summary()["final_eval_score"] == {"min": 1.0, "mean": 3.0, "max": 5.0}
+    with pytest.raises(ValueError, match="Unknown statistic"):
+        runs.aggregate("median")
+
+
+@pytest.mark.parametrize("n_workers", [0, 2])
+def test_train_seeds_gathers_one_run_per_seed(n_workers):
+    """Test that every seed is trained and gathered in seed order."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    runs = train_seeds(
+        make_agent,
+        make_env_fn,
+        make_env_kargs,
+        seeds=[12, 34],
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=3,
+        goal_mean_100_reward=float("inf"),
+        n_workers=n_workers,
+        torch_threads_per_worker=1,
+        metrics_sinks=[],
+    )
+    assert runs.seeds == [12, 34]
+    assert runs.results.shape == (2, 3, 7)
+    assert not np.isnan(runs.results).any()
+    assert np.isfinite(runs.final_eval_scores).all()
+    assert set(runs.state_dicts[0]) == set(FCQ(4, 2, hidden_dims=(8,)).state_dict())
@@ -1,8 +1,16 @@
+from pathlib import Path
+
 import numpy as np
 import pytest
 import torch
 
+from .egreedy_strategy import EGreedyStrategy
+from .env_utils import get_make_env_fn, make_vector_env
+from .fcq import FCQ, FCQEnsemble
+from .greedy_strategy import GreedyStrategy
+from .metrics import NpzMetricsSink, load_metrics
 from .nfq import NFQ
+from .transition_dataset import TransitionDataset
 
 
 class DummyModel(torch.nn.Module):
@@ -103,7 +111,7 @@ def test_nfq_train_and_evaluate(nfq_agent):
     nfq_agent.gamma = 0.99
 
     # Patch save_checkpoint to do nothing
-    nfq_agent.save_checkpoint = lambda _episode_idx, _model: None
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
     # Patch get_cleaned_checkpoints to avoid filesystem
     nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
 
@@ -159,3 +167,522 @@ def test_get_cleaned_checkpoints_uses_builtin_int(tmp_path):
     # This should not raise AttributeError about np.int
 
     agent.get_cleaned_checkpoints(n_checkpoints=2)
+
+
+def test_nfq_train_vectorized():
+    """Test that NFQ trains through a vector env and records one row per episode."""
+    agent = NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: DummyOptimizer(model.parameters(), lr),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=16,
+        epochs=1,
+    )
+    agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+
+    result, final_eval_score, _training_time, _wallclock_time = agent.train(
+        make_env_fn,
+        make_env_kargs,
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=6,
+        goal_mean_100_reward=float("inf"),
+        n_envs=3,
+    )
+    assert not np.isnan(result).any()
+    assert len(agent.episode_reward) == 6  # noqa: PLR2004
+    assert result[-1, 0] == sum(agent.episode_timestep)
+    assert np.isfinite(final_eval_score)
+
+
+def test_nfq_train_with_background_evaluation(nfq_agent):
+    """Test that NFQ trains with evaluations running on a background thread."""
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+
+    result, _final_eval_score, _training_time, _wallclock_time = nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=4,
+        goal_mean_100_reward=float("inf"),
+        evaluation_worker="thread",
+        evaluate_every_n_episodes=2,
+    )
+    assert result.shape[0] == 4  # noqa: PLR2004
+    assert 1 <= len(nfq_agent.evaluation_scores) <= 2  # noqa: PLR2004
+
+
+def test_nfq_evaluate_on_vector_env_returns_episode_returns():
+    """Test that evaluate runs episodes across a vector env and returns each one."""
+    agent = NFQ(
+        value_model_fn=None,
+        value_optimizer_fn=None,
+        value_optimizer_lr=0.01,
+        training_strategy_fn=None,
+        evaluation_strategy_fn=None,
+        batch_size=2,
+        epochs=1,
+    )
+    agent.evaluation_strategy = GreedyStrategy()
+    torch.manual_seed(0)
+    model = FCQ(4, 2, hidden_dims=(8,))
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    envs = make_vector_env(make_env_fn, make_env_kargs, n_envs=4, seed=0)
+    mean, std, rs = agent.evaluate(
+        model, envs, n_episodes=8, return_episode_returns=True
+    )
+    envs.close()
+
+    assert len(rs) == 8  # noqa: PLR2004
+    assert np.isclose(mean, np.mean(rs))
+    assert np.isclose(std, np.std(rs))
+    assert min(rs) > 0
+
+
+def test_nfq_train_keeps_only_retained_checkpoints(nfq_agent):
+    """Test that training writes only the scheduled, best and last checkpoints."""
+    nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=10,
+        goal_mean_100_reward=float("inf"),
+        n_checkpoints=2,
+    )
+    checkpoint_paths = nfq_agent.get_cleaned_checkpoints()
+    written = sorted(Path(nfq_agent.checkpoint_dir).glob("*.tar"))
+    assert {0, 9} <= set(checkpoint_paths)
+    assert sorted(checkpoint_paths.values()) == written
+
+
+def test_nfq_train_records_phase_timings(nfq_agent):
+    """Test that training fills the phase timer and can profile an episode."""
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=3,
+        goal_mean_100_reward=float("inf"),
+        profile_episodes=[2],
+    )
+    calls = nfq_agent.phase_timer.calls
+    assert calls["env_step"] == sum(nfq_agent.episode_timestep)
+    assert calls["action_selection"] == calls["env_step"]
+    assert calls["optimize_model"] >= 1
+    assert calls["final_evaluation"] == 1
+    assert list(nfq_agent.phase_timer.profiles) == [2]
+    assert "env_step" in nfq_agent.timing_breakdown()
+
+
+def test_nfq_train_streams_metrics_to_sinks(nfq_agent, tmp_path):
+    """Test that every episode is written as a record to the metrics sinks."""
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=3,
+        goal_mean_100_reward=float("inf"),
+        metrics_sinks=[NpzMetricsSink(tmp_path, buffer_size=2)],
+    )
+    metrics = load_metrics(tmp_path)
+    assert metrics["episode"].tolist() == [1, 2, 3]
+    assert metrics["total_steps"][-1] == sum(nfq_agent.episode_timestep)
+    assert metrics["training_is_over"].tolist() == [False, False, True]
+    assert (np.diff(metrics["time_env_step"]) >= 0).all()
+
+
+def test_nfq_train_reports_gc_totals(nfq_agent, tmp_path):
+    """Test that the GC runs and seconds are in the result and the metrics."""
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    result, *_ = nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=3,
+        goal_mean_100_reward=float("inf"),
+        gc_policy="full",
+        metrics_sinks=[NpzMetricsSink(tmp_path)],
+    )
+    metrics = load_metrics(tmp_path)
+    # One explicit collection per episode, plus any automatic ones
+    assert (np.diff(result[:, 5], prepend=0) >= 1).all()
+    assert np.array_equal(metrics["gc_collections"], result[:, 5])
+    assert np.array_equal(metrics["gc_seconds"], result[:, 6])
+    assert result[-1, 6] == nfq_agent.gc_policy.gc_seconds
+
+
+def test_nfq_train_with_traced_inference():
+    """Test that NFQ acts through a traced forward pass when asked to."""
+    agent = NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: DummyOptimizer(model.parameters(), lr),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=16,
+        epochs=1,
+    )
+    agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+
+    result, final_eval_score, _training_time, _wallclock_time = agent.train(
+        make_env_fn,
+        make_env_kargs,
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=3,
+        goal_mean_100_reward=float("inf"),
+        inference_backend="trace",
+    )
+    traced_forward = agent.online_model._inference_forward  # noqa: SLF001
+    assert isinstance(traced_forward, torch.jit.ScriptModule)
+    assert not np.isnan(result).any()
+    assert np.isfinite(final_eval_score)
+
+
+def test_nfq_train_stops_when_should_stop_says_so(nfq_agent, tmp_path):
+    """Test that should_stop ends training and is recorded in the metrics."""
+    nfq_agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    nfq_agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    result, final_eval_score, *_ = nfq_agent.train(
+        lambda **_kwargs: DummyEnv(),
+        {},
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=10,
+        goal_mean_100_reward=float("inf"),
+        metrics_sinks=[NpzMetricsSink(tmp_path)],
+        should_stop=lambda record: record["episode"] >= 3,  # noqa: PLR2004
+    )
+    assert len(nfq_agent.episode_reward) == 3  # noqa: PLR2004
+    assert np.isnan(result[3:]).all()
+    assert load_metrics(tmp_path)["stopped_early"].tolist() == [False, False, True]
+    assert np.isnan(final_eval_score)
+    assert "final_evaluation" not in nfq_agent.phase_timer.calls
+
+
+def test_nfq_train_closes_envs_and_evaluator_when_training_fails(nfq_agent):
+    """Test that a failed run still closes its environments and evaluator."""
+    envs = []
+
+    class ClosingEnv(DummyEnv):
+        def __init__(self):
+            """Initialize the ClosingEnv and track it."""
+            super().__init__()
+            self.closed = False
+            envs.append(self)
+
+        def close(self):
+            self.closed = True
+
+    def fail(_record):
+        msg = "training failed"
+        raise RuntimeError(msg)
+
+    with pytest.raises(RuntimeError, match="training failed"):
+        nfq_agent.train(
+            lambda **_kwargs: ClosingEnv(),
+            {},
+            seed=42,
+            gamma=0.99,
+            max_minutes=1,
+            max_episodes=4,
+            goal_mean_100_reward=float("inf"),
+            evaluation_worker="thread",
+            should_stop=fail,
+        )
+    assert len(envs) == 2  # noqa: PLR2004
+    assert all(env.closed for env in envs)
+    assert nfq_agent.evaluator._executor is None  # noqa: SLF001
+
+
+def make_cartpole_agent():
+    """Create a small NFQ agent for CartPole with a real optimizer."""
+    return NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: torch.optim.RMSprop(
+            model.parameters(), lr=lr
+        ),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=lambda: EGreedyStrategy(epsilon=0.1),
+        batch_size=16,
+        epochs=2,
+    )
+
+
+def test_nfq_train_resumes_bit_for_bit_from_snapshot(tmp_path):
+    """Test that a run resumed from a snapshot matches the uninterrupted run."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    train_kwargs = {
+        "seed": 42,
+        "gamma": 0.99,
+        "max_minutes": 1,
+        "max_episodes": 8,
+        "goal_mean_100_reward": float("inf"),
+        "metrics_sinks": [],
+    }
+    snapshot_path = tmp_path / "snapshot.tar"
+    uninterrupted = make_cartpole_agent()
+    uninterrupted.train(
+        make_env_fn,
+        make_env_kargs,
+        snapshot_path=snapshot_path,
+        snapshot_every_n_episodes=5,
+        **train_kwargs,
+    )
+    assert snapshot_path.exists()
+    assert not snapshot_path.with_name("snapshot.tar.tmp").exists()
+
+    resumed = make_cartpole_agent()
+    result, *_ = resumed.train(
+        make_env_fn, make_env_kargs, resume_from=snapshot_path, **train_kwargs
+    )
+    assert resumed.episode_reward == uninterrupted.episode_reward
+    assert resumed.evaluation_scores == uninterrupted.evaluation_scores
+    assert np.array_equal(result[:, :3], uninterrupted.result[:, :3])
+    for name, param in uninterrupted.online_model.state_dict().items():
+        assert torch.equal(resumed.online_model.state_dict()[name], param)
+
+
+def test_nfq_train_resumes_metrics_without_duplicate_episodes(tmp_path):
+    """Test that chunks flushed after the snapshot are replaced on resume."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    metrics_dir = tmp_path / "metrics"
+    snapshot_path = tmp_path / "snapshot.tar"
+    train_kwargs = {
+        "seed": 42,
+        "gamma": 0.99,
+        "max_minutes": 1,
+        "max_episodes": 8,
+        "goal_mean_100_reward": float("inf"),
+    }
+    make_cartpole_agent().train(
+        make_env_fn,
+        make_env_kargs,
+        metrics_sinks=[NpzMetricsSink(metrics_dir, buffer_size=2)],
+        snapshot_path=snapshot_path,
+        snapshot_every_n_episodes=5,
+        **train_kwargs,
+    )
+    uninterrupted = load_metrics(metrics_dir)
+
+    # Resume in the same directory, as after a crash at the end of the run
+    make_cartpole_agent().train(
+        make_env_fn,
+        make_env_kargs,
+        metrics_sinks=[NpzMetricsSink(metrics_dir, buffer_size=2)],
+        resume_from=snapshot_path,
+        **train_kwargs,
+    )
+    resumed = load_metrics(metrics_dir)
+    assert resumed["episode"].tolist() == list(range(1, 9))
+    assert np.array_equal(resumed["episode_reward"], uninterrupted["episode_reward"])
+
+
+def test_nfq_train_rejects_snapshots_with_vector_envs(nfq_agent, tmp_path):
+    """Test that snapshotting a vectorized run raises a ValueError."""
+    with pytest.raises(ValueError, match="n_envs == 1"):
+        nfq_agent.train(
+            lambda **_kwargs: DummyEnv(),
+            {},
+            seed=42,
+            gamma=0.99,
+            max_minutes=1,
+            max_episodes=2,
+            goal_mean_100_reward=float("inf"),
+            n_envs=2,
+            snapshot_path=tmp_path / "snapshot.tar",
+        )
+
+
+def test_nfq_train_ensemble():
+    """Test that NFQ trains an FCQEnsemble end to end."""
+    agent = NFQ(
+        value_model_fn=lambda ns, na: FCQEnsemble(
+            ns, na, n_members=4, hidden_dims=(8,)
+        ),
+        value_optimizer_fn=lambda model, lr: DummyOptimizer(model.parameters(), lr),
+        value_optimizer_lr=0.01,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=16,
+        epochs=1,
+    )
+    agent.save_checkpoint = lambda _episode_idx, _model, **_kwargs: None
+    agent.get_cleaned_checkpoints = lambda _n_checkpoints=5: {0: "dummy_path"}
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+
+    result, final_eval_score, _training_time, _wallclock_time = agent.train(
+        make_env_fn,
+        make_env_kargs,
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=4,
+        goal_mean_100_reward=float("inf"),
+        n_envs=2,
+        metrics_sinks=[],
+    )
+    assert not np.isnan(result).any()
+    assert np.isfinite(final_eval_score)
+    assert isinstance(agent.online_model, FCQEnsemble)
+
+
+def test_nfq_fit_offline_streams_a_transition_dataset(tmp_path):
+    """Test that fitted Q iteration runs over every minibatch of a dataset."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    env = make_env_fn(**make_env_kargs, seed=0)
+    n_transitions = 200
+    dataset = TransitionDataset.create(tmp_path, n_transitions, (4,))
+    state, _ = env.reset(seed=0)
+    for i in range(n_transitions):
+        action = env.action_space.sample()
+        next_state, reward, terminal, truncated, _ = env.step(action)
+        dataset.states[i] = state
+        dataset.actions[i] = action
+        dataset.rewards[i] = reward
+        dataset.next_states[i] = next_state
+        dataset.is_terminals[i] = terminal
+        state = env.reset()[0] if terminal or truncated else next_state
+    dataset.flush()
+    env.close()
+
+    agent = make_cartpole_agent()
+    scores = agent.fit_offline(
+        TransitionDataset(tmp_path),
+        n_actions=2,
+        gamma=0.99,
+        n_passes=2,
+        seed=0,
+        make_env_fn=make_env_fn,
+        make_env_kargs=make_env_kargs,
+        n_eval_episodes=2,
+    )
+    assert len(scores) == 2  # noqa: PLR2004
+    assert all(np.isfinite(scores))
+    n_batches = -(-n_transitions // agent.batch_size)
+    assert agent.phase_timer.calls["optimize_model"] == 2 * n_batches
+
+
+def make_minibatch_agent(**kwargs: object):
+    """Create an NFQ agent with a CartPole-sized FCQ and an SGD optimizer."""
+    agent = NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: torch.optim.SGD(model.parameters(), lr),
+        value_optimizer_lr=0.1,
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=32,
+        epochs=3,
+        **kwargs,
+    )
+    agent.gamma = 0.9
+    torch.manual_seed(0)
+    agent.online_model = agent.value_model_fn(4, 2)
+    agent.value_optimizer = agent.value_optimizer_fn(agent.online_model, 0.1)
+    return agent
+
+
+def make_batch(n_rows=32):
+    """Return a random batch of CartPole-shaped transitions."""
+    rng = np.random.default_rng(0)
+    return (
+        rng.normal(size=(n_rows, 4)).astype(np.float32),
+        rng.integers(2, size=(n_rows, 1)),
+        rng.normal(size=(n_rows, 1)).astype(np.float32),
+        rng.normal(size=(n_rows, 4)).astype(np.float32),
+        rng.integers(2, size=(n_rows, 1)).astype(np.float32),
+    )
+
+
+@pytest.mark.parametrize(
+    ("target_recompute", "expected_target_calls"), [("minibatch", 12), ("epoch", 3)]
+)
+def test_nfq_minibatch_epochs(target_recompute, expected_target_calls):
+    """Test the number of optimizer steps and target computations per batch."""
+    agent = make_minibatch_agent(minibatch_size=8, target_recompute=target_recompute)
+    target_calls, steps = [], []
+    compute_targets, step = agent._compute_targets, agent.value_optimizer.step  # noqa: SLF001
+    agent._compute_targets = lambda e: target_calls.append(1) or compute_targets(e)  # noqa: SLF001
+    agent.value_optimizer.step = lambda: steps.append(1) or step()
+    agent._optimize_on_batch(make_batch())  # noqa: SLF001
+    assert len(steps) == 12  # noqa: PLR2004
+    assert len(target_calls) == expected_target_calls
+
+
+def test_nfq_train_prefetches_minibatches_with_one_executor():
+    """Test that every epoch of a run shares one prefetch executor."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    agent = make_minibatch_agent(minibatch_size=8)
+    executors = []
+    optimize_epoch = agent._optimize_minibatch_epoch  # noqa: SLF001
+
+    def record_executor(experiences):
+        executors.append(agent.minibatch_executor)
+        optimize_epoch(experiences)
+
+    agent._optimize_minibatch_epoch = record_executor  # noqa: SLF001
+    agent.train(
+        make_env_fn,
+        make_env_kargs,
+        seed=42,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=5,
+        goal_mean_100_reward=float("inf"),
+        metrics_sinks=[],
+    )
+    assert len(executors) > 1
+    assert executors[0] is not None
+    assert all(executor is executors[0] for executor in executors)
+    assert agent.minibatch_executor is None
+
+
+def test_nfq_single_minibatch_matches_full_batch_step():
+    """Test that one minibatch spanning the batch equals a whole-batch step."""
+    full, mini = make_minibatch_agent(), make_minibatch_agent(minibatch_size=32)
+    full._optimize_on_batch(make_batch())  # noqa: SLF001
+    mini._optimize_on_batch(make_batch())  # noqa: SLF001
+    for name, param in full.online_model.state_dict().items():
+        assert torch.allclose(mini.online_model.state_dict()[name], param, atol=1e-6)
+
+
+def test_nfq_rejects_unknown_target_recompute():
+    """Test that an unknown target recompute mode raises a ValueError."""
+    with pytest.raises(ValueError, match="Unknown target recompute"):
+        NFQ(None, None, 0.1, None, None, 32, 1, target_recompute="step")
+
+
+def test_nfq_ensemble_minibatches_with_epoch_targets():
+    """Test that per-epoch targets are split per member for an ensemble."""
+    agent = make_minibatch_agent(minibatch_size=8, target_recompute="epoch")
+    agent.online_model = FCQEnsemble(4, 2, n_members=3, hidden_dims=(8,))
+    agent.value_optimizer = agent.value_optimizer_fn(agent.online_model, 0.1)
+    before = agent.online_model.weights[0].detach().clone()
+    agent._optimize_on_batch(make_batch())  # noqa: SLF001
+    assert not torch.equal(agent.online_model.weights[0], before)
@@ -0,0 +1,50 @@
+import torch
+
+from .phase_timer import PhaseTimer
+
+
+def test_add_accumulates_seconds_and_calls():
+    """Test that add sums the time and counts the calls per phase."""
+    timer = PhaseTimer()
+    timer.add("env_step", 0.5)
+    timer.add("env_step", 0.25)
+    timer.add("optimize_model", 2.0, calls=4)
+    summary = timer.summary()
+
+    assert list(summary) == ["optimize_model", "env_step"]
+    assert summary["env_step"]["seconds"] == 0.75  # noqa: PLR2004
+    assert summary["env_step"]["calls"] == 2  # noqa: PLR2004
+    assert summary["optimize_model"]["mean_ms"] == 500.0  # noqa: PLR2004
+
+
+def test_phase_context_manager_times_its_body():
+    """Test that the phase context manager records one call per use."""
+    timer = PhaseTimer()
+    for _ in range(3):
+        with timer.phase("checkpoint"):
+            pass
+    assert timer.calls["checkpoint"] == 3  # noqa: PLR2004
+    assert timer.seconds["checkpoint"] >= 0
+
+
+def test_format_table_includes_shares_and_untimed_remainder():
+    """Test that the table lists every phase plus the untimed remainder."""
+    timer = PhaseTimer()
+    timer.add("env_step", 1.0)
+    table = timer.format_table(wallclock_time=4.0)
+
+    assert "env_step" in table
+    assert "25.0" in table
+    assert "(untimed)" in table
+    assert "75.0" in table
+
+
+def test_profile_window_keeps_capture():
+    """Test that a torch.profiler capture is stored under its key."""
+    timer = PhaseTimer()
+    timer.start_profile(7)
+    assert timer.profiling
+    torch.ones(2).sum()
+    timer.stop_profile()
+    assert not timer.profiling
+    assert 7 in timer.profiles  # noqa: PLR2004
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from .replay_buffer import PrioritizedReplayBuffer, SumTree
+
+
+def fill(buffer, n):
+    """Store ``n`` transitions whose states and actions are their indices."""
+    buffer.store_batch(
+        np.arange(n, dtype=np.float32)[:, None],
+        np.arange(n),
+        np.zeros(n),
+        np.zeros((n, 1)),
+        np.zeros(n),
+    )
+
+
+@pytest.mark.parametrize("capacity", [1, 5, 8])
+def test_sum_tree_update_keeps_sums(capacity):
+    """Test that batched updates keep every internal node equal to its leaves' sum."""
+    tree = SumTree(capacity)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        idxs = rng.integers(capacity, size=4)
+        tree.update(idxs, rng.random(4))
+    leaves = tree.priorities(np.arange(capacity))
+
+    assert tree.total == pytest.approx(leaves.sum())
+    internal = np.arange(1, tree.n_leaves)
+    assert np.allclose(
+        tree.tree[internal], tree.tree[2 * internal] + tree.tree[2 * internal + 1]
+    )
+
+
+def test_sum_tree_find_matches_cumulative_sums():
+    """Test that find returns the leaf whose cumulative range holds each value."""
+    tree = SumTree(6)
+    priorities = np.array([1.0, 0.0, 2.0, 3.0, 0.5, 0.0])
+    tree.update(np.arange(6), priorities)
+    values = np.linspace(0, tree.total, 50, endpoint=False)
+
+    expected = np.searchsorted(np.cumsum(priorities), values, side="right")
+    assert np.array_equal(tree.find(values), expected)
+
+
+def test_prioritized_sampling_follows_priorities():
+    """Test that transitions are sampled in proportion to their priorities."""
+    buffer = PrioritizedReplayBuffer(8, (1,), alpha=1.0, seed=0)
+    fill(buffer, 4)
+    buffer.update_priorities(np.arange(4), np.array([0.0, 1.0, 0.0, 3.0]))
+    counts = np.zeros(4)
+    for _ in range(200):
+        idxs, (_, actions, *_) = buffer.sample(16)
+        assert np.array_equal(actions[:, 0], idxs)
+        counts += np.bincount(idxs, minlength=4)
+
+    assert counts[0] == counts[2] == 0
+    assert counts[3] / counts[1] == pytest.approx(3, rel=0.1)
+
+
+def test_new_transitions_get_max_priority():
+    """Test that stored transitions get the largest priority seen so far."""
+    buffer = PrioritizedReplayBuffer(8, (1,), alpha=0.5, seed=0)
+    fill(buffer, 2)
+    buffer.update_priorities(np.array([0, 1]), np.array([4.0, 0.5]))
+    buffer.store(np.zeros(1), 0, 0.0, np.zeros(1), 0.0)
+
+    assert buffer.tree.priorities([2])[0] == pytest.approx(buffer.max_priority**0.5)
+    assert buffer.max_priority == pytest.approx(4.0, abs=1e-5)
+
+
+def test_importance_weights_anneal_and_normalize():
+    """Test that weights are at most 1 and flatten as beta anneals to 1."""
+    buffer = PrioritizedReplayBuffer(
+        8, (1,), alpha=1.0, beta0=0.0, beta_anneal_steps=2, seed=0
+    )
+    fill(buffer, 2)
+    buffer.update_priorities(np.array([0, 1]), np.array([1.0, 3.0]))
+    assert np.allclose(buffer.importance_weights(np.array([0, 1])), 1.0)
+
+    buffer.sample(2)
+    buffer.sample(2)
+    weights = buffer.importance_weights(np.array([0, 1]))
+    assert buffer.beta == 1.0
+    assert weights.shape == (2, 1)
+    assert weights.dtype == np.float32
+    assert weights[0, 0] == 1.0
+    assert weights[1, 0] == pytest.approx(1 / 3, rel=1e-4)
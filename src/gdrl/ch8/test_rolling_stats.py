@@ -0,0 +1,44 @@
+import numpy as np
+
+from .rolling_stats import RollingWindow, TrainingStats
+
+
+def test_rolling_window_matches_numpy_over_slices():
+    """Test that the rolling mean/std match np.mean/np.std over the last values."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(loc=100.0, scale=5.0, size=1000)
+    window = RollingWindow(100)
+    for i, value in enumerate(values):
+        window.append(value)
+        last = values[max(0, i - 99) : i + 1]
+        assert len(window) == len(last)
+        assert np.isclose(window.mean(), np.mean(last))
+        assert np.isclose(window.std(), np.std(last), atol=1e-6)
+
+
+def test_rolling_window_empty_is_nan():
+    """Test that an empty window reports NaN statistics."""
+    window = RollingWindow(10)
+    assert np.isnan(window.mean())
+    assert np.isnan(window.std())
+
+
+def test_rolling_window_constant_values_have_zero_std():
+    """Test that cancellation never produces a negative variance."""
+    window = RollingWindow(3)
+    for _ in range(7):
+        window.append(0.1)
+    assert window.std() == 0.0
+
+
+def test_training_stats_tracks_episodes_and_evaluations():
+    """Test that TrainingStats accumulates steps and the rolling windows."""
+    stats = TrainingStats()
+    stats.add_episode(reward=10.0, timesteps=10, exploratory_actions=5)
+    stats.add_episode(reward=20.0, timesteps=20, exploratory_actions=0)
+    stats.add_evaluation(30.0)
+
+    assert stats.total_steps == 30  # noqa: PLR2004
+    assert stats.reward_10.mean() == 15.0  # noqa: PLR2004
+    assert stats.exploration_ratio_100.mean() == 0.25  # noqa: PLR2004
+    assert stats.eval_score_100.mean() == 30.0  # noqa: PLR2004
@@ -0,0 +1,125 @@
+import csv
+
+import numpy as np
+import pytest
+import torch
+
+from .egreedy_strategy import EGreedyStrategy
+from .env_utils import get_make_env_fn
+from .fcq import FCQ
+from .greedy_strategy import GreedyStrategy
+from .nfq import NFQ
+from .sweep import (
+    MedianStoppingRule,
+    SuccessiveHalving,
+    grid_configs,
+    random_configs,
+    run_sweep,
+)
+
+
+class StopAfter:
+    def __init__(self, episode):
+        """Stop every run once it reports ``episode``."""
+        self.episode = episode
+
+    def report(self, _run_id, episode, _score):
+        return episode >= self.episode
+
+
+def make_agent(config):
+    """Create a small NFQ agent from a sweep config."""
+    return NFQ(
+        value_model_fn=lambda ns, na: FCQ(ns, na, hidden_dims=(8,)),
+        value_optimizer_fn=lambda model, lr: torch.optim.SGD(model.parameters(), lr),
+        value_optimizer_lr=config["lr"],
+        training_strategy_fn=lambda: EGreedyStrategy(epsilon=0.5),
+        evaluation_strategy_fn=GreedyStrategy,
+        batch_size=config["batch_size"],
+        epochs=1,
+    )
+
+
+def test_grid_configs_covers_every_combination():
+    """Test that the grid holds the product of the value lists."""
+    configs = grid_configs({"lr": [0.1, 0.01], "batch_size": [16, 32, 64]})
+    assert len(configs) == 6  # noqa: PLR2004
+    assert {"lr": 0.01, "batch_size": 64} in configs
+
+
+def test_random_configs_samples_lists_and_functions():
+    """Test that random configs draw from lists and sampler functions."""
+    space = {"batch_size": [16, 32], "lr": lambda rng: 10 ** rng.uniform(-4, -2)}
+    configs = random_configs(space, 20, seed=0)
+    assert configs == random_configs(space, 20, seed=0)
+    assert {config["batch_size"] for config in configs} == {16, 32}
+    assert all(1e-4 <= config["lr"] <= 1e-2 for config in configs)  # noqa: PLR2004
+
+
+def test_median_stopping_rule_stops_runs_below_the_median():
+    """Test that a run is stopped once it is below the median of other runs."""
+    rule = MedianStoppingRule(grace_episodes=2, min_runs=2)
+    for run_id, score in enumerate([10.0, 20.0]):
+        for episode in (1, 2):
+            assert not rule.report(run_id, episode, score)
+    assert not rule.report(2, 1, 5.0)
+    assert rule.report(2, 2, 5.0)
+    assert not rule.report(3, 1, 30.0)
+    assert not rule.report(3, 2, 30.0)
+
+
+def test_median_stopping_rule_ignores_scores_not_yet_evaluated():
+    """Test that a NaN first score does not keep a run from being stopped."""
+    rule = MedianStoppingRule(grace_episodes=2, min_runs=3)
+    for run_id in range(3):
+        assert not rule.report(run_id, 1, np.nan)
+        assert not rule.report(run_id, 2, 100.0)
+    assert not rule.report(3, 1, np.nan)
+    assert rule.report(3, 2, 0.0)
+
+
+def test_successive_halving_only_judges_runs_at_rungs():
+    """Test that runs are kept or stopped only at rung episodes."""
+    scheduler = SuccessiveHalving(min_episodes=2, reduction_factor=2)
+    assert not scheduler.report(0, 1, 0.0)
+    assert not scheduler.report(0, 2, 10.0)
+    assert scheduler.report(1, 2, 5.0)
+    assert not scheduler.report(2, 2, 20.0)
+    assert not scheduler.report(2, 3, 0.0)
+    assert not scheduler.report(2, 4, 20.0)
+    assert not scheduler.report(3, 2, np.nan)
+
+
+@pytest.mark.parametrize("n_workers", [0, 2])
+def test_run_sweep_stops_runs_and_ranks_results(n_workers, tmp_path):
+    """Test that scheduler-stopped runs end early and the table is written."""
+    make_env_fn, make_env_kargs = get_make_env_fn(env_name="CartPole-v1")
+    configs = grid_configs({"lr": [0.01], "batch_size": [16, 32]})
+    max_episodes = 40
+    rows = run_sweep(
+        make_agent,
+        configs,
+        make_env_fn,
+        make_env_kargs,
+        seed=12,
+        gamma=0.99,
+        max_minutes=1,
+        max_episodes=max_episodes,
+        goal_mean_100_reward=float("inf"),
+        scheduler=StopAfter(2),
+        n_workers=n_workers,
+        torch_threads_per_worker=1,
+        results_path=tmp_path / "results.csv",
+        metrics_sinks=[],
+    )
+    assert sorted(row["run_id"] for row in rows) == [0, 1]
+    assert all(row["status"] == "stopped" for row in rows)
+    assert all(row["episodes"] < max_episodes for row in rows)
+    assert all(row["time_to_goal"] == float("inf") for row in rows)
+    assert all(np.isnan(row["final_eval_score"]) for row in rows)
+    if n_workers == 0:
+        assert all(row["episodes"] == 2 for row in rows)  # noqa: PLR2004
+    with (tmp_path / "results.csv").open() as f:
+        table = list(csv.DictReader(f))
+    assert [int(row["run_id"]) for row in table] == [row["run_id"] for row in rows]
+    assert {"config_lr", "config_batch_size", "time_to_goal"} <= set(table[0])
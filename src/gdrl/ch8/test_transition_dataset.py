@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from .transition_dataset import TransitionDataset
+
+
+def make_dataset(directory, n_transitions=10):
+    """Create a dataset whose rewards number the transitions."""
+    dataset = TransitionDataset.create(directory, n_transitions, (3,))
+    dataset.states[:] = np.arange(n_transitions)[:, None]
+    dataset.actions[:, 0] = np.arange(n_transitions) % 2
+    dataset.rewards[:, 0] = np.arange(n_transitions)
+    dataset.next_states[:] = np.arange(n_transitions)[:, None] + 1
+    dataset.is_terminals[:] = 0.0
+    dataset.flush()
+    return dataset
+
+
+def test_create_and_reopen_memory_mapped(tmp_path):
+    """Test that a written dataset reopens read-only with the same contents."""
+    make_dataset(tmp_path)
+    dataset = TransitionDataset(tmp_path)
+    assert len(dataset) == 10  # noqa: PLR2004
+    assert dataset.state_shape == (3,)
+    assert isinstance(dataset.states, np.memmap)
+    assert dataset.actions.dtype == np.int64
+    assert dataset.rewards[:, 0].tolist() == list(range(10))
+
+
+def test_iter_batches_visits_every_transition_once(tmp_path):
+    """Test that a shuffled pass covers each row once, with aligned fields."""
+    dataset = make_dataset(tmp_path)
+    batches = list(dataset.iter_batches(4, rng=np.random.default_rng(0)))
+    assert sorted(len(batch[0]) for batch in batches) == [2, 4, 4]
+    rewards = np.concatenate([batch[2][:, 0] for batch in batches])
+    assert sorted(rewards.tolist()) == list(range(10))
+    for states, actions, batch_rewards, next_states, _ in batches:
+        assert states.dtype == np.float32
+        assert states.flags.c_contiguous
+        assert np.array_equal(states[:, 0], batch_rewards[:, 0])
+        assert np.array_equal(actions[:, 0], batch_rewards[:, 0].astype(int) % 2)
+        assert np.array_equal(next_states, states + 1)
+
+
+def test_iter_batches_in_order_without_shuffle(tmp_path):
+    """Test that without shuffling the batches follow the dataset order."""
+    dataset = make_dataset(tmp_path)
+    rewards = [batch[2][:, 0].tolist() for batch in dataset.iter_batches(4, False)]
+    assert rewards == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_iter_batches_mix_rows_differently_every_pass(tmp_path):
+    """Test that shuffled batches gather distant rows and regroup every pass."""
+    dataset = make_dataset(tmp_path, n_transitions=64)
+    rng = np.random.default_rng(0)
+    passes = [
+        [
+            frozenset(batch[2][:, 0].tolist())
+            for batch in dataset.iter_batches(16, rng=rng)
+        ]
+        for _ in range(2)
+    ]
+    for batches in passes:
+        assert sorted(len(batch) for batch in batches) == [16] * 4
+        assert all(max(batch) - min(batch) >= 16 for batch in batches)  # noqa: PLR2004
+    assert set(passes[0]) != set(passes[1])
+
+
+def test_mismatched_fields_raise(tmp_path):
+    """Test that fields of different lengths are rejected."""
+    make_dataset(tmp_path)
+    np.save(tmp_path / "rewards.npy", np.zeros((3, 1), dtype=np.float32))
+    with pytest.raises(ValueError, match="different lengths"):
+        TransitionDataset(tmp_path)
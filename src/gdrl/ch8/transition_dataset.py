@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import numpy as np
+
+# Field name, dtype and per-row shape (None for the state shape); the dtypes
+# match ExperienceBuffer, so batches go through FCQ.load without conversion
+FIELDS = (
+    ("states", np.float32, None),
+    ("actions", np.int64, (1,)),
+    ("rewards", np.float32, (1,)),
+    ("next_states", np.float32, None),
+    ("is_terminals", np.float32, (1,)),
+)
+
+
+class TransitionDataset:
+    def __init__(self, directory, mode="r"):
+        """
+        Open an on-disk dataset of transitions as memory-mapped arrays.
+
+        The dataset is a directory with one ``.npy`` file per field: ``states``,
+        ``actions``, ``rewards``, ``next_states`` and ``is_terminals``, laid out
+        like ``ExperienceBuffer``. Only the rows that are read are paged in, so
+        datasets larger than memory can be streamed. Use ``create`` to write one.
+
+        Args:
+        ----
+            directory (str or Path): Directory holding the ``.npy`` files.
+            mode (str): ``np.load`` memory-map mode, ``"r"`` or ``"r+"``.
+
+        """
+        self.directory = Path(directory)
+        for name, _, _ in FIELDS:
+            setattr(self, name, np.load(self.directory / f"{name}.npy", mmap_mode=mode))
+        lengths = {len(getattr(self, name)) for name, _, _ in FIELDS}
+        if len(lengths) != 1:
+            msg = f"Fields of {self.directory} have different lengths: {lengths}"
+            raise ValueError(msg)
+
+    @classmethod
+    def create(cls, directory, n_transitions, state_shape) -> "TransitionDataset":
+        """
+        Create an empty dataset on disk and open it for writing.
+
+        Fill it by assigning to slices of its arrays, e.g.
+        ``dataset.states[start:end] = ...``, then call ``flush``.
+
+        :param directory: Directory to create the ``.npy`` files in.
+        :param n_transitions: Number of transitions the dataset holds.
+        :param state_shape: Shape of a single state.
+        :return: The ``TransitionDataset``, opened in ``"r+"`` mode.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, dtype, shape in FIELDS:
+            array = np.lib.format.open_memmap(
+                directory / f"{name}.npy",
+                mode="w+",
+                dtype=dtype,
+                shape=(
+                    n_transitions,
+                    *(tuple(state_shape) if shape is None else shape),
+                ),
+            )
+            array.flush()
+            del array
+        return cls(directory, mode="r+")
+
+    def __len__(self):
+        """Return the number of transitions in the dataset."""
+        return len(self.states)
+
+    @property
+    def state_shape(self):
+        return self.states.shape[1:]
+
+    def flush(self):
+        for name, _, _ in FIELDS:
+            getattr(self, name).flush()
+
+    def iter_batches(self, batch_size, shuffle=True, rng=None, block_size=None):
+        """
+        Stream the dataset as minibatches of in-memory arrays.
+
+        With ``shuffle``, each batch is gathered from several contiguous blocks
+        of ``block_size`` rows, visited in random order, so reads stay mostly
+        sequential while a batch mixes transitions from across the dataset.
+        The block boundaries start at a random offset on every pass, so the
+        same rows are not grouped together pass after pass, and the rows of a
+        batch are shuffled. Only one batch is held in memory.
+
+        :param batch_size: Number of transitions per batch; the last batch may
+                           be smaller.
+        :param shuffle: Visit the blocks, and their rows, in random order.
+        :param rng: ``np.random.Generator`` used to shuffle.
+        :param block_size: Contiguous rows read at a time when shuffling;
+                           defaults to an eighth of ``batch_size``.
+        :return: Iterator of (states, actions, rewards, next_states,
+                 is_terminals) arrays.
+        """
+        n_rows = len(self)
+        if not shuffle:
+            for start in range(0, n_rows, batch_size):
+                yield self._read(slice(start, min(start + batch_size, n_rows)))
+            return
+
+        rng = np.random.default_rng() if rng is None else rng
+        if block_size is None:
+            block_size = max(1, batch_size // 8)
+        offset = int(rng.integers(block_size))
+        starts = np.r_[0, np.arange(offset or block_size, n_rows, block_size)]
+        ends = np.r_[starts[1:], n_rows]
+        order = rng.permutation(len(starts))
+
+        pieces, n_batch_rows = [], 0
+        for block_start, end in zip(starts[order], ends[order], strict=True):
+            # A block may be split across two batches
+            start = block_start
+            while start < end:
+                n_taken = min(end - start, batch_size - n_batch_rows)
+                pieces.append(np.arange(start, start + n_taken))
+                start += n_taken
+                n_batch_rows += n_taken
+                if n_batch_rows == batch_size:
+                    yield self._read(rng.permutation(np.concatenate(pieces)))
+                    pieces, n_batch_rows = [], 0
+        if pieces:
+            yield self._read(rng.permutation(np.concatenate(pieces)))
+
+    def _read(self, rows):
+        return tuple(
+            np.ascontiguousarray(getattr(self, name)[rows]) for name, _, _ in FIELDS
+        )
@@ -11,6 +11,8 @@ import numpy as np
 from gymnasium import Env, spaces, utils
 from six import StringIO
 
+from src.utils.mdp import OutcomeSampler, TabularMDP
+
 LEFT, DOWN, RIGHT, UP = range(4)
 
 
@@ -125,6 +127,11 @@ class AIMAEnv(Env):
                                 )
                             )
 
+        # The same dynamics as padded outcome arrays, which step samples from
+        # through precomputed alias tables
+        self.mdp = TabularMDP.from_P(self.P)
+        self.outcome_sampler = OutcomeSampler(self.mdp)
+
         self.observation_space = spaces.Discrete(nS)
         self.action_space = spaces.Discrete(nA)
 
@@ -155,9 +162,11 @@ class AIMAEnv(Env):
         return None
 
     def step(self, a):
-        transitions = self.P[self.s][a]
-        i = categorical_sample([t[0] for t in transitions], self.np_random)
-        p, s, r, d = transitions[i]
+        i = self.outcome_sampler.sample(self.s, a, self.np_random)
+        p = float(self.mdp.probs[self.s, a, i])
+        s = int(self.mdp.next_states[self.s, a, i])
+        r = float(self.mdp.rewards[self.s, a, i])
+        d = bool(self.mdp.terminals[self.s, a, i])
         self.s = s
         self.lastaction = a
         return (int(s), r, d, False, {"prob": p})
@@ -165,6 +174,8 @@ class AIMAEnv(Env):
     def reset(self, seed: int | None = None, options: dict | None = None):  # noqa: ARG002
         """Reset the environment to its initial state."""
         super().reset(seed=seed)
+        if seed is not None:
+            self.outcome_sampler.reset()
         self.s = categorical_sample(self.initial_state_distrib, self.np_random)
         self.lastaction = None
         return int(self.s), {}
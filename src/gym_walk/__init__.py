@@ -6,6 +6,7 @@ register(
     # same as below
     id="RandomWalk-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 5, "p_stay": 0.0, "p_backward": 0.5},
     max_episode_steps=100,
@@ -17,6 +18,7 @@ register(
     # same as above
     id="RandomWalkFive-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 5, "p_stay": 0.0, "p_backward": 0.5},
     max_episode_steps=100,
@@ -28,6 +30,7 @@ register(
     # same as below
     id="RandomWalkLarge-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 19, "p_stay": 0.0, "p_backward": 0.5},
     max_episode_steps=100,
@@ -39,6 +42,7 @@ register(
     # same as above
     id="RandomWalkNineteen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 19, "p_stay": 0.0, "p_backward": 0.5},
     max_episode_steps=100,
@@ -50,6 +54,7 @@ register(
     # Technically speaking, this is a bandit MDP
     id="BanditWalk-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 1, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -61,6 +66,7 @@ register(
     # Technically speaking, this is a bandit MDP
     id="BanditDeterministicWalk-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 1, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -72,6 +78,7 @@ register(
     # Technically speaking, this is a bandit MDP
     id="BanditSlipperyWalk-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 1, "p_stay": 0.0, "p_backward": 0.2},
     max_episode_steps=100,
@@ -83,6 +90,7 @@ register(
 register(
     id="WalkThree-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 3, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -92,6 +100,7 @@ register(
 register(
     id="WalkFive-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 5, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -101,6 +110,7 @@ register(
 register(
     id="WalkSeven-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 7, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -110,6 +120,7 @@ register(
 register(
     id="WalkFifthteen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 15, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -119,6 +130,7 @@ register(
 register(
     id="WalkSeventeen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 17, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=1000,
@@ -128,6 +140,7 @@ register(
 register(
     id="WalkNineteen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 19, "p_stay": 0.0, "p_backward": 0.0},
     max_episode_steps=100,
@@ -139,6 +152,7 @@ register(
 register(
     id="SlipperyWalkThree-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 3, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=100,
@@ -148,6 +162,7 @@ register(
 register(
     id="SlipperyWalkFive-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 5, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=100,
@@ -157,6 +172,7 @@ register(
 register(
     id="SlipperyWalkSeven-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 7, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=100,
@@ -166,6 +182,7 @@ register(
 register(
     id="SlipperyWalkFifthteen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 15, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=100,
@@ -175,6 +192,7 @@ register(
 register(
     id="SlipperyWalkSeventeen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 17, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=1000,
@@ -184,6 +202,7 @@ register(
 register(
     id="SlipperyWalkNineteen-v0",
     entry_point="src.gym_walk.envs:WalkEnv",
+    vector_entry_point="src.gym_walk.envs:WalkVectorEnv",
     # left-most and right-most states are terminal
     kwargs={"n_states": 19, "p_stay": 0.5 * 2 / 3.0, "p_backward": 0.5 * 1 / 3.0},
     max_episode_steps=100,
@@ -4,3 +4,4 @@
 """Gymnasium environments for WALK."""
 
 from src.gym_walk.envs.walk_env import WalkEnv
+from src.gym_walk.envs.walk_vector_env import WalkVectorEnv
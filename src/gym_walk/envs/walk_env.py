@@ -1,6 +1,7 @@
 """Gymnasium environment for random walk by Miguel Morales for Grokking Deep Reinforcement Learning."""
 
 import sys
+from functools import cached_property
 from string import ascii_uppercase
 
 import gymnasium as gym
@@ -10,9 +11,52 @@ from gymnasium import spaces, utils
 from gymnasium.envs.toy_text.utils import categorical_sample
 from six import StringIO
 
+from src.utils.mdp import OutcomeSampler, TabularMDP
+
 WEST, EAST = 0, 1
 
 
+def walk_outcomes(n_states, p_stay, p_backward):
+    """
+    Build the outcome tables of a random walk as arrays.
+
+    Every (state, action) pair has three outcomes, forward, stay and backward,
+    matching the entries of ``WalkEnv.P[s][a]`` in order.
+
+    Args:
+    ----
+        n_states (int): Number of non-terminal states.
+        p_stay (float): Probability of staying in place.
+        p_backward (float): Probability of moving against the action.
+
+    Returns:
+    -------
+        tuple: (probs, next_states, rewards, terminals), each of shape
+        ``[nS, nA, 3]`` with ``nS = n_states + 2`` and ``nA = 2``.
+
+    """
+    n_s = n_states + 2
+    p_forward = 1.0 - p_stay - p_backward
+    if not np.isclose(p_forward + p_stay + p_backward, 1.0) or p_forward < 0:
+        msg = f"Invalid probabilities p_stay={p_stay}, p_backward={p_backward}"
+        raise ValueError(msg)
+    s = np.arange(n_s)[:, None]
+    direction = np.where(np.arange(2) == WEST, -1, 1)[None, :]
+    next_states = np.stack(
+        np.broadcast_arrays(
+            np.clip(s + direction, 0, n_s - 1), s, np.clip(s - direction, 0, n_s - 1)
+        ),
+        axis=-1,
+    )
+    s = s[:, :, None]
+    rewards = ((s == n_s - 2) & (next_states == n_s - 1)).astype(np.float64)
+    terminals = ((s >= n_s - 2) & (next_states == n_s - 1)) | (
+        (s <= 1) & (next_states == 0)
+    )
+    probs = np.broadcast_to([p_forward, p_stay, p_backward], next_states.shape)
+    return probs.copy(), next_states, rewards, terminals
+
+
 class WalkEnv(gym.Env):
     metadata = {"render_modes": [None, "human", "ansi"], "render_fps": 5}
 
@@ -37,41 +81,12 @@ class WalkEnv(gym.Env):
             pygame.display.flip()
 
         self.nS = nS = np.prod(self.shape)
-        self.nA = nA = 2
-
-        self.P = {}
-        for s in range(nS):
-            self.P[s] = {}
-            for a in range(nA):
-                p_forward = 1.0 - p_stay - p_backward
-
-                # Ensure state transitions stay within bounds
-                s_forward = np.clip(s - 1 if a == WEST else s + 1, 0, nS - 1)
-                s_backward = np.clip(s + 1 if a == WEST else s - 1, 0, nS - 1)
-
-                # Rewards for transitions
-                r_forward = 1.0 if s == nS - 2 and s_forward == nS - 1 else 0.0
-                r_backward = 1.0 if s == nS - 2 and s_backward == nS - 1 else 0.0
-
-                # Termination checks
-                d_forward = (s >= nS - 2 and s_forward == nS - 1) or (
-                    s <= 1 and s_forward == 0
-                )
-                d_backward = (s >= nS - 2 and s_backward == nS - 1) or (
-                    s <= 1 and s_backward == 0
-                )
-
-                # Transition probabilities
-                self.P[s][a] = [
-                    (p_forward, s_forward, r_forward, d_forward),
-                    (p_stay, s, 0.0, s in [0, nS - 1]),
-                    (p_backward, s_backward, r_backward, d_backward),
-                ]
-
-                # Validate probabilities sum to 1.0
-                assert np.isclose(
-                    p_forward + p_stay + p_backward, 1.0
-                ), f"Probabilities do not sum to 1.0 for state {s}, action {a}"
+        self.nA = 2
+
+        # The dynamics as outcome arrays, built without Python loops; P is the
+        # same model in the classic dict-of-lists form, only built when used
+        self.mdp = TabularMDP(*walk_outcomes(n_states, p_stay, p_backward))
+        self.outcome_sampler = OutcomeSampler(self.mdp)
 
         self.isd = np.zeros(nS)
         self.isd[self.start_state_index] = 1.0
@@ -82,6 +97,16 @@ class WalkEnv(gym.Env):
 
         self.reset()
 
+    @cached_property
+    def P(self):  # noqa: N802
+        """
+        The dynamics as a ``P[s][a]`` dict of ``(prob, next_state, reward, done)`` lists.
+
+        Built from ``mdp`` on first access. For walks with many states, use the
+        arrays or sparse matrices of ``mdp`` instead.
+        """
+        return self.mdp.to_P()
+
     def step(self, action):
         """
         Execute agent's action in the environment.
@@ -109,10 +134,12 @@ class WalkEnv(gym.Env):
         if not self.action_space.contains(action):
             return self.s, 0.0, True, True, {}
 
-        # Fetch transitions and sample
-        transitions = self.P[self.s][action]
-        i = categorical_sample([t[0] for t in transitions], self.np_random)
-        p, s, r, terminated = transitions[i]
+        # Sample one of the (state, action) outcomes from the alias tables
+        i = self.outcome_sampler.sample(self.s, action, self.np_random)
+        p = float(self.mdp.probs[self.s, action, i])
+        s = int(self.mdp.next_states[self.s, action, i])
+        r = float(self.mdp.rewards[self.s, action, i])
+        terminated = bool(self.mdp.terminals[self.s, action, i])
         self.s = s
         self.lastaction = action
 
@@ -127,6 +154,9 @@ class WalkEnv(gym.Env):
 
     def reset(self, *, seed: int | None = None, options: dict | None = None):
         super().reset(seed=seed)
+        if seed is not None:
+            # Drop the uniforms drawn from the previous generator
+            self.outcome_sampler.reset()
         self.s = int(
             categorical_sample(self.isd, self.np_random)
         )  # Ensure state is an integer
@@ -218,9 +248,9 @@ if __name__ == "__main__":
     for s in range(env.nS):
         for a in range(env.nA):
             probs = [t[0] for t in env.P[s][a]]
-            assert np.isclose(
-                sum(probs), 1.0
-            ), f"Probabilities for state {s}, action {a} do not sum to 1"
+            assert np.isclose(sum(probs), 1.0), (
+                f"Probabilities for state {s}, action {a} do not sum to 1"
+            )
 
     print("Testing Pygame rendering...")
     env = WalkEnv(n_states=7, p_stay=0.1, p_backward=0.3, render_mode="human")
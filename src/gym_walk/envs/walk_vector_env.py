@@ -0,0 +1,107 @@
+"""Batched random walks that step thousands of walks with one vectorized draw."""
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from src.gym_walk.envs.walk_env import walk_outcomes
+from src.utils.mdp import TabularMDP
+
+
+class WalkVectorEnv(VectorEnv):
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(
+        self,
+        num_envs,
+        n_states=7,
+        p_stay=0.0,
+        p_backward=0.5,
+        max_episode_steps=None,
+        render_mode=None,
+    ):
+        """
+        Initialize ``num_envs`` random walks stepped together.
+
+        The walks follow the dynamics of ``WalkEnv``, but their states live in
+        one integer array and each ``step`` samples the outcomes of all of them
+        with one uniform draw against precomputed cumulative probabilities.
+        Walks that finished on the previous step are reset to the start state,
+        as in Gymnasium's next-step autoreset. ``info`` holds ``success`` and
+        ``prob`` arrays.
+
+        Args:
+        ----
+            num_envs (int): Number of walks.
+            n_states (int): Number of non-terminal states.
+            p_stay (float): Probability of staying in place.
+            p_backward (float): Probability of moving against the action.
+            max_episode_steps (int): Steps after which a walk is truncated, or
+                None for no limit.
+            render_mode (None): Rendering is not supported.
+
+        """
+        self.num_envs = num_envs
+        self.render_mode = render_mode
+        self.max_episode_steps = max_episode_steps
+        self.mdp = TabularMDP(*walk_outcomes(n_states, p_stay, p_backward))
+        self.probs, self.next_states = self.mdp.probs, self.mdp.next_states
+        self.rewards, self.terminals = self.mdp.rewards, self.mdp.terminals
+        self.cdf = np.cumsum(self.probs, axis=-1)
+        # Exactly 1, so a draw can never fall past the last outcome
+        self.cdf[..., -1] = 1.0
+        self.nS, self.nA = self.probs.shape[:2]
+        self.start_state_index = self.nS // 2
+
+        self.single_observation_space = spaces.Discrete(self.nS)
+        self.single_action_space = spaces.Discrete(self.nA)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self.s = np.full(num_envs, self.start_state_index, dtype=np.int64)
+        self._elapsed_steps = np.zeros(num_envs, dtype=np.int64)
+        self._autoreset = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        del options
+        self.s[:] = self.start_state_index
+        self._elapsed_steps[:] = 0
+        self._autoreset[:] = False
+        return self.s.copy(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        u = self.np_random.random(self.num_envs)
+        outcomes = (self.cdf[self.s, actions] <= u[:, None]).sum(axis=1)
+
+        idx = (self.s, actions, outcomes)
+        s = self.next_states[idx]
+        rewards = self.rewards[idx]
+        terminated = self.terminals[idx]
+        probs = self.probs[idx]
+        self._elapsed_steps += 1
+        if self.max_episode_steps is None:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+        else:
+            truncated = ~terminated & (self._elapsed_steps >= self.max_episode_steps)
+
+        reset = self._autoreset
+        s[reset] = self.start_state_index
+        rewards[reset] = 0.0
+        terminated[reset] = False
+        truncated[reset] = False
+        probs[reset] = 1.0
+        self._elapsed_steps[reset] = 0
+
+        self.s = s
+        self._autoreset = terminated | truncated
+        success = terminated & ((s == 0) | (s == self.nS - 1))
+        return (
+            s.copy(),
+            rewards,
+            terminated,
+            truncated,
+            {"success": success, "prob": probs},
+        )
@@ -0,0 +1,241 @@
+"""Array representation of the dynamics of tabular environments."""
+
+from functools import cached_property
+
+import numpy as np
+from scipy.sparse import csr_array
+
+
+class TabularMDP:
+    def __init__(self, probs, next_states, rewards, terminals):
+        """
+        Initialize an MDP from padded per-(state, action) outcome arrays.
+
+        Outcome ``k`` of taking action ``a`` in state ``s`` happens with
+        probability ``probs[s, a, k]``, leads to ``next_states[s, a, k]``, pays
+        ``rewards[s, a, k]`` and ends the episode if ``terminals[s, a, k]``.
+        Pairs with fewer outcomes than the others are padded with zero
+        probability. This is the array form of the ``P[s][a]`` lists of
+        ``(prob, next_state, reward, done)`` tuples; the dense ``[nS, nA, nS]``
+        views and the sparse per-action ``[nS, nS]`` views are computed on
+        first use. Only the sparse ones fit in memory for large ``nS``.
+
+        Args:
+        ----
+            probs (np.ndarray): ``[nS, nA, K]`` outcome probabilities.
+            next_states (np.ndarray): ``[nS, nA, K]`` next states.
+            rewards (np.ndarray): ``[nS, nA, K]`` rewards.
+            terminals (np.ndarray): ``[nS, nA, K]`` episode-ending flags.
+
+        """
+        self.probs = np.ascontiguousarray(probs, dtype=np.float64)
+        self.next_states = np.ascontiguousarray(next_states, dtype=np.int64)
+        self.rewards = np.ascontiguousarray(rewards, dtype=np.float64)
+        self.terminals = np.ascontiguousarray(terminals, dtype=bool)
+        self.nS, self.nA, self.n_outcomes = self.probs.shape
+
+    @classmethod
+    def from_P(cls, P) -> "TabularMDP":  # noqa: N802, N803
+        """
+        Build the outcome arrays from a ``P[s][a]`` dict of outcome lists.
+
+        :param P: Dict mapping every state to a dict mapping every action to a
+                  list of ``(prob, next_state, reward, done)`` tuples.
+        :return: The equivalent ``TabularMDP``.
+        """
+        n_s, n_a = len(P), len(P[0])
+        k = max(len(P[s][a]) for s in range(n_s) for a in range(n_a))
+        probs = np.zeros((n_s, n_a, k))
+        next_states = np.repeat(np.arange(n_s), n_a * k).reshape(n_s, n_a, k)
+        rewards = np.zeros((n_s, n_a, k))
+        terminals = np.zeros((n_s, n_a, k), dtype=bool)
+        for s in range(n_s):
+            for a in range(n_a):
+                for i, (p, next_s, r, done) in enumerate(P[s][a]):
+                    probs[s, a, i] = p
+                    next_states[s, a, i] = next_s
+                    rewards[s, a, i] = r
+                    terminals[s, a, i] = done
+        return cls(probs, next_states, rewards, terminals)
+
+    def to_P(self):  # noqa: N802
+        """Return the ``P[s][a]`` dict of outcome lists, padding included."""
+        probs = self.probs.tolist()
+        next_states = self.next_states.tolist()
+        rewards = self.rewards.tolist()
+        terminals = self.terminals.tolist()
+        return {
+            s: {
+                a: [
+                    (probs[s][a][k], next_states[s][a][k], rewards[s][a][k], done)
+                    for k, done in enumerate(terminals[s][a])
+                ]
+                for a in range(self.nA)
+            }
+            for s in range(self.nS)
+        }
+
+    @cached_property
+    def transition_probs(self):
+        """``[nS, nA, nS]`` probability of each next state."""
+        return self._dense(self.probs)
+
+    @cached_property
+    def continuation_probs(self):
+        """``[nS, nA, nS]`` probability of each next state without the episode ending."""
+        return self._dense(np.where(self.terminals, 0.0, self.probs))
+
+    @cached_property
+    def expected_rewards(self):
+        """``[nS, nA]`` expected reward of each state-action pair."""
+        return (self.probs * self.rewards).sum(axis=-1)
+
+    @cached_property
+    def sparse_transition_probs(self):
+        """``nA`` CSR ``[nS, nS]`` matrices, one per action, of next-state probabilities."""
+        return self._sparse(self.probs)
+
+    @cached_property
+    def sparse_continuation_probs(self):
+        """``nA`` CSR ``[nS, nS]`` matrices of ``continuation_probs``, one per action."""
+        return self._sparse(np.where(self.terminals, 0.0, self.probs))
+
+    @cached_property
+    def alias_tables(self):
+        """
+        Walker alias tables to sample the outcome of a pair with one uniform.
+
+        Outcome slot ``i`` of pair ``(s, a)`` is picked with probability
+        ``1 / K``; it keeps the slot's own outcome with probability
+        ``accept[s, a, i]`` and otherwise yields outcome ``alias[s, a, i]``.
+        The tables are built with vectorized Vose pairings, ``K - 1`` rounds
+        over all pairs at once, each pairing the pair's smallest remaining
+        scaled probability with its largest.
+
+        :return: Tuple (accept, alias), ``[nS, nA, K]`` float and int arrays.
+        """
+        k = self.n_outcomes
+        scaled = (self.probs * k).reshape(-1, k)
+        rows = np.arange(len(scaled))
+        accept = np.ones_like(scaled)
+        alias = np.tile(np.arange(k), (len(scaled), 1))
+        done = np.zeros(scaled.shape, dtype=bool)
+        for _ in range(k - 1):
+            small = np.argmin(np.where(done, np.inf, scaled), axis=1)
+            large = np.argmax(np.where(done, -np.inf, scaled), axis=1)
+            # Rows whose remaining slots are all full keep accepting them
+            pair = (scaled[rows, small] < 1.0) & (small != large)
+            r, small, large = rows[pair], small[pair], large[pair]
+            accept[r, small] = scaled[r, small]
+            alias[r, small] = large
+            scaled[r, large] -= 1.0 - scaled[r, small]
+            done[r, small] = True
+        return accept.reshape(self.probs.shape), alias.reshape(self.probs.shape)
+
+    def _sparse(self, probs):
+        rows = np.repeat(np.arange(self.nS), self.n_outcomes)
+        matrices = []
+        for a in range(self.nA):
+            # Converting from coordinates adds up outcomes sharing a next state
+            matrix = csr_array(
+                (probs[:, a].ravel(), (rows, self.next_states[:, a].ravel())),
+                shape=(self.nS, self.nS),
+            )
+            matrix.eliminate_zeros()
+            matrices.append(matrix)
+        return tuple(matrices)
+
+    def _dense(self, probs):
+        dense = np.zeros((self.nS, self.nA, self.nS))
+        s, a, _ = np.indices(self.probs.shape)
+        # Outcomes of a pair may share a next state; add them up
+        np.add.at(dense, (s, a, self.next_states), probs)
+        return dense
+
+
+class OutcomeSampler:
+    def __init__(self, mdp, block_size=1024):
+        """
+        Initialize an O(1) sampler of the outcomes of an MDP's pairs.
+
+        Each sample reads one uniform from a block drawn ahead of time and
+        looks up ``mdp.alias_tables``, instead of building the cumulative
+        probabilities of the pair on every step. A block belongs to the
+        generator it was drawn from: sampling with another generator, e.g.
+        after ``reset(seed=...)`` replaced it, draws a new block. The uniforms
+        left in a block are not part of the generator's state, so save and
+        restore ``state_dict`` along with it, as ``get_env_rng_state`` does,
+        and call ``reset`` when the same generator is reseeded in place.
+
+        Args:
+        ----
+            mdp (TabularMDP): MDP whose outcomes are sampled.
+            block_size (int): Uniforms drawn from the generator at a time.
+
+        """
+        self.accept, self.alias = mdp.alias_tables
+        self.n_outcomes = mdp.n_outcomes
+        self.block_size = block_size
+        self._generator = None
+        self._block_state = None
+        self._uniforms = []
+        self._next = 0
+
+    def reset(self):
+        """Discard the uniforms left in the current block."""
+        self._generator = None
+        self._block_state = None
+        self._uniforms = []
+        self._next = 0
+
+    def state_dict(self):
+        """
+        Return the generator state the current block was drawn from and its position.
+
+        :return: Dict to pass to ``load_state_dict``.
+        """
+        return {"block_state": self._block_state, "next": self._next}
+
+    def load_state_dict(self, state, np_random):
+        """
+        Restore ``state_dict``, redrawing its block for ``np_random``.
+
+        The block is redrawn from a copy of the generator, so ``np_random``'s
+        own state is left as it is.
+
+        :param state: State returned by ``state_dict``.
+        :param np_random: Generator later samples are drawn with.
+        """
+        self.reset()
+        if state["block_state"] is None:
+            return
+        bit_generator = type(np_random.bit_generator)()
+        bit_generator.state = state["block_state"]
+        self._draw_block(np.random.Generator(bit_generator))
+        self._generator = np_random
+        self._next = state["next"]
+
+    def sample(self, s, a, np_random):
+        """
+        Sample the outcome index of taking action ``a`` in state ``s``.
+
+        :param s: State.
+        :param a: Action.
+        :param np_random: Generator the blocks of uniforms are drawn from.
+        :return: Index ``k`` of the outcome in the MDP's arrays.
+        """
+        if self._next == len(self._uniforms) or np_random is not self._generator:
+            self._draw_block(np_random)
+            self._generator = np_random
+        x = self._uniforms[self._next]
+        self._next += 1
+        i = min(int(x), self.n_outcomes - 1)
+        if x - i < self.accept[s, a, i]:
+            return i
+        return int(self.alias[s, a, i])
+
+    def _draw_block(self, np_random):
+        self._block_state = np_random.bit_generator.state
+        # Python floats, scaled to [0, K): cheaper to index and split
+        self._uniforms = (np_random.random(self.block_size) * self.n_outcomes).tolist()
+        self._next = 0
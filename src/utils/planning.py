@@ -0,0 +1,448 @@
+"""Dynamic programming on tabular MDPs with batched Bellman backups."""
+
+import functools
+import time
+import warnings
+
+import numpy as np
+from scipy import sparse as sp
+from scipy.linalg import LinAlgError, LinAlgWarning, solve, solve_triangular
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import MatrixRankWarning, spsolve, spsolve_triangular
+
+from src.utils.mdp import TabularMDP
+
+EVALUATION_METHODS = ("sync", "gauss_seidel", "exact")
+# MDPs with at least this many states use sparse matrices by default
+SPARSE_MIN_STATES = 2_000
+
+
+def as_mdp(model):
+    """
+    Return the ``TabularMDP`` of an environment, a ``P`` dict or an MDP.
+
+    :param model: ``TabularMDP``, ``P[s][a]`` dict of outcome lists, or an
+                  environment whose unwrapped env has an ``mdp``, such as the
+                  ``gym_walk`` and ``gym_aima`` ones.
+    :return: The ``TabularMDP``.
+    """
+    if isinstance(model, TabularMDP):
+        return model
+    if isinstance(model, dict):
+        return TabularMDP.from_P(model)
+    return model.unwrapped.mdp
+
+
+def _bootstrap_probs(mdp):
+    # Outcomes that end the episode do not bootstrap from the next state
+    return np.where(mdp.terminals, 0.0, mdp.probs)
+
+
+def _use_sparse(mdp, sparse):
+    return mdp.nS >= SPARSE_MIN_STATES if sparse is None else sparse
+
+
+def _policy_transitions(next_states, bootstrap_probs, sparse):
+    # [nS, nS] probabilities of continuing to each next state under a policy
+    n_states, n_outcomes = next_states.shape
+    idx = (np.repeat(np.arange(n_states), n_outcomes), next_states.ravel())
+    if sparse:
+        # Converting from coordinates adds up outcomes sharing a next state
+        transitions = sp.csr_array(
+            (bootstrap_probs.ravel(), idx), shape=(n_states, n_states)
+        )
+        transitions.eliminate_zeros()
+        return transitions
+    transitions = np.zeros((n_states, n_states))
+    np.add.at(transitions, idx, bootstrap_probs.ravel())
+    return transitions
+
+
+def _solve_exact(transitions, rewards, gamma, sparse):
+    n_states = len(rewards)
+    try:
+        with warnings.catch_warnings():
+            # A singular or ill-conditioned system means values that blow up
+            warnings.simplefilter("error", LinAlgWarning)
+            warnings.simplefilter("error", MatrixRankWarning)
+            if sparse:
+                identity = sp.identity(n_states, format="csc")
+                return spsolve(identity - gamma * transitions.tocsc(), rewards)
+            return solve(np.eye(n_states) - gamma * transitions, rewards)
+    except (LinAlgError, LinAlgWarning, MatrixRankWarning) as e:
+        msg = "The policy never ends an episode; use gamma < 1"
+        raise ValueError(msg) from e
+
+
+def _stalled(deltas, window):
+    # Sweeps never grow the largest value change. Without discounting, those
+    # of a policy that ends every episode shrink it at least once every nS
+    # sweeps; changes that stay as large are values growing without bound
+    return len(deltas) > window and deltas[-1] >= deltas[-1 - window]
+
+
+def _as_policy(pi, n_states):
+    if callable(pi):
+        return np.array([pi(s) for s in range(n_states)], dtype=np.int64)
+    return np.asarray(pi, dtype=np.int64)
+
+
+def _stats(method, deltas, start, converged, window):
+    return {
+        "method": method,
+        "iterations": len(deltas),
+        "deltas": np.array(deltas),
+        "seconds": time.perf_counter() - start,
+        "converged": converged,
+        "diverged": not converged and _stalled(deltas, window),
+    }
+
+
+def q_values(V, mdp, gamma=1.0, sparse=None):  # noqa: N803
+    """
+    Return the action values of a one-step lookahead on ``V``.
+
+    :param V: ``[nS]`` state values, or ``[G, nS]`` for ``G`` discount factors.
+    :param mdp: MDP, see ``as_mdp``.
+    :param gamma: Discount factor, or ``[G]`` discount factors.
+    :param sparse: Back up with one sparse matrix-vector product per action,
+                   using ``mdp.sparse_continuation_probs``, instead of gathering
+                   the values of every outcome. None picks sparse for MDPs with
+                   at least ``SPARSE_MIN_STATES`` states.
+    :return: ``[nS, nA]`` action values, or ``[G, nS, nA]``.
+    """
+    mdp = as_mdp(mdp)
+    gamma = np.asarray(gamma, dtype=np.float64)[..., None, None]
+    V = np.asarray(V)  # noqa: N806
+    if _use_sparse(mdp, sparse):
+        next_values = np.stack(
+            [(matrix @ V.T).T for matrix in mdp.sparse_continuation_probs], axis=-1
+        )
+    else:
+        next_values = (_bootstrap_probs(mdp) * V[..., mdp.next_states]).sum(axis=-1)
+    return mdp.expected_rewards + gamma * next_values
+
+
+def policy_evaluation(
+    pi,
+    mdp,
+    gamma=1.0,
+    theta=1e-10,
+    method="sync",
+    max_iterations=None,
+    return_stats=False,
+    sparse=None,
+):
+    """
+    Compute the state-value function of a deterministic policy.
+
+    Args:
+    ----
+        pi: ``[nS]`` array of actions, or a function mapping a state to its
+            action.
+        mdp: MDP to evaluate on, see ``as_mdp``.
+        gamma (float): Discount factor.
+        theta (float): Stop once no state value changes by more than this.
+        method (str): ``"sync"`` backs up every state from the previous
+            sweep's values at once; ``"gauss_seidel"`` uses the values already
+            updated in the current sweep, which needs fewer sweeps; ``"exact"``
+            solves the Bellman equations as a linear system.
+        max_iterations (int): Maximum number of sweeps, or None for no limit.
+            Sweeps also stop, without converging, once the values diverge:
+            with ``gamma = 1``, a policy that never ends an episode from some
+            states and keeps collecting rewards there.
+        return_stats (bool): Also return the convergence telemetry.
+        sparse (bool): Use the policy's transitions as a sparse matrix: sweeps
+            are sparse matrix-vector products or triangular solves, and the
+            exact method a sparse LU solve, which scales to walks with millions
+            of states. None picks sparse for MDPs with at least
+            ``SPARSE_MIN_STATES`` states.
+
+    Returns:
+    -------
+        np.ndarray: ``[nS]`` state values, followed by a dict with the
+        ``method``, number of ``iterations``, per-sweep max value change
+        ``deltas``, ``seconds``, whether it ``converged`` and whether the
+        values ``diverged`` when ``return_stats`` is set.
+
+    """
+    if method not in EVALUATION_METHODS:
+        msg = f"Unknown evaluation method: {method}"
+        raise ValueError(msg)
+    start = time.perf_counter()
+    mdp = as_mdp(mdp)
+    states = np.arange(mdp.nS)
+    pi = _as_policy(pi, mdp.nS)
+    rewards = mdp.expected_rewards[states, pi]
+    bootstrap_probs = _bootstrap_probs(mdp)[states, pi]
+    next_states = mdp.next_states[states, pi]
+    sparse = _use_sparse(mdp, sparse)
+    if method != "sync" or sparse:
+        transitions = _policy_transitions(next_states, bootstrap_probs, sparse)
+
+    V = np.zeros(mdp.nS)
+    deltas = []
+    if method == "exact":
+        V = _solve_exact(transitions, rewards, gamma, sparse)
+        return (V, _stats(method, deltas, start, True, mdp.nS)) if return_stats else V
+
+    if method == "gauss_seidel":
+        # A sweep in state order solves (I - gamma L) V' = R + gamma U V, where
+        # L is the strictly lower and U the upper triangle of the transitions
+        if sparse:
+            lower = sp.identity(mdp.nS, format="csr") - gamma * sp.tril(
+                transitions, -1, format="csr"
+            )
+            upper = gamma * sp.triu(transitions, format="csr")
+        else:
+            lower = np.eye(mdp.nS) - gamma * np.tril(transitions, -1)
+            upper = gamma * np.triu(transitions)
+
+    converged = False
+    while max_iterations is None or len(deltas) < max_iterations:
+        if method == "sync" and sparse:
+            new_V = rewards + gamma * (transitions @ V)
+        elif method == "sync":
+            new_V = rewards + gamma * (bootstrap_probs * V[next_states]).sum(axis=1)
+        elif sparse:
+            new_V = spsolve_triangular(lower, rewards + upper @ V, lower=True)
+        else:
+            new_V = solve_triangular(lower, rewards + upper @ V, lower=True)
+        deltas.append(float(np.max(np.abs(new_V - V))))
+        V = new_V
+        if deltas[-1] < theta:
+            converged = True
+            break
+        if _stalled(deltas, mdp.nS):
+            break
+    return (V, _stats(method, deltas, start, converged, mdp.nS)) if return_stats else V
+
+
+def policy_improvement(V, mdp, gamma=1.0, pi=None, sparse=None):  # noqa: N803
+    """
+    Return the greedy policy with respect to ``V``.
+
+    :param V: ``[nS]`` state values.
+    :param mdp: MDP, see ``as_mdp``.
+    :param gamma: Discount factor.
+    :param pi: Current ``[nS]`` policy; where its action ties for the best, it
+               is kept, so policy iteration cannot cycle between equally good
+               policies.
+    :param sparse: Use sparse backups, see ``q_values``.
+    :return: ``[nS]`` array of greedy actions.
+    """
+    Q = q_values(V, mdp, gamma, sparse=sparse)
+    new_pi = np.argmax(Q, axis=1)
+    if pi is not None:
+        pi = np.asarray(pi)
+        current = Q[np.arange(len(pi)), pi]
+        keep = np.isclose(current, Q.max(axis=1), rtol=0, atol=1e-12)
+        new_pi = np.where(keep, pi, new_pi)
+    return new_pi
+
+
+def proper_policy(mdp):
+    """
+    Return a policy that ends every episode it can with probability 1.
+
+    Each state takes the action most likely to end the episode or to move
+    closer, in outcome steps, to a state where one can. States from which no
+    sequence of actions ends an episode take action 0.
+
+    :param mdp: MDP, see ``as_mdp``.
+    :return: ``[nS]`` array of actions.
+    """
+    mdp = as_mdp(mdp)
+    possible = mdp.probs > 0
+    ending = possible & mdp.terminals
+    continuing = possible & ~mdp.terminals
+    can_end = np.flatnonzero(ending.any(axis=(1, 2)))
+    states = np.broadcast_to(np.arange(mdp.nS)[:, None, None], mdp.probs.shape)
+    # Reversed transition graph, plus a node nS leading to the states where
+    # some action can end the episode
+    sources = np.concatenate(
+        [mdp.next_states[continuing], np.full(len(can_end), mdp.nS)]
+    )
+    targets = np.concatenate([states[continuing], can_end])
+    graph = sp.csr_array(
+        (np.ones(len(sources)), (sources, targets)), shape=(mdp.nS + 1, mdp.nS + 1)
+    )
+    steps = csgraph.shortest_path(graph, unweighted=True, indices=mdp.nS)[:-1]
+    next_steps = np.where(continuing, steps[mdp.next_states], np.inf)
+    # The likeliest to make progress, so the first evaluation needs few sweeps
+    progress = np.where(ending | (next_steps < steps[:, None, None]), mdp.probs, 0.0)
+    return np.argmax(progress.sum(axis=-1), axis=1)
+
+
+def policy_iteration(
+    mdp,
+    gamma=1.0,
+    theta=1e-10,
+    evaluation="exact",
+    pi=None,
+    max_iterations=None,
+    max_evaluation_iterations=None,
+    return_stats=False,
+    sparse=None,
+):
+    """
+    Alternate policy evaluation and improvement until the policy is stable.
+
+    Args:
+    ----
+        mdp: MDP to solve, see ``as_mdp``.
+        gamma (float): Discount factor.
+        theta (float): Stopping criterion of the iterative evaluations.
+        evaluation (str): Evaluation method, see ``policy_evaluation``. When
+            the exact solve fails because a policy never ends an episode with
+            ``gamma = 1``, that policy is evaluated with Gauss-Seidel sweeps.
+        pi (np.ndarray): Initial ``[nS]`` policy. Defaults to
+            ``proper_policy``, so that with ``gamma = 1`` the first
+            evaluation has finite values wherever any policy can.
+        max_iterations (int): Maximum number of improvements, or None. They
+            also stop after an evaluation whose values diverge.
+        max_evaluation_iterations (int): Maximum number of sweeps of each
+            iterative evaluation, or None.
+        return_stats (bool): Also return the convergence telemetry.
+        sparse (bool): Use sparse matrices, see ``policy_evaluation``.
+
+    Returns:
+    -------
+        tuple: (V, pi), the ``[nS]`` optimal state values and actions,
+        followed by a dict with the number of ``iterations`` (improvements),
+        the ``evaluation_iterations`` and ``evaluation_converged`` of each
+        evaluation, ``seconds`` and whether it ``converged``, to a stable
+        policy with converged values, when ``return_stats`` is set.
+
+    """
+    if evaluation not in EVALUATION_METHODS:
+        msg = f"Unknown evaluation method: {evaluation}"
+        raise ValueError(msg)
+    start = time.perf_counter()
+    mdp = as_mdp(mdp)
+    pi = proper_policy(mdp) if pi is None else _as_policy(pi, mdp.nS)
+    evaluation_iterations, evaluation_converged = [], []
+    converged = False
+    while max_iterations is None or len(evaluation_iterations) < max_iterations:
+        kwargs = {"return_stats": True, "sparse": sparse}
+        try:
+            V, stats = policy_evaluation(  # noqa: N806
+                pi, mdp, gamma, theta, evaluation, max_evaluation_iterations, **kwargs
+            )
+        except ValueError:
+            # Only the exact solve raises, for a policy that never ends
+            V, stats = policy_evaluation(  # noqa: N806
+                pi,
+                mdp,
+                gamma,
+                theta,
+                "gauss_seidel",
+                max_evaluation_iterations,
+                **kwargs,
+            )
+        evaluation_iterations.append(stats["iterations"])
+        evaluation_converged.append(stats["converged"])
+        new_pi = policy_improvement(V, mdp, gamma, pi=pi, sparse=sparse)
+        if np.array_equal(new_pi, pi):
+            converged = stats["converged"]
+            break
+        if stats["diverged"]:
+            # Improving on values that grow without bound does not settle
+            break
+        pi = new_pi
+    if not return_stats:
+        return V, pi
+    return (
+        V,
+        pi,
+        {
+            "iterations": len(evaluation_iterations),
+            "evaluation_iterations": evaluation_iterations,
+            "evaluation_converged": evaluation_converged,
+            "seconds": time.perf_counter() - start,
+            "converged": converged,
+        },
+    )
+
+
+def value_iteration(
+    mdp,
+    gamma=1.0,
+    theta=1e-10,
+    in_place=False,
+    max_iterations=None,
+    return_stats=False,
+    sparse=None,
+):
+    """
+    Compute the optimal values and a greedy policy by value iteration.
+
+    Args:
+    ----
+        mdp: MDP to solve, see ``as_mdp``.
+        gamma (float or array): Discount factor. A ``[G]`` array solves the
+            MDP for every discount factor at once, with one batched backup per
+            sweep, until all of them have converged.
+        theta (float): Stop once no state value changes by more than this.
+        in_place (bool): Gauss-Seidel sweeps that back up the states in order,
+            each from the values already updated in the same sweep. Only for a
+            scalar ``gamma``.
+        max_iterations (int): Maximum number of sweeps, or None for no limit.
+            Sweeps also stop, without converging, once the largest value
+            change has not shrunk over ``nS`` sweeps, which with ``gamma = 1``
+            means optimal values that grow without bound.
+        return_stats (bool): Also return the convergence telemetry.
+        sparse (bool): Use sparse backups for the synchronous sweeps, see
+            ``q_values``.
+
+    Returns:
+    -------
+        tuple: (V, pi), the ``[nS]`` (or ``[G, nS]``) optimal state values and
+        greedy actions, followed by the telemetry dict described in
+        ``policy_evaluation`` when ``return_stats`` is set.
+
+    """
+    start = time.perf_counter()
+    mdp = as_mdp(mdp)
+    gamma = np.asarray(gamma, dtype=np.float64)
+    if in_place and gamma.ndim:
+        msg = "In-place value iteration needs a scalar gamma"
+        raise ValueError(msg)
+    V = np.zeros((*gamma.shape, mdp.nS))
+    deltas = []
+    converged = False
+    if in_place:
+        rewards, bootstrap_probs = mdp.expected_rewards, _bootstrap_probs(mdp)
+    while max_iterations is None or len(deltas) < max_iterations:
+        if in_place:
+            delta = 0.0
+            for s in range(mdp.nS):
+                next_values = V[mdp.next_states[s]]
+                v = np.max(
+                    rewards[s] + gamma * (bootstrap_probs[s] * next_values).sum(1)
+                )
+                delta = max(delta, abs(v - V[s]))
+                V[s] = v
+        else:
+            Q = q_values(V, mdp, gamma, sparse=sparse)  # noqa: N806
+            # Elementwise over the few actions; a max along the short last
+            # axis is several times slower on large MDPs
+            new_V = functools.reduce(np.maximum, np.moveaxis(Q, -1, 0))
+            delta = np.max(np.abs(new_V - V))
+            V = new_V
+        deltas.append(float(delta))
+        if deltas[-1] < theta:
+            converged = True
+            break
+        if _stalled(deltas, mdp.nS):
+            break
+    pi = np.argmax(q_values(V, mdp, gamma, sparse=sparse), axis=-1)
+    if not return_stats:
+        return V, pi
+    return (
+        V,
+        pi,
+        _stats(
+            "gauss_seidel" if in_place else "sync", deltas, start, converged, mdp.nS
+        ),
+    )
@@ -1,6 +1,8 @@
 import gymnasium as gym
+import numpy as np
 
 from src import gym_walk
+from src.gym_walk.envs import WalkEnv, WalkVectorEnv
 
 
 def test_gym_walk_import():
@@ -28,3 +30,77 @@ def test_gym_walk_import():
 
     # Explicitly use gym_walk (even if just accessing the module itself)
     assert gym_walk is not None
+
+
+def test_walk_vector_env_matches_walk_env_dynamics():
+    """Test that the batched walk's outcome tables match WalkEnv.P."""
+    env = WalkEnv(n_states=5, p_stay=1 / 3, p_backward=1 / 6)
+    vector_env = WalkVectorEnv(2, n_states=5, p_stay=1 / 3, p_backward=1 / 6)
+    for s in range(env.nS):
+        for a in range(env.nA):
+            for k, (p, next_s, r, terminated) in enumerate(env.P[s][a]):
+                assert np.isclose(vector_env.probs[s, a, k], p)
+                assert vector_env.next_states[s, a, k] == next_s
+                assert vector_env.rewards[s, a, k] == r
+                assert vector_env.terminals[s, a, k] == terminated
+
+
+def test_walk_vector_env_steps_and_autoresets():
+    """Test that walks finish with reward and success, then restart."""
+    envs = gym.make_vec("WalkFive-v0", num_envs=3)
+    assert isinstance(envs, WalkVectorEnv)
+    obs, _ = envs.reset(seed=0)
+    assert obs.tolist() == [3, 3, 3]
+
+    actions = np.array([1, 1, 0])
+    for _ in range(2):
+        obs, rewards, terminated, truncated, info = envs.step(actions)
+    assert obs.tolist() == [5, 5, 1]
+    assert not terminated.any()
+    obs, rewards, terminated, truncated, info = envs.step(actions)
+    assert obs.tolist() == [6, 6, 0]
+    assert rewards.tolist() == [1.0, 1.0, 0.0]
+    assert terminated.all()
+    assert info["success"].all()
+    assert not truncated.any()
+
+    obs, rewards, terminated, _, _ = envs.step(actions)
+    assert obs.tolist() == [3, 3, 3]
+    assert not rewards.any()
+    assert not terminated.any()
+
+
+def test_walk_vector_env_is_reproducible_and_truncates():
+    """Test that seeded runs repeat and long walks are truncated."""
+    runs = []
+    for _ in range(2):
+        envs = WalkVectorEnv(64, n_states=19, max_episode_steps=5)
+        envs.reset(seed=42)
+        steps = [envs.step(np.ones(64, dtype=np.int64)) for _ in range(6)]
+        runs.append(np.stack([obs for obs, *_ in steps]))
+        truncated = np.stack([step[3] for step in steps])
+        assert truncated[4].all()
+        assert not truncated[:4].any()
+        assert not truncated[5].any()
+    assert np.array_equal(runs[0], runs[1])
+    assert np.all(runs[0][5] == 10)  # noqa: PLR2004
+
+
+def test_tabular_envs_are_reproducible_under_reset_seed():
+    """Test that reseeding repeats a rollout, even mid-block of uniforms."""
+
+    def rollout(env, seed, n_steps=300):
+        states = [env.reset(seed=seed)[0]]
+        for t in range(n_steps):
+            state, _, terminated, _, _ = env.step(t % env.action_space.n)
+            states.append(state)
+            if terminated:
+                states.append(env.reset()[0])
+        return states
+
+    for env_id in ("SlipperyWalkSeven-v0", "RussellNorvigGridworld-v0"):
+        env = gym.make(env_id).unwrapped
+        first = rollout(env, seed=7)
+        assert rollout(env, seed=7) == first
+        assert rollout(gym.make(env_id).unwrapped, seed=7) == first
+        assert rollout(env, seed=8) != first
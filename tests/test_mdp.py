@@ -0,0 +1,161 @@
+"""Tests for the array representation of tabular MDPs."""
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from src import gym_aima, gym_walk
+from src.gdrl.ch8.env_utils import get_env_rng_state, set_env_rng_state
+from src.gym_aima.envs import AIMAEnv
+from src.gym_walk.envs import WalkEnv
+from src.utils.mdp import OutcomeSampler, TabularMDP
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        WalkEnv(n_states=5, p_stay=0.2, p_backward=0.3),
+        AIMAEnv(noise=0.2, living_rew=-0.04, sink=False),
+        AIMAEnv(noise=0.2, living_rew=0.0, sink=True),
+    ],
+)
+def test_env_mdp_matches_P(env) -> None:  # noqa: N802
+    """Test that an env's outcome arrays hold exactly the entries of its P."""
+    mdp = env.mdp
+    for s in range(mdp.nS):
+        for a in range(mdp.nA):
+            for k, (p, next_s, r, done) in enumerate(env.P[s][a]):
+                assert mdp.probs[s, a, k] == pytest.approx(p)
+                assert mdp.next_states[s, a, k] == next_s
+                assert mdp.rewards[s, a, k] == pytest.approx(r)
+                assert mdp.terminals[s, a, k] == done
+            assert mdp.probs[s, a, len(env.P[s][a]) :].sum() == 0
+
+
+def test_dense_views() -> None:
+    """Test the dense transition, continuation and reward arrays."""
+    mdp = gym.make("RussellNorvigGridworld-v0").unwrapped.mdp
+    assert mdp.transition_probs.shape == (12, 4, 12)
+    assert np.allclose(mdp.transition_probs.sum(axis=-1), 1.0)
+    # From the start state, going up reaches the cell above with 0.8
+    assert mdp.transition_probs[8, 3, 4] == pytest.approx(0.8)
+
+    # Stepping into the goal (state 3) ends the episode
+    assert mdp.transition_probs[2, 2, 3] == pytest.approx(0.8)
+    assert mdp.continuation_probs[2, 2, 3] == 0
+    assert mdp.expected_rewards[2, 2] == pytest.approx(0.8 - 0.04)
+    assert gym_aima is not None
+
+
+def test_from_P_to_P_round_trip() -> None:  # noqa: N802
+    """Test that to_P restores the dict a TabularMDP was built from."""
+    env = gym.make("SlipperyWalkFive-v0").unwrapped
+    mdp = TabularMDP.from_P(env.P)
+    assert mdp.to_P() == env.P
+    assert np.array_equal(mdp.next_states, env.mdp.next_states)
+    assert gym_walk is not None
+
+
+def test_sparse_views_match_dense() -> None:
+    """Test that the per-action CSR matrices hold the dense views."""
+    mdp = gym.make("AIMAGridworldHighNoiseSmallLivingCostWithSink-v0").unwrapped.mdp
+    assert len(mdp.sparse_transition_probs) == mdp.nA
+    for a in range(mdp.nA):
+        transitions = mdp.sparse_transition_probs[a]
+        assert transitions.format == "csr"
+        assert np.allclose(transitions.toarray(), mdp.transition_probs[:, a])
+        assert np.allclose(
+            mdp.sparse_continuation_probs[a].toarray(), mdp.continuation_probs[:, a]
+        )
+
+
+def test_large_walk_without_P() -> None:  # noqa: N802
+    """Test that a large walk builds its arrays but not its P dict."""
+    env = WalkEnv(n_states=200_000)
+    assert "P" not in vars(env)
+    transitions = env.mdp.sparse_transition_probs[1]
+    assert transitions.shape == (env.nS, env.nS)
+    # Forward and backward per state; the zero-probability stay is dropped
+    assert transitions.nnz == 2 * env.nS
+    assert WalkEnv(n_states=3).P[1][1][0] == (0.5, 2, 0.0, False)
+
+
+def test_alias_tables_encode_probs() -> None:
+    """Test that the alias tables give back every pair's outcome probabilities."""
+    rng = np.random.default_rng(0)
+    probs = rng.random((20, 3, 5))
+    probs[probs < 0.4] = 0  # noqa: PLR2004
+    probs[..., 0] += 0.1
+    probs /= probs.sum(axis=-1, keepdims=True)
+    shape = probs.shape
+    mdp = TabularMDP(probs, np.zeros(shape), np.zeros(shape), np.zeros(shape))
+    accept, alias = mdp.alias_tables
+    decoded = np.zeros(shape)
+    s, a, k = np.indices(shape)
+    np.add.at(decoded, (s, a, k), accept / shape[-1])
+    np.add.at(decoded, (s, a, alias), (1 - accept) / shape[-1])
+    assert np.allclose(decoded, probs)
+
+
+def test_outcome_sampler_frequencies() -> None:
+    """Test sampled outcome frequencies and reseeding of the sampler."""
+    mdp = AIMAEnv(noise=0.2, living_rew=0.0, sink=False).mdp
+    sampler = OutcomeSampler(mdp, block_size=100)
+    rng = np.random.default_rng(0)
+    counts = np.bincount(
+        [sampler.sample(8, 3, rng) for _ in range(20_000)],
+        minlength=mdp.n_outcomes,
+    )
+    assert np.allclose(counts / counts.sum(), mdp.probs[8, 3], atol=0.01)
+
+    # Across a block boundary, and again after reseeding
+    rng = np.random.default_rng(1)
+    first = [sampler.sample(8, 3, rng) for _ in range(150)]
+    sampler.reset()
+    rng = np.random.default_rng(1)
+    assert [sampler.sample(8, 3, rng) for _ in range(150)] == first
+
+
+def test_outcome_sampler_draws_a_new_block_for_a_new_generator() -> None:
+    """Test that a block is not reused after the generator is replaced."""
+    mdp = AIMAEnv(noise=0.2, living_rew=0.0, sink=False).mdp
+    sampler = OutcomeSampler(mdp, block_size=100)
+    for _ in range(10):
+        sampler.sample(8, 3, np.random.default_rng(0))
+    fresh = OutcomeSampler(mdp, block_size=100)
+    rng, fresh_rng = np.random.default_rng(1), np.random.default_rng(1)
+    assert [sampler.sample(8, 3, rng) for _ in range(150)] == [
+        fresh.sample(8, 3, fresh_rng) for _ in range(150)
+    ]
+
+
+@pytest.mark.parametrize("fresh_env", [False, True])
+def test_restoring_the_rng_state_mid_episode_repeats_the_outcomes(fresh_env) -> None:
+    """Test that outcomes after a restored RNG state match the original run."""
+
+    def make_env():
+        env = AIMAEnv(noise=0.2, living_rew=-0.04, sink=False)
+        env.outcome_sampler = OutcomeSampler(env.mdp, block_size=16)
+        return env
+
+    def run(env, n_steps=100):
+        outcomes = []
+        for _ in range(n_steps):
+            s, _r, d, _truncated, _info = env.step(0)
+            outcomes.append(s)
+            if d:
+                env.reset()
+        return outcomes
+
+    env = make_env()
+    env.reset(seed=0)
+    run(env, 10)
+    state, s = get_env_rng_state(env), env.s
+    expected = run(env)
+
+    if fresh_env:
+        env = make_env()
+        env.reset(seed=1)
+    set_env_rng_state(env, state)
+    env.s = s
+    assert run(env) == expected
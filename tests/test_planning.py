@@ -0,0 +1,213 @@
+"""Tests for dynamic programming on tabular MDPs."""
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from src import gym_aima, gym_walk
+from src.gym_walk.envs import WalkEnv
+from src.utils.planning import (
+    EVALUATION_METHODS,
+    SPARSE_MIN_STATES,
+    policy_evaluation,
+    policy_improvement,
+    policy_iteration,
+    proper_policy,
+    value_iteration,
+)
+
+AIMA_IDS = [
+    env_id
+    for env_id in gym.registry
+    if env_id.startswith("AIMAGridworld") and gym_aima is not None
+]
+
+
+def loop_policy_evaluation(pi, P, gamma=1.0, theta=1e-10):  # noqa: N803
+    """Evaluate a policy with the chapter 3 notebook's loops."""
+    prev_V = np.zeros(len(P))  # noqa: N806
+    while True:
+        V = np.zeros(len(P))  # noqa: N806
+        for s in range(len(P)):
+            for prob, next_state, reward, done in P[s][pi[s]]:
+                V[s] += prob * (reward + gamma * prev_V[next_state] * (not done))
+        if np.max(np.abs(prev_V - V)) < theta:
+            break
+        prev_V = V.copy()  # noqa: N806
+    return V
+
+
+@pytest.mark.parametrize(
+    "env_id", ["SlipperyWalkSeven-v0", "RussellNorvigGridworld-v0"]
+)
+@pytest.mark.parametrize("method", EVALUATION_METHODS)
+def test_policy_evaluation_matches_loops(env_id, method) -> None:
+    """Test every evaluation method against the notebook's loop version."""
+    env = gym.make(env_id)
+    P = env.unwrapped.P  # noqa: N806
+    pi = np.random.default_rng(0).integers(len(P[0]), size=len(P))
+    expected = loop_policy_evaluation(pi, P, gamma=0.99)
+    V, stats = policy_evaluation(pi, env, gamma=0.99, method=method, return_stats=True)  # noqa: N806
+    assert np.allclose(V, expected, atol=1e-8)
+    assert stats["converged"]
+    assert stats["method"] == method
+    assert gym_walk is not None
+
+
+def test_gauss_seidel_needs_fewer_sweeps() -> None:
+    """Test that in-place sweeps converge in fewer sweeps than synchronous ones."""
+    env = gym.make("SlipperyWalkSeven-v0")
+    pi = np.zeros(env.unwrapped.mdp.nS, dtype=np.int64)
+    _, sync = policy_evaluation(pi, env, method="sync", return_stats=True)
+    _, gauss_seidel = policy_evaluation(
+        pi, env, method="gauss_seidel", return_stats=True
+    )
+    assert gauss_seidel["iterations"] < sync["iterations"]
+    assert len(sync["deltas"]) == sync["iterations"]
+
+
+def test_exact_evaluation_of_a_never_ending_policy() -> None:
+    """Test that the linear solve rejects gamma 1 when episodes never end."""
+    env = gym.make("AIMAGridworldLowNoiseLargeLivingBonusNoSink-v0")
+    # Always pushing left into the wall never reaches a terminal state
+    pi = np.zeros(env.unwrapped.mdp.nS, dtype=np.int64)
+    with pytest.raises(ValueError, match="never ends"):
+        policy_evaluation(pi, env, gamma=1.0, method="exact")
+    V = policy_evaluation(pi, env, gamma=0.9, method="exact")  # noqa: N806
+    assert np.all(np.isfinite(V))
+
+
+def test_russell_norvig_optimal_values() -> None:
+    """Test the textbook optimal values of the 3x4 gridworld."""
+    env = gym.make("RussellNorvigGridworld-v0")
+    V, pi = value_iteration(env, gamma=1.0)  # noqa: N806
+    assert V[8] == pytest.approx(0.705, abs=1e-3)
+    assert V[2] == pytest.approx(0.918, abs=1e-3)
+    # Up from the start, right along the top row
+    assert pi[8] == gym_aima.envs.aima_env.UP
+    assert pi[2] == gym_aima.envs.aima_env.RIGHT
+
+
+@pytest.mark.parametrize(
+    "env_id", ["SlipperyWalkSeven-v0", "RussellNorvigGridworld-v0"]
+)
+def test_solvers_agree(env_id) -> None:
+    """Test that value and policy iteration find the same solution."""
+    env = gym.make(env_id)
+    V, pi = value_iteration(env, gamma=0.99)  # noqa: N806
+    V_in_place, _ = value_iteration(env, gamma=0.99, in_place=True)  # noqa: N806
+    for evaluation in EVALUATION_METHODS:
+        V_pi, pi_pi = policy_iteration(env, gamma=0.99, evaluation=evaluation)  # noqa: N806
+        assert np.allclose(V_pi, V, atol=1e-8)
+    assert np.allclose(V_in_place, V, atol=1e-8)
+    assert np.allclose(
+        policy_evaluation(pi, env, gamma=0.99, method="exact"), V, atol=1e-8
+    )
+    assert np.array_equal(policy_improvement(V, env, gamma=0.99), pi)
+
+
+def test_gamma_sweep_of_every_aima_gridworld() -> None:
+    """Test solving every AIMA gridworld for a grid of discount factors at once."""
+    gammas = np.linspace(0.5, 0.99, 8)
+    assert len(AIMA_IDS) > 30  # noqa: PLR2004
+    for env_id in AIMA_IDS:
+        env = gym.make(env_id)
+        V, pi, stats = value_iteration(env, gamma=gammas, return_stats=True)  # noqa: N806
+        assert V.shape == pi.shape == (len(gammas), 12)
+        assert stats["converged"]
+        for i in (0, len(gammas) - 1):
+            V_single, _ = value_iteration(env, gamma=gammas[i])  # noqa: N806
+            assert np.allclose(V[i], V_single, atol=1e-8)
+            V_pi = policy_evaluation(pi[i], env, gamma=gammas[i], method="exact")  # noqa: N806
+            assert np.allclose(V_pi, V[i], atol=1e-8)
+
+
+@pytest.mark.parametrize("evaluation", EVALUATION_METHODS)
+def test_undiscounted_policy_iteration_of_every_aima_gridworld(evaluation) -> None:
+    """Test policy iteration with gamma 1, where some policies never end."""
+    for env_id in AIMA_IDS:
+        env = gym.make(env_id)
+        V, pi, stats = policy_iteration(  # noqa: N806
+            env, gamma=1.0, evaluation=evaluation, return_stats=True
+        )
+        V_vi, _, stats_vi = value_iteration(env, gamma=1.0, return_stats=True)  # noqa: N806
+        if "LivingBonus" in env_id and stats_vi["diverged"]:
+            # Living forever pays a bonus on every step: no finite values
+            assert not stats["converged"]
+            continue
+        assert stats["converged"], env_id
+        assert stats_vi["converged"], env_id
+        assert np.allclose(V, V_vi, atol=1e-6), env_id
+
+
+def test_proper_policy_ends_every_episode() -> None:
+    """Test that the initial policy iteration policy ends every episode."""
+    for env_id in AIMA_IDS:
+        env = gym.make(env_id)
+        pi = proper_policy(env)
+        # With gamma 1, the exact solve only succeeds for such policies
+        V = policy_evaluation(pi, env, gamma=1.0, method="exact")  # noqa: N806
+        assert np.all(np.isfinite(V))
+
+
+def test_diverging_evaluation_stops() -> None:
+    """Test that sweeps on values growing without bound stop unconverged."""
+    env = gym.make("AIMAGridworldLowNoiseMediumLivingCostNoSink-v0")
+    # Pushing left into the wall pays the living cost forever
+    pi = np.zeros(env.unwrapped.mdp.nS, dtype=np.int64)
+    for method in ("sync", "gauss_seidel"):
+        _, stats = policy_evaluation(pi, env, method=method, return_stats=True)
+        assert not stats["converged"]
+        assert stats["diverged"]
+    _, _, stats = policy_iteration(
+        env, gamma=1.0, evaluation="gauss_seidel", pi=pi, return_stats=True
+    )
+    assert stats["iterations"] == 1
+    assert not stats["converged"]
+    _, _, stats = policy_iteration(
+        env, gamma=1.0, evaluation="gauss_seidel", max_iterations=5, return_stats=True
+    )
+    assert stats["converged"]
+    _, _, stats = policy_iteration(
+        env, gamma=1.0, pi=pi, max_evaluation_iterations=3, return_stats=True
+    )
+    assert max(stats["evaluation_iterations"]) <= 3  # noqa: PLR2004
+
+
+def test_invalid_arguments() -> None:
+    """Test the errors on an unknown method and a batched in-place sweep."""
+    env = gym.make("RandomWalkFive-v0")
+    with pytest.raises(ValueError, match="Unknown evaluation method"):
+        policy_evaluation(np.zeros(7, dtype=np.int64), env, method="jacobi")
+    with pytest.raises(ValueError, match="scalar gamma"):
+        value_iteration(env, gamma=[0.9, 0.99], in_place=True)
+
+
+@pytest.mark.parametrize("method", EVALUATION_METHODS)
+def test_sparse_matches_dense(method) -> None:
+    """Test that sparse and dense backups compute the same values."""
+    env = gym.make("SlipperyWalkSeventeen-v0")
+    pi = np.random.default_rng(0).integers(2, size=env.unwrapped.mdp.nS)
+    dense = policy_evaluation(pi, env, gamma=0.95, method=method, sparse=False)
+    sparse = policy_evaluation(pi, env, gamma=0.95, method=method, sparse=True)
+    assert np.allclose(sparse, dense, atol=1e-9)
+    gammas = [0.9, 1.0]
+    V, pi = value_iteration(env, gamma=gammas, sparse=False)  # noqa: N806
+    V_sparse, pi_sparse = value_iteration(env, gamma=gammas, sparse=True)  # noqa: N806
+    assert np.allclose(V_sparse, V, atol=1e-9)
+    assert np.array_equal(pi_sparse, pi)
+
+
+def test_large_random_walk() -> None:
+    """Test the exact values of a random walk too large for dense matrices."""
+    n_states = 100_000
+    env = WalkEnv(n_states=n_states)
+    assert env.mdp.nS >= SPARSE_MIN_STATES
+    # Going right has probability 1/2, so V(s) = s / (n_states + 1)
+    pi = np.ones(env.mdp.nS, dtype=np.int64)
+    V = policy_evaluation(pi, env, method="exact")  # noqa: N806
+    assert np.allclose(V[1:-1], np.arange(1, n_states + 1) / (n_states + 1))
+    V, pi, stats = value_iteration(env, gamma=0.5, return_stats=True)  # noqa: N806
+    assert stats["converged"]
+    V_pi = policy_evaluation(pi, env, gamma=0.5, method="exact")  # noqa: N806
+    assert np.allclose(V_pi, V, atol=1e-9)